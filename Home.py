@@ -1,6 +1,6 @@
 import streamlit as st
 import pandas as pd
-from py import sql, data_source
+from py import sql, data_source, migrations
 from PIL import Image
 import streamlit_authenticator as stauth
 pd.options.mode.chained_assignment = None
@@ -9,9 +9,31 @@ st.set_page_config(page_title='NDA GBB Analytics')
 
 
 sql_lite_connect = st.secrets['nda_gbb_connection']['DB_CONNECTION']
+data_source.configure_pool(**st.secrets.get('connection_pool', {}))
 
 data_source.run_query(sql.get_users(), sql_lite_connect)
 
+# Pages read tables the migrations create; stop with instructions rather
+# than fail on a missing table deep inside a page.
+if not st.session_state.get('schema_checked'):
+    schema_version = migrations.current_version(sql_lite_connect)
+    if schema_version < migrations.SCHEMA_VERSION:
+        st.error(
+            f'The database schema is at version {schema_version}, but this '
+            f'app needs version {migrations.SCHEMA_VERSION}. Run '
+            '`python -m py.migrations <DB_CONNECTION>` and reload the page.'
+        )
+        st.stop()
+    st.session_state.summary_refresh_due = migrations.summary_refresh_due(
+        sql_lite_connect
+    )
+    st.session_state.schema_checked = True
+if st.session_state.summary_refresh_due:
+    st.warning(
+        'Game summaries were never built in full. Run '
+        '`python -m py.migrations <DB_CONNECTION> --refresh-summary`.'
+    )
+
     #st.header(body='', divider='blue')
 image = Image.open(fp='NDA_LOGO.jpg')
 
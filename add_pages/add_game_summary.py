@@ -1,8 +1,7 @@
 import streamlit as st
 import time
 import pandas as pd
-from py import sql, data_source
-import sqlitecloud
+from py import sql, data_source, summary, schedule
 pd.options.mode.chained_assignment = None
 
 
@@ -25,37 +24,27 @@ def load_data():
     return players, games, game_summary
 
 
+# ----------------------------------------------------------------------------
+@st.cache_resource
+def load_game_index(games):
+    # games is re-read every rerun; key the index on its contents
+    return schedule.GameIndex(games)
+
+
 # ----------------------------------------------------------------------------
 @st.cache_data
-def get_season_data(games, players, season):
+def get_season_data(players, season):
 
-    games_season = games[games['SEASON'] == season]
     players_season = players[players['YEAR'] == season]
     players_season = players_season[players_season['NUMBER'] != '0']
-    games_season['DATE_DTTM'] = pd.to_datetime(games_season['DATE'])
-    games_season = games_season.sort_values(by='DATE_DTTM', ascending=False)
-    games_season['LABEL'] = (
-        games_season['OPPONENT'] + ' - ' + games_season['DATE']
-    )
 
-    return games_season, players_season
-
-
-# ----------------------------------------------------------------------------
-@st.cache_data
-def get_selected_game(games_season, game_select):
-    game_val_opp = game_select.split(' - ')[0]
-    game_val_date = game_select.split(' - ')[1]
-    this_game = games_season[
-        (games_season['OPPONENT']==game_val_opp)
-        & (games_season['DATE']==game_val_date)
-    ]
-    return this_game
+    return players_season
 
 
 # ----------------------------------------------------------------------------
 
 players, games, game_summary_data = load_data()
+game_index = load_game_index(games)
 
 my_season_options = (
     games['SEASON'].sort_values(ascending=False).unique().tolist()
@@ -65,18 +54,17 @@ with left:
     season = st.radio(
         label='Select Season', options=my_season_options, horizontal=True
     )
-games_season, players_season = get_season_data(
-    games=games, players=players, season=season
-)
+players_season = get_season_data(players=players, season=season)
 players_season = players_season[players_season['NUMBER'] != 0]
-my_game_options = games_season['LABEL'].unique().tolist()
 
 with right:
-    game_select = st.selectbox(label='Select Game', options=my_game_options)
+    # Newest game first, shown as 'OPPONENT - DATE'
+    game_id = st.selectbox(
+        label='Select Game',
+        options=game_index.game_ids_for(season=season),
+        format_func=game_index.label,
+    )
 
-this_game = get_selected_game(
-    games_season=games_season, game_select=game_select
-)
 data_columns = game_summary_data.columns.tolist()
 player_values = players_season['NUMBER'].astype(int).sort_values().tolist()
 game_list = game_summary_data['GAME_ID'].unique().tolist()
@@ -87,8 +75,7 @@ player_val = st.radio(
 this_player_val = game_summary_data[
     (game_summary_data['PLAYER_ID'].astype(int) == player_val)
     & (
-        game_summary_data['GAME_ID'].astype(int)
-        == this_game['GAME_ID'].astype(int).iloc[0]
+        game_summary_data['GAME_ID'].astype(int) == game_id
     )
 ]
 for col in ['TWO_FGM', 'TWO_FGA', 'THREE_FGM', 'THREE_FGA', 'FTM', 'FTA',
@@ -99,7 +86,7 @@ for col in ['TWO_FGM', 'TWO_FGA', 'THREE_FGM', 'THREE_FGA', 'FTM', 'FTA',
 if len(this_player_val) == 0:
     this_player_val = pd.DataFrame({
         'PLAYER_ID': [player_val],
-        'GAME_ID': [this_game['GAME_ID'].astype(int).iloc[0]],
+        'GAME_ID': [game_id],
         'TWO_FGM': [0],
         'TWO_FGA': [0],
         'THREE_FGM': [0],
@@ -211,71 +198,32 @@ with st.form(key='Game Data', clear_on_submit=False):
         )
     save = st.form_submit_button(label='Save')
     if save:
-        my_id = (
-            str(object=player_val)
-            + '_'
-            + this_game['GAME_ID'].astype(int).astype(str).iloc[0]
-        )
-        game_summary_ids = game_summary_data.copy()
-        game_summary_ids['_id'] = (
-            game_summary_ids['PLAYER_ID'].astype(dtype=str)
-            + '_'
-            + (
-                game_summary_ids['GAME_ID'].astype(dtype=int)
-                                           .astype(dtype=str)
-                                           .values
+        data_source.execute(
+            sql=sql.upsert_game_summary_sql(),
+            connection=sql_lite_connect,
+            params=(
+                player_val,
+                str(game_id),
+                str(two_fgm),
+                str(two_fga),
+                str(three_fgm),
+                str(three_fga),
+                str(ftm),
+                str(fta),
+                str(off_rebounds),
+                str(def_rebounds),
+                str(assists),
+                str(steals),
+                str(blocks),
+                str(turnover),
+                str(fouls_val)
             )
         )
-
-        game_summary_ids_list = game_summary_ids['_id'].unique().tolist()
-        if my_id not in game_summary_ids_list:
-            with sqlitecloud.connect(sql_lite_connect) as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    sql=sql.insert_game_summary_sql(),
-                    parameters=(
-                        player_val,
-                        str(this_game['GAME_ID'].astype(int).values[0]),
-                        str(two_fgm),
-                        str(two_fga),
-                        str(three_fgm),
-                        str(three_fga),
-                        str(ftm),
-                        str(fta),
-                        str(off_rebounds),
-                        str(def_rebounds),
-                        str(assists),
-                        str(steals),
-                        str(blocks),
-                        str(turnover),
-                        str(fouls_val)
-                    )
-                )
-                conn.commit()
-        else:
-            with sqlitecloud.connect(sql_lite_connect) as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    sql=sql.update_game_summary_sql(),
-                    parameters=(
-                        str(two_fgm),
-                        str(two_fga),
-                        str(three_fgm),
-                        str(three_fga),
-                        str(ftm),
-                        str(fta),
-                        str(off_rebounds),
-                        str(def_rebounds),
-                        str(assists),
-                        str(steals),
-                        str(blocks),
-                        str(turnover),
-                        str(fouls_val),
-                        str(player_val),
-                        str(this_game['GAME_ID'].astype(int).values[0])
-                    )
-                )
-                conn.commit()
+        summary.refresh_game_summary(
+            connection=sql_lite_connect,
+            game_id=game_id,
+            player_id=player_val
+        )
         st.write('Added to DB!')
         time.sleep(.1)
         st.rerun()
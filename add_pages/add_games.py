@@ -1,8 +1,7 @@
 import streamlit as st
 import time
 import pandas as pd
-import sqlitecloud
-from py import sql, data_source
+from py import sql, data_source, summary
 pd.options.mode.chained_assignment = None
 
 
@@ -76,33 +75,35 @@ if selected_season:
             delete = st.form_submit_button(label='Delete Game', key='delete_game_btn')
 
         if save:
-            with sqlitecloud.connect(sql_lite_connect) as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    sql=sql.insert_game_sql(),
-                    parameters=(
-                        str(game_id),
-                        str(opponent),
-                        str(location),
-                        str(date),
-                        str(season),
-                    ),
-                )
-                conn.commit()
+            data_source.execute(
+                sql=sql.insert_game_sql(),
+                connection=sql_lite_connect,
+                params=(
+                    str(game_id),
+                    str(opponent),
+                    str(location),
+                    str(date),
+                    str(season),
+                ),
+            )
+            summary.refresh_game_summary(
+                connection=sql_lite_connect, game_id=game_id
+            )
             st.success('Game Added')
             st.write(f'Added {opponent} to DB')
             time.sleep(0.5)
             st.rerun()
 
         if delete:
-            with sqlitecloud.connect(sql_lite_connect) as conn:
-                cursor = conn.cursor()
-                st.write(f'Deleting Game {str(game_id)} from DB')
-                cursor.execute(
-                    sql=sql.delete_game_sql(),
-                    parameters=(str(game_id),),
-                )
-                conn.commit()
+            st.write(f'Deleting Game {str(game_id)} from DB')
+            data_source.execute(
+                sql=sql.delete_game_sql(),
+                connection=sql_lite_connect,
+                params=(str(game_id),),
+            )
+            summary.refresh_game_summary(
+                connection=sql_lite_connect, game_id=game_id
+            )
             st.success('Game Deleted')
             time.sleep(0.5)
             st.rerun()
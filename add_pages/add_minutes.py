@@ -2,8 +2,7 @@ import streamlit as st
 import pandas as pd
 import time
 import numpy as np
-import sqlitecloud
-from py import sql, data_source, utils as ut
+from py import sql, data_source, summary, schedule, utils as ut
 pd.options.mode.chained_assignment = None
 
 sql_lite_connect = st.secrets['nda_gbb_connection']['DB_CONNECTION']
@@ -22,32 +21,14 @@ def load_data():
 
 # ----------------------------------------------------------------------------
 @st.cache_data
-def get_season_data(games, players, season):
-
-    games_season = games[games['SEASON'] == season]
+def get_season_data(players, season):
     players_season = players[players['YEAR'] == season]
-
-    games_season['LABEL'] = (
-        games_season['OPPONENT'] + ' - ' + games_season['DATE']
-    )
-    games_season['DATE_DTTM'] = pd.to_datetime(games_season['DATE'])
-    games_season = games_season.sort_values(by='DATE_DTTM', ascending=False)
-    return games_season, players_season
-
-# ----------------------------------------------------------------------------
-@st.cache_data
-def get_selected_game(games_season, game_select):
-    game_val_opp = game_select.split(' - ')[0]
-    game_val_date = game_select.split(' - ')[1]
-    this_game = games_season[
-        (games_season['OPPONENT']==game_val_opp)
-        & (games_season['DATE']==game_val_date)
-    ]
-    return this_game
+    return players_season
 
 # ----------------------------------------------------------------------------
 
 players, games = load_data()
+game_index = schedule.get_game_index(games)
 
 my_season_options = (
         games['SEASON'].sort_values(ascending=False).unique().tolist()
@@ -63,24 +44,20 @@ with st.form(key='minutes_form', clear_on_submit=False):
             horizontal=True,
         )
 
-    games_season, players_season = get_season_data(
-        games=games, players=players, season=season
-    )
+    players_season = get_season_data(players=players, season=season)
     players_season = players_season[players_season['NUMBER'] != 0]
-    my_game_options = games_season['LABEL'].unique().tolist()
 
     with game_col:
-        game_select = st.selectbox(
-            label='Select Game', options=my_game_options
+        # Newest game first, shown as 'OPPONENT - DATE'
+        game_id = st.selectbox(
+            label='Select Game',
+            options=game_index.game_ids_for(season=season),
+            format_func=game_index.label,
         )
 
-    this_game = get_selected_game(
-        games_season=games_season, game_select=game_select
-    )
     player_values = (
         players_season['NUMBER'].astype(int).sort_values().tolist()
     )
-    game_list = this_game['GAME_ID'].unique().tolist()
 
     player_val = st.radio(
         label='Select Player', options=player_values, horizontal=True
@@ -167,24 +144,26 @@ with st.form(key='minutes_form', clear_on_submit=False):
         else:
             half_time_out = minutes_out * 60 + seconds_out
             time_out = half_time + half_time_out
-        with sqlitecloud.connect(sql_lite_connect) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                sql=sql.insert_minutes_sql(),
-                parameters=(
-                    str(game_list[0]),
-                    str(player_val),
-                    int(time_in),
-                    int(time_out),
-                    int(points_in),
-                    int(points_out),
-                    int(opp_points_in),
-                    int(opp_points_out),
-                ),
-            )
-            conn.commit()
+        data_source.execute(
+            sql=sql.insert_minutes_sql(),
+            connection=sql_lite_connect,
+            params=(
+                str(game_id),
+                str(player_val),
+                int(time_in),
+                int(time_out),
+                int(points_in),
+                int(points_out),
+                int(opp_points_in),
+                int(opp_points_out),
+            ),
+        )
+        # Season average minutes back-fill every game without minutes.
+        summary.refresh_game_summary(
+            connection=sql_lite_connect, season=season
+        )
         st.success(
-            f'Minutes Added for Player {player_val} in Game {game_list[0]} '\
+            f'Minutes Added for Player {player_val} in Game {game_id} '\
             f'from {time_in} seconds to {time_out} seconds with '\
             f'team points {points_in} to {points_out} and opponent points {opp_points_in} to {opp_points_out}.'
         )
@@ -1,8 +1,7 @@
 import streamlit as st
 import time
 import pandas as pd
-import sqlitecloud
-from py import sql, data_source
+from py import sql, data_source, summary
 pd.options.mode.chained_assignment = None
 
 
@@ -60,18 +59,19 @@ if selected_season:
                 label='Delete Player', key='delete_player'
             )
         if save:
-            with sqlitecloud.connect(sql_lite_connect) as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    sql=sql.insert_player_sql(),
-                    parameters=(
-                        str(number),
-                        str(first_name),
-                        str(last_name),
-                        str(selected_season)
-                    )
+            data_source.execute(
+                sql=sql.insert_player_sql(),
+                connection=sql_lite_connect,
+                params=(
+                    str(number),
+                    str(first_name),
+                    str(last_name),
+                    str(selected_season)
                 )
-                conn.commit()
+            )
+            summary.refresh_game_summary(
+                connection=sql_lite_connect, season=selected_season
+            )
             st.write('Players Added') 
             st.write(f'Added {last_name} to DB')
             time.sleep(.5)
@@ -79,16 +79,17 @@ if selected_season:
             st.rerun()
 
         if delete:
-            with sqlitecloud.connect(sql_lite_connect) as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    sql=sql.delete_player_sql(),
-                    parameters=(
-                        str(number),
-                        str(selected_season)
-                    )
+            data_source.execute(
+                sql=sql.delete_player_sql(),
+                connection=sql_lite_connect,
+                params=(
+                    str(number),
+                    str(selected_season)
                 )
-                conn.commit()
+            )
+            summary.refresh_game_summary(
+                connection=sql_lite_connect, season=selected_season
+            )
             st.write('Player Deleted')
             time.sleep(.5)
             st.rerun()
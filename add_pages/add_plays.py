@@ -1,18 +1,39 @@
 import time
-import sqlitecloud
 import numpy as np
 import pandas as pd
+import polars as pl
 import streamlit as st
 from plotly import graph_objs as go
 from streamlit_plotly_events import plotly_events
-from py import utils, data_source, sql
+from py import utils, data_source, sql, summary, write_queue, scoring, metrics, schedule
 
 st.set_page_config(layout="wide", initial_sidebar_state="collapsed")
 
 SQL_CONN = st.secrets["nda_gbb_connection"]["DB_CONNECTION"]
+# Play entry writes go to a local journal and sync in the background
+WRITE_QUEUE = write_queue.get_queue(SQL_CONN)
+# Synced shots are scored into PLAY_EXPECTED_POINTS in the background
+WRITE_QUEUE.add_listener(scoring.get_ingest_scorer(SQL_CONN))
 SHOT_DEFENSES = ["Open", "Guarded", "Heavily Guarded"]
 GRID_SPACING = 20
 CHART_WIDTH, CHART_HEIGHT = 350, 400
+# TEAM_GAME_TOTALS column to the metrics.BASE_COLUMNS name
+TEAM_TOTALS_BASE_COLUMNS = {
+    'TEAM_OFFENSIVE_REBOUNDS': 'OFFENSIVE_REBOUNDS',
+    'TEAM_DEFENSIVE_REBOUNDS': 'DEFENSIVE_REBOUNDS',
+    'TEAM_TWO_FGM': 'TWO_FGM',
+    'TEAM_TWO_FGA': 'TWO_FGA',
+    'TEAM_THREE_FGM': 'THREE_FGM',
+    'TEAM_THREE_FGA': 'THREE_FGA',
+    'TEAM_FTM': 'FTM',
+    'TEAM_FTA': 'FTA',
+    'TEAM_FGM': 'FGM',
+    'TEAM_FGA': 'FGA',
+    'TEAM_TURNOVERS': 'TURNOVER',
+    'TEAM_ASSISTS': 'ASSISTS',
+    'TEAM_STEALS': 'STEALS',
+    'TEAM_BLOCKS': 'BLOCKS',
+}
 
 if "refresh_pbp" not in st.session_state:
     st.session_state.refresh_pbp = False
@@ -24,6 +45,8 @@ if 'refresh_game_stat_version' not in st.session_state:
     st.session_state.refresh_game_stat_version = False
 if 'game_stat_version' not in st.session_state:
     st.session_state.game_stat_version = 0
+if 'play_nums' not in st.session_state:
+    st.session_state.play_nums = {}
 
 @st.cache_resource
 def load_shot_spots(connection: str):
@@ -33,17 +56,26 @@ def load_shot_spots(connection: str):
 def load_player_game(connection: str):
     return data_source.run_query(sql=sql.get_player_game_sql(), connection=connection)
 
+@st.cache_resource(show_spinner=False)
+def load_game_index(connection: str):
+    return schedule.GameIndex(load_player_game(connection))
+
 @st.cache_data(show_spinner=False)
-def load_game_summary(connection: str, version: int):
-    return data_source.run_query(sql=sql.get_game_summary_sql(), connection=connection)
+def load_game_summary(connection: str, game_id: int, version: int, synced: int):
+    return data_source.run_query(
+        sql=sql.get_game_summary_game_sql(),
+        connection=connection,
+        params=[game_id],
+    )
 
 @st.cache_data(show_spinner=False)
-def load_pbp_data_cached(game_selelct, version: int):
-    my_sql = sql.get_play_sql().replace("?", str(game_selelct))
-    return data_source.run_query(sql=my_sql, connection=SQL_CONN)
+def load_pbp_data_cached(game_id: int, version: int, synced: int):
+    return data_source.run_query(
+        sql=sql.get_play_sql(), connection=SQL_CONN, params=[game_id]
+    )
 
 @st.cache_data(show_spinner=False)
-def load_game_stats(connection, version: int):
+def load_game_stats(connection, version: int, synced: int):
     return data_source.run_query(sql=sql.get_current_game_stats_plays_sql(), connection=connection)
 
 @st.cache_data(show_spinner=False)
@@ -110,100 +142,44 @@ def create_df(
     ]
     return pd.DataFrame([row], columns=cols)
 
-def create_stat_df(player_number, game_val_final, stat_type):
-    cols = ["GAME_ID", "NUMBER", "STAT_TYPE"]
-    row = [game_val_final, player_number, stat_type]
-    return pd.DataFrame([row], columns=cols)
-
-def get_values_needed(game_val: str, game_df: pd.DataFrame, player_val: str):
-    opponent_name, game_date = game_val.split(" - ")
-    game_row = game_df[
-        (game_df["OPPONENT"] == opponent_name) & (game_df["DATE"] == game_date)
-    ]
+def get_values_needed(game_id: int, player_val: str):
     player_number = int(player_val.split(" - ")[0])
-    game_id = int(game_row["GAME_ID"].values[0])
-    return player_number, game_id
-
-def upsert_game_summary(player_number, game_id, SQL_CONN):
-    # Build formatted SQL for this player/game
-    new_query = (
-        sql.get_formatted_game_sql()
-        .replace("this_game_id", str(game_id))
-        .replace("this_player_id", str(player_number))
-    )
-
-    # Pull fresh computed summary for this player/game
-    new_game_summary = data_source.run_query(sql=new_query, connection=SQL_CONN)
-
-    # Load existing summaries
-    game_summary_data = load_game_summary(SQL_CONN, st.session_state.game_version)
-
-    # Build composite ID
-    my_id = f"{player_number}_{game_id}"
-
-    # Build list of existing IDs
-    game_summary_ids = game_summary_data.copy()
-    game_summary_ids["_id"] = (
-        game_summary_ids["PLAYER_ID"].astype(str)
-        + "_"
-        + game_summary_ids["GAME_ID"].astype(int).astype(str)
-    )
-    existing_ids = set(game_summary_ids["_id"].unique().tolist())
-
-    # Extract values in correct order
-    if len(new_game_summary) == 0:
-        vals = [
-            str(0),  # TWO_FGM,
-            str(0),  # TWO_FGA,
-            str(0),  # THREE_FGM,
-            str(0),  # THREE_FGA,
-            str(0),  # FTM,
-            str(0),  # FTA,
-            str(0),  # OFFENSIVE_REBOUNDS,
-            str(0),  # DEFENSIVE_REBOUNDS,
-            str(0),  # ASSISTS,
-            str(0),  # STEALS,
-            str(0),  # BLOCKS,
-            str(0),  # TURNOVER,
-            str(0),  # FOULS,
-        ]
-    else:
-        vals = [
-            str(new_game_summary["TWO_FGM"].values[0]),
-            str(new_game_summary["TWO_FGA"].values[0]),
-            str(new_game_summary["THREE_FGM"].values[0]),
-            str(new_game_summary["THREE_FGA"].values[0]),
-            str(new_game_summary["FTM"].values[0]),
-            str(new_game_summary["FTA"].values[0]),
-            str(new_game_summary["OFFENSIVE_REBOUNDS"].values[0]),
-            str(new_game_summary["DEFENSIVE_REBOUNDS"].values[0]),
-            str(new_game_summary["ASSISTS"].values[0]),
-            str(new_game_summary["STEALS"].values[0]),
-            str(new_game_summary["BLOCKS"].values[0]),
-            str(new_game_summary["TURNOVER"].values[0]),
-            str(new_game_summary["FOULS"].values[0]),
-        ]
-
-    # Insert or update
-    with sqlitecloud.connect(SQL_CONN) as conn:
-        cursor = conn.cursor()
-
-        if my_id not in existing_ids:
-            cursor.execute(
-                sql=sql.insert_game_summary_sql(),
-                parameters=(player_number, str(game_id), *vals),
-            )
-        else:
-            cursor.execute(
-                sql=sql.update_game_summary_sql(),
-                parameters=(*vals, str(player_number), str(game_id)),
-            )
+    return player_number, int(game_id)
+
+def summary_statements(player_number, game_id):
+    # Recount this player/game from GAME_STATS_PLAYS into its GAME_SUMMARY
+    # row (insert or update on the (PLAYER_ID, GAME_ID) key), then refresh
+    # the matching materialized summary row
+    return [
+        (
+            sql.upsert_game_summary_from_plays_sql(),
+            (int(player_number), int(game_id), int(game_id), int(player_number)),
+        ),
+        *summary.refresh_statements(game_id=game_id, player_id=player_number),
+    ]
 
-        conn.commit()
-    return new_game_summary
+def queue_stat_plays(player_number, game_id, stat_types):
+    # Stat rows and the summary recount are journaled together, so they
+    # reach the remote in one ordered batch
+    WRITE_QUEUE.enqueue_many([
+        *[
+            (sql.insert_game_play(), (str(game_id), str(player_number), str(stat_type)))
+            for stat_type in stat_types
+        ],
+        *summary_statements(player_number=player_number, game_id=game_id),
+    ])
+
+def next_play_num(game_id, pbp_df):
+    # Shots still waiting to sync aren't in pbp_df yet, so remember the
+    # last number handed out for each game as well
+    synced_max = int(pbp_df["PLAY_NUM"].max()) if len(pbp_df) > 0 else 0
+    play_num = max(synced_max, st.session_state.play_nums.get(game_id, 0)) + 1
+    st.session_state.play_nums[game_id] = play_num
+    return play_num
 
 shot_spots = load_shot_spots(SQL_CONN)
 player_game = load_player_game(SQL_CONN)
+game_index = load_game_index(SQL_CONN)
 
 games = player_game.sort_values(by="SEASON", ascending=False).reset_index(drop=True)
 season_list = games["SEASON"].unique().tolist()
@@ -215,26 +191,46 @@ with top_left:
     season = st.radio("Season", season_list, horizontal=True)
 
 games_season = games[games["SEASON"] == season].copy()
-games_season["DATE_DTTM"] = pd.to_datetime(games_season["DATE"])
-games_season = games_season.sort_values(by="DATE_DTTM")
-games_season["GAME_LABEL"] = games_season["GAME_LABEL"].astype(str)
-game_list = games_season["GAME_LABEL"].unique().tolist()[::-1]
 
 with top_mid:
-    game_select = st.selectbox("Game", game_list, index=0)
+    # Newest game first, shown as 'OPPONENT - DATE'
+    game_id = st.selectbox(
+        "Game",
+        game_index.game_ids_for(season=season),
+        index=0,
+        format_func=game_index.label,
+    )
     
 with top_right:
     if st.button("Clear Cache", key="clear_cache_btn", type='primary'):
         load_pbp_data_cached.clear()
         load_player_game.clear()
+        load_game_index.clear()
         load_game_summary.clear()
         st.success("Cache cleared")
         time.sleep(1)
         st.rerun()
-
-game = games_season[games_season["GAME_LABEL"] == game_select].iloc[0]
-game_id = int(game["GAME_ID"])
-game_val = game["GAME_LABEL"]
+    pending_writes = WRITE_QUEUE.pending_count()
+    st.caption(f"Pending sync: {pending_writes}")
+    blocked_write = WRITE_QUEUE.blocked_write()
+    if blocked_write is not None:
+        st.error(
+            f"Sync stopped at a write that failed "
+            f"{blocked_write['attempts']} times: {blocked_write['last_error']}"
+        )
+        if st.button("Retry Write", key="retry_blocked_btn"):
+            WRITE_QUEUE.retry_blocked()
+            st.rerun()
+        if st.button("Skip Write", key="discard_blocked_btn"):
+            WRITE_QUEUE.discard_blocked()
+            st.rerun()
+    if st.button("Sync Now", key="sync_now_btn", disabled=pending_writes == 0):
+        remaining = WRITE_QUEUE.flush()
+        if remaining == 0:
+            st.rerun()
+        st.warning(f"{remaining} still pending: {WRITE_QUEUE.last_error}")
+
+game_val = game_index.label(game_id)
 
 games_season["NUMBER_INT"] = games_season["NUMBER"].astype(int)
 unique_players = games_season.sort_values("NUMBER_INT")["PLAYER_LABEL"].unique()
@@ -245,8 +241,12 @@ with col_chart:
     clicked = plotly_events(plot_fig=fig, click_event=True, key=f"shot-capture-{game_id}")
 
 # Load pbp data (cached, versioned)
-pbp_data = load_pbp_data_cached(game_select, st.session_state.pbp_version)
-game_stat_plays = load_game_stats(SQL_CONN, st.session_state.game_stat_version)
+pbp_data = load_pbp_data_cached(
+    game_id, st.session_state.pbp_version, WRITE_QUEUE.synced()
+)
+game_stat_plays = load_game_stats(
+    SQL_CONN, st.session_state.game_stat_version, WRITE_QUEUE.synced()
+)
 # Add shot flow
 if clicked:
     ev = clicked[0]
@@ -283,7 +283,7 @@ if clicked:
                 add = st.form_submit_button(label="Add Play")
                 if add:
                     player_number, game_val_final = get_values_needed(
-                        game_val=game_val, game_df=games_season, player_val=player_val
+                        game_id=game_id, player_val=player_val
                     )
                     if free_throw == "Y":
                         spot_val = "FREE_THROW1"
@@ -325,90 +325,46 @@ if clicked:
                         st.error('Please select a valid player number')
                         st.stop()
                     if player_number != 0:
-                        stat_df = create_stat_df(
-                            player_number=player_number,
-                            game_val_final=game_val_final,
-                            stat_type=final_stat
-                        )
-
-                        with sqlitecloud.connect(SQL_CONN) as conn:
-                            cursor = conn.cursor()
-                            for _, row in stat_df.iterrows():
-                                cursor.execute(
-                                    sql=sql.insert_game_play(),
-                                    parameters=(
-                                        str(row["GAME_ID"]),
-                                        str(row["NUMBER"]),
-                                        str(row["STAT_TYPE"]),
-                                    ),
-                                )
-                            conn.commit()
-                            st.success(f'Added {final_stat} for player {player_number}')
-                            st.session_state.refresh_game_stat_version = True
+                        stat_types = [final_stat]
                         if (choose_stat == 'Shot') & (make_miss == 'Y'):
                             if spot_val == "FREE_THROW1":
-                                final_stat = 'FTM'
+                                stat_types.append('FTM')
                             elif spot_val[-1] == '2':
-                                final_stat = 'TWO_FGM'
+                                stat_types.append('TWO_FGM')
                             else:
-                                final_stat = 'THREE_FGM'
-                            stat_df_make = create_stat_df(
-                                player_number=player_number,
-                                game_val_final=game_val_final,
-                                stat_type=final_stat
-                            )
-                            with sqlitecloud.connect(SQL_CONN) as conn:
-                                cursor = conn.cursor()
-                                for _, row in stat_df_make.iterrows():
-                                    cursor.execute(
-                                        sql=sql.insert_game_play(),
-                                        parameters=(
-                                            str(row["GAME_ID"]),
-                                            str(row["NUMBER"]),
-                                            str(row["STAT_TYPE"]),
-                                        ),
-                                    )
-                                conn.commit()
-                                st.success(f'Added {final_stat} for player {player_number}')
-                        st.session_state.game_stat_version += 1
-                        load_game_stats.clear()
-                        new_game_summary = upsert_game_summary(
+                                stat_types.append('THREE_FGM')
+                        queue_stat_plays(
                             player_number=player_number,
                             game_id=game_val_final,
-                            SQL_CONN=SQL_CONN
-                        )
-                        stat_val = new_game_summary[final_stat].values[0]
-                        st.success(
-                            f'Player {player_number} now has {stat_val} {final_stat} '
-                            f'for game {game_val}'
+                            stat_types=stat_types
                         )
+                        for stat_type in stat_types:
+                            st.success(
+                                f'Added {stat_type} for player {player_number}'
+                            )
                         st.session_state.game_stat_version += 1
                         st.session_state.refresh_game_stat_version = True
-                    
+
                     if choose_stat == 'Shot':
                         spot_lookup = shot_spots.drop(columns=["XSPOT", "YSPOT"]).set_index("SPOT")
                         my_df = my_df.join(spot_lookup, on="SPOT")
                         all_data_game = pbp_data
-                        max_play_num = all_data_game["PLAY_NUM"].max() if len(all_data_game) > 0 else 0
-                        my_df["PLAY_NUM"] = max_play_num + 1
-
-                        with sqlitecloud.connect(SQL_CONN) as conn:
-                            cursor = conn.cursor()
-                            cursor.execute(
-                                sql=sql.insert_plays_sql(),
-                                parameters=(
-                                    str(game_val_final),
-                                    str(player_number),
-                                    str(spot_val),
-                                    str(shot_defense),
-                                    str(make_miss),
-                                    str(int(my_df["PLAY_NUM"].values[0])),
-                                    str(x_click),
-                                    str(y_click),
-                                    str(paint_touch),
-                                ),
-                            )
-                            conn.commit()
+                        my_df["PLAY_NUM"] = next_play_num(game_val_final, all_data_game)
+
+                        WRITE_QUEUE.enqueue(
+                            sql=sql.insert_plays_sql(),
+                            params=(
+                                str(game_val_final),
+                                str(player_number),
+                                str(spot_val),
+                                str(shot_defense),
+                                str(make_miss),
+                                str(int(my_df["PLAY_NUM"].values[0])),
+                                str(x_click),
+                                str(y_click),
+                                str(paint_touch),
+                            ),
+                        )
                         load_pbp_data_cached.clear()
                         current_game = pd.concat(
                             objs=[
@@ -432,7 +388,7 @@ if clicked:
                             f' from spot {spot_val} '
                             f' with defense {shot_defense} '
                             f' for game {game_val_final} '
-                            f'Added to DB, {my_len} '
+                            f'Queued for sync, {my_len} '
                             f' shots in DB for game {game_val_final}'
                         )
 
@@ -448,14 +404,17 @@ if clicked:
 
 # Ensure pbp_data is fresh if requested
 if st.session_state.refresh_pbp:
-    pbp_data = load_pbp_data_cached(game_select, st.session_state.pbp_version)
+    pbp_data = load_pbp_data_cached(
+        game_id, st.session_state.pbp_version, WRITE_QUEUE.synced()
+    )
     st.success("Play-by-play data refreshed!")
     st.session_state.refresh_pbp = False
 
 if st.session_state.refresh_game_stat_version:
     st.write("Refreshing game stats data...")
-    load_game_stats.clear()
-    game_stat_plays = load_game_stats(SQL_CONN, st.session_state.refresh_game_stat_version)
+    game_stat_plays = load_game_stats(
+        SQL_CONN, st.session_state.game_stat_version, WRITE_QUEUE.synced()
+    )
     st.success("Game stats data refreshed!")
     st.session_state.refresh_game_stat_version = False
 
@@ -544,93 +503,64 @@ with left_col:
             if len(selected_deletes) == 0:
                 st.info("No rows selected for deletion.")
             else:
-                deleted_count = 0
-                with sqlitecloud.connect(SQL_CONN) as conn:
-                    cursor = conn.cursor()
-                    for _, row in selected_deletes.iterrows():
-                        cursor.execute(
-                            sql=sql.delete_shot(),
-                            parameters=(str(int(row["GAME_ID"])), str(int(row["PLAY_NUM"])), str(int(row["NUMBER"]))),
-                        )
-                        deleted_count += 1
-                    conn.commit()
+                WRITE_QUEUE.enqueue_many([
+                    (
+                        sql.delete_shot(),
+                        (str(int(game_val_id)), str(int(play_num)), str(int(number))),
+                    )
+                    for game_val_id, play_num, number in zip(
+                        selected_deletes["GAME_ID"],
+                        selected_deletes["PLAY_NUM"],
+                        selected_deletes["NUMBER"],
+                    )
+                ])
+                deleted_count = len(selected_deletes)
 
-                st.success(f"Deleted {deleted_count} shots")
+                st.success(f"Queued for sync, {deleted_count} shots deleted")
                 st.session_state.pbp_version += 1
                 st.session_state.refresh_pbp = True
                 st.rerun()
 
 with right_col:
-    opponent_name, game_date = game_val.split(" - ")
-    game_row = games_season[
-        (games_season["OPPONENT"] == opponent_name) & (games_season["DATE"] == game_date)
-    ]
     current_totals = data_source.run_query(
-        sql=sql.select_quick_game_info(game_row['GAME_ID'].values[0]),
+        sql=sql.select_quick_game_info(game_id),
         connection=SQL_CONN
     )
     current_totals = current_totals.drop(columns=['GAME_ID'])
-    current_totals['Turnover %'] = (
-        current_totals['TEAM_TURNOVERS'] / np.where(
-            current_totals['POSSESSIONS'] == 0,
-            1,
-            current_totals['POSSESSIONS']
-        )
-    )
-    current_totals['Assist %'] = (
-        current_totals['TEAM_ASSISTS'] / np.where(
-            current_totals['TEAM_FGM'] == 0,
-            1,
-            current_totals['TEAM_FGM']
-        )
-    )
-    current_totals['Free Throw Rate'] = (
-        current_totals['TEAM_FTA'] / np.where(
-            current_totals['TEAM_FGA'] == 0,
-            1,
-            current_totals['TEAM_FGA']
-        )
-    )
-    current_totals['True Shooting %'] = (
-        current_totals['POINTS'] / np.where(
-            (current_totals['TEAM_FGA'] + 0.44 * current_totals['TEAM_FTA']) == 0,
-            1,
-           2 * (current_totals['TEAM_FGA'] + 0.44 * current_totals['TEAM_FTA'])
-        )
-    )
+    # TEAM_GAME_TOTALS prefixes its counting stats; strip that so the
+    # shared metrics apply, keeping the view's own POSSESSIONS
+    current_totals = metrics.apply_derived(
+        data=pl.from_pandas(
+            current_totals.rename(columns=TEAM_TOTALS_BASE_COLUMNS)
+        ),
+        columns=[
+            'TURNOVER_RATE', 'ASSIST_RATE', 'FREE_THROW_RATE',
+            'TRUE_SHOOTING_PERCENTAGE', 'POINTS_PER_POSSESSION', 'PPA',
+        ]
+    ).to_pandas()
     current_totals = (
         current_totals.rename(
             columns={
-            'TEAM_OFFENSIVE_REBOUNDS': 'OREB',
-             'TEAM_DEFENSIVE_REBOUNDS': 'DREB',
-             'TEAM_TWO_FGM': '2FGM',
-             'TEAM_TWO_FGA': '2FGA',
-             'TEAM_THREE_FGM': '3FGM',
-             'TEAM_THREE_FGA': '3FGA',
-             'TEAM_FTM': 'FTM',
-             'TEAM_FTA': 'FTA',
+            'OFFENSIVE_REBOUNDS': 'OREB',
+             'DEFENSIVE_REBOUNDS': 'DREB',
+             'TWO_FGM': '2FGM',
+             'TWO_FGA': '2FGA',
+             'THREE_FGM': '3FGM',
+             'THREE_FGA': '3FGA',
              'EFG_PERCENT': 'eFG%',
-             'TEAM_FGA': 'FGA',
-             'TEAM_TURNOVERS': 'Turnovers',
-             'TEAM_FGM': 'FGM',
-             'TEAM_ASSISTS': 'Assists',
-             'TEAM_STEALS': 'Steals',
-             'TEAM_BLOCKS': 'Blocks',
+             'TURNOVER': 'Turnovers',
+             'ASSISTS': 'Assists',
+             'STEALS': 'Steals',
+             'BLOCKS': 'Blocks',
              'POSSESSIONS': 'Possessions',
-             'POINTS': 'Points'},
+             'POINTS': 'Points',
+             'TURNOVER_RATE': 'Turnover %',
+             'ASSIST_RATE': 'Assist %',
+             'FREE_THROW_RATE': 'Free Throw Rate',
+             'TRUE_SHOOTING_PERCENTAGE': 'True Shooting %',
+             'POINTS_PER_POSSESSION': 'PPP'},
         )
     )
-    current_totals['PPP'] = current_totals['Points'] / np.where(
-        current_totals['Possessions'] == 0,
-        1,
-        current_totals['Possessions']
-    )
-    current_totals['PPA'] = current_totals['FG_POINTS'] / np.where(
-        current_totals['FGA'] == 0,
-        1,
-        current_totals['FGA']
-    )
-    current_totals = current_totals.drop(columns=['FG_POINTS'])
     current_totals = current_totals[[
         '2FGM', '2FGA', '3FGM', '3FGA', 'FTM', 'FTA',
         'OREB', 'DREB', 'Assists', 'Steals', 'Blocks',
@@ -784,44 +714,40 @@ with right_col:
             if len(selected_deletes) == 0:
                 st.info("No rows selected for deletion.")
             else:
-                deleted_count = 0
-                with sqlitecloud.connect(SQL_CONN) as conn:
-                    cursor = conn.cursor()
-                    for _, row in selected_deletes.iterrows():
-                        st.write(row['GAME_ID'], row['PLAYER_ID'], row['STAT'], row['id'])
-                        cursor.execute(
-                            sql=sql.delete_game_play(),
-                            parameters=(
-                                str(int(row["GAME_ID"])),
-                                str((row["PLAYER_ID"])),
-                                str((row["STAT"])),
-                                str(int(row["id"])))
-                        )
-                        deleted_count += 1
-                        game_val_delete_id = int(row["GAME_ID"])
-                        player_number = int(row["PLAYER_ID"])
-                    conn.commit()
-
-                st.success(f"Deleted {deleted_count} shots")
-                load_game_stats.clear()
-                new_game_summary = upsert_game_summary(
-                    player_number=player_number,
-                    game_id=game_val_delete_id,
-                    SQL_CONN=SQL_CONN
+                statements = [
+                    (
+                        sql.delete_game_play(),
+                        (str(int(game_val_id)), str(player), str(stat), str(int(stat_id))),
+                    )
+                    for game_val_id, player, stat, stat_id in zip(
+                        selected_deletes["GAME_ID"],
+                        selected_deletes["PLAYER_ID"],
+                        selected_deletes["STAT"],
+                        selected_deletes["id"],
+                    )
+                ]
+                touched = (
+                    selected_deletes[["GAME_ID", "PLAYER_ID"]]
+                    .astype(int)
+                    .drop_duplicates()
                 )
+                for game_val_id, player in zip(touched["GAME_ID"], touched["PLAYER_ID"]):
+                    statements += summary_statements(
+                        player_number=player, game_id=game_val_id
+                    )
+                WRITE_QUEUE.enqueue_many(statements)
+
+                st.success(f"Queued for sync, {len(selected_deletes)} stats deleted")
                 st.session_state.game_stat_version += 1
                 st.session_state.refresh_game_stat_version = True
                 st.rerun()
 
 
-load_game_summary.clear()
-game_summary_data = load_game_summary(SQL_CONN, st.session_state.game_version)
-game_row = games_season[
-    (games_season["OPPONENT"] == opponent_name)
-    & (games_season["DATE"] == game_date)
-]
+game_summary_data = load_game_summary(
+    SQL_CONN, game_id, st.session_state.game_version, WRITE_QUEUE.synced()
+)
 this_game_summary = game_summary_data[
-    game_summary_data['GAME_ID'] == game_row['GAME_ID'].values[0]
+    game_summary_data['GAME_ID'] == game_id
 ]
 this_game_summary = this_game_summary[[
     'PLAYER_ID', 'TWO_FGM', 'TWO_FGA', 'THREE_FGM', 'THREE_FGA',
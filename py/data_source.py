@@ -1,18 +1,681 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
 import sqlitecloud
 import pandas as pd
+import polars as pl
+
+
+POOL_SIZE = 4
+POOL_IDLE_TIMEOUT = 300.0
+POOL_WAIT_TIMEOUT = 30.0
+POOL_HEALTH_CHECK_INTERVAL = 30.0
+ARROW_BATCH_SIZE = 65536
+
+# Column casts for run_query(dtypes=...). Keys stored as REAL come back
+# as integers; PLAYER_ID (0 is the team) comes back as text whether it is
+# stored as INTEGER, REAL or TEXT; repeated text labels become
+# dictionary-encoded categoricals.
+ID_DTYPES = {
+    'GAME_ID': 'int',
+    'PLAY_NUM': 'int',
+    'PLAYER_ID': 'str',
+}
+LABEL_DTYPES = {
+    'LABEL': 'category',
+    'GAME_LABEL': 'category',
+    'PLAYER_LABEL': 'category',
+    'U_ID': 'category',
+    'NAME': 'category',
+}
+DTYPES = {**ID_DTYPES, **LABEL_DTYPES}
+OUTPUTS = ('pandas', 'arrow', 'polars')
+
+_pools = {}
+_pools_lock = threading.Lock()
+_pool_settings = {}
+
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection frees up within the wait timeout."""
+
+
+def _connect_sqlitecloud(target: str):
+    return sqlitecloud.connect(target)
+
+
+def _connect_sqlite(target: str):
+    # Pooled connections are handed between Streamlit script threads.
+    return sqlite3.connect(target, check_same_thread=False)
+
+
+def _connect_duckdb(target: str):
+    try:
+        import duckdb
+    except ImportError as exc:
+        raise ImportError(
+            'duckdb:/// connections need the duckdb package installed'
+        ) from exc
+    return duckdb.connect(target)
+
+
+BACKENDS = {
+    'sqlitecloud': _connect_sqlitecloud,
+    'sqlite': _connect_sqlite,
+    'duckdb': _connect_duckdb,
+}
+
+
+def resolve_backend(connection: str) -> tuple:
+    """
+    Work out which engine a connection string points at.
+
+    sqlite:///path/to/file.db and duckdb:///path/to/file.duckdb open a
+    local file (four slashes for an absolute path); anything else is
+    handed to SQLite Cloud unchanged.
+
+    Args:
+        connection (str): The database connection string.
+
+    Returns:
+        tuple: (backend name, target passed to that backend's connect).
+    """
+    for name in ('sqlite', 'duckdb'):
+        prefix = f'{name}:///'
+        if connection.startswith(prefix):
+            return name, connection[len(prefix):]
+    return 'sqlitecloud', connection
+
+
+def connect(connection: str):
+    """
+    Open a new, unpooled connection on whichever backend the string names.
+
+    Args:
+        connection (str): The database connection string.
+
+    Returns:
+        A DB-API connection.
+    """
+    backend, target = resolve_backend(connection)
+    return BACKENDS[backend](target)
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of open database connections for one connection string.
+
+    Connections are handed out most-recently-used first so idle ones age
+    out, pinged before reuse once they have sat longer than the health
+    check interval, and replaced transparently when the ping fails.
 
+    Args:
+        connection (str): The database connection string.
+        size (int): Maximum number of open connections.
+        idle_timeout (float): Seconds an idle connection is kept before
+            it is closed.
+        wait_timeout (float): Seconds to wait for a free connection
+            before raising PoolTimeout.
+        health_check_interval (float): Seconds of idleness after which
+            a connection is pinged before being reused.
+    """
+
+    def __init__(
+            self,
+            connection: str,
+            size: int = POOL_SIZE,
+            idle_timeout: float = POOL_IDLE_TIMEOUT,
+            wait_timeout: float = POOL_WAIT_TIMEOUT,
+            health_check_interval: float = POOL_HEALTH_CHECK_INTERVAL,
+        ):
+        self.connection_string = connection
+        self.backend = resolve_backend(connection)[0]
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.wait_timeout = wait_timeout
+        self.health_check_interval = health_check_interval
+        self._idle = []
+        self._open = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'reconnects': 0,
+            'evictions': 0,
+        }
+
+    def _connect(self):
+        return connect(self.connection_string)
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _is_healthy(conn) -> bool:
+        try:
+            cursor = conn.cursor()
+            cursor.execute('SELECT 1')
+            cursor.fetchall()
+            return True
+        except Exception:
+            return False
+
+    def _evict_idle(self, now: float):
+        keep = []
+        for conn, released_at in self._idle:
+            if now - released_at > self.idle_timeout:
+                self._close(conn)
+                self._open -= 1
+                self._stats['evictions'] += 1
+            else:
+                keep.append((conn, released_at))
+        self._idle = keep
+
+    def acquire(self):
+        """
+        Check a connection out of the pool, opening one if needed.
+
+        Returns:
+            A DB-API connection owned by the caller until release().
+        """
+        deadline = time.monotonic() + self.wait_timeout
+        waited = None
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._evict_idle(now)
+                if self._idle:
+                    conn, released_at = self._idle.pop()
+                    self._stats['hits'] += 1
+                    reuse = True
+                    break
+                if self._open < self.size:
+                    self._open += 1
+                    self._stats['misses'] += 1
+                    reuse = False
+                    break
+                if waited is None:
+                    waited = now
+                    self._stats['waits'] += 1
+                remaining = deadline - now
+                if remaining <= 0:
+                    self._stats['wait_time'] += now - waited
+                    raise PoolTimeout(
+                        f'No connection available after {self.wait_timeout}s'
+                    )
+                self._cond.wait(timeout=remaining)
+            if waited is not None:
+                self._stats['wait_time'] += time.monotonic() - waited
+
+        if reuse:
+            stale = now - released_at > self.health_check_interval
+            if not stale or self._is_healthy(conn):
+                return conn
+            self._close(conn)
+            with self._cond:
+                self._stats['reconnects'] += 1
+        try:
+            return self._connect()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn, discard: bool = False):
+        """
+        Return a connection to the pool.
+
+        Args:
+            conn: A connection previously returned by acquire().
+            discard (bool): Close the connection instead of reusing it.
+        """
+        with self._cond:
+            if discard:
+                self._close(conn)
+                self._open -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection for the duration of a with block.
+
+        If the block raises and the connection no longer answers a ping it
+        is closed instead of going back to the pool.
+        """
+        conn = self.acquire()
+        try:
+            yield conn
+        except Exception:
+            healthy = self._is_healthy(conn)
+            self.release(conn, discard=not healthy)
+            raise
+        else:
+            self.release(conn)
+
+    def run(self, work):
+        """
+        Call work(conn) on a pooled connection, reconnecting once if the
+        connection dropped underneath it.
+
+        Args:
+            work (callable): Function taking a connection.
+
+        Returns:
+            Whatever work returns.
+        """
+        for attempt in range(2):
+            conn = self.acquire()
+            try:
+                result = work(conn)
+            except Exception:
+                if self._is_healthy(conn):
+                    self.release(conn)
+                    raise
+                self.release(conn, discard=True)
+                with self._cond:
+                    self._stats['reconnects'] += 1
+                if attempt == 1:
+                    raise
+                continue
+            self.release(conn)
+            return result
+
+    def stats(self) -> dict:
+        """
+        Snapshot of the pool counters.
 
-def run_query(sql: str, connection: str, params=[]) -> pd.DataFrame:
+        Returns:
+            dict: hits, misses, waits, wait_time (seconds), reconnects,
+            evictions, plus the current open and idle connection counts
+            and the backend name.
+        """
+        with self._cond:
+            snapshot = dict(self._stats)
+            snapshot['open'] = self._open
+            snapshot['idle'] = len(self._idle)
+            snapshot['backend'] = self.backend
+        return snapshot
+
+    def close(self):
+        """Close every idle connection held by the pool."""
+        with self._cond:
+            for conn, _ in self._idle:
+                self._close(conn)
+                self._open -= 1
+            self._idle = []
+
+
+def configure_pool(**settings):
+    """
+    Set the keyword arguments used for pools created from now on.
+
+    Args:
+        **settings: Any of size, idle_timeout, wait_timeout and
+            health_check_interval.
+    """
+    with _pools_lock:
+        _pool_settings.update(settings)
+
+
+def get_pool(connection: str) -> ConnectionPool:
+    """
+    Return the process-wide pool for a connection string, creating it
+    on first use.
+
+    Args:
+        connection (str): The database connection string.
+
+    Returns:
+        ConnectionPool: The shared pool.
+    """
+    with _pools_lock:
+        pool = _pools.get(connection)
+        if pool is None:
+            pool = ConnectionPool(connection, **_pool_settings)
+            _pools[connection] = pool
+        return pool
+
+
+def pool_stats(connection: str) -> dict:
+    """
+    Counters for the pool serving a connection string.
+
+    Args:
+        connection (str): The database connection string.
+
+    Returns:
+        dict: See ConnectionPool.stats.
+    """
+    return get_pool(connection).stats()
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.compute
+    except ImportError as exc:
+        raise ImportError(
+            'Arrow query results need the pyarrow package installed'
+        ) from exc
+    return pyarrow
+
+
+def _arrow_column(pa, values: list):
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # SQLite columns can mix storage classes; read_sql would give
+        # object dtype, Arrow needs one type, so fall back to text
+        return pa.array(
+            [None if value is None else str(value) for value in values],
+            type=pa.string()
+        )
+
+
+def _type_nulls(pa, table):
+    # No rows, or NULL in every row, leaves a column null-typed; give it
+    # text so string expressions and casts downstream still apply
+    for index, field in enumerate(table.schema):
+        if pa.types.is_null(field.type):
+            table = table.set_column(
+                index, field.name, table.column(index).cast(pa.string())
+            )
+    return table
+
+
+def _fetch_arrow(conn, backend: str, sql: str, params, batch_size: int):
+    pa = _pyarrow()
+    if backend == 'duckdb':
+        # DuckDB hands back Arrow natively; .arrow() is a RecordBatchReader
+        # from duckdb 1.4 on, so ask for the whole table
+        return _type_nulls(pa, conn.execute(sql, params).to_arrow_table())
+    cursor = conn.cursor()
+    cursor.execute(sql, params)
+    names = [column[0] for column in cursor.description]
+    tables = []
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        columns = zip(*rows)
+        tables.append(pa.table(
+            [_arrow_column(pa, list(values)) for values in columns],
+            names=names
+        ))
+    if not tables:
+        return pa.table(
+            [pa.array([], type=pa.string()) for _ in names], names=names
+        )
+    # A column that is all NULL in one batch is null-typed there
+    return _type_nulls(
+        pa, pa.concat_tables(tables, promote_options='permissive')
+    )
+
+
+def _cast_arrow(table, dtypes: dict):
+    pa = _pyarrow()
+    for name, kind in dtypes.items():
+        index = table.schema.get_field_index(name)
+        if index < 0:
+            continue
+        column = table.column(index)
+        if kind == 'int':
+            column = pa.compute.cast(column, pa.int64())
+        elif kind == 'str':
+            column = pa.compute.cast(column, pa.string())
+        elif kind == 'category':
+            column = pa.compute.dictionary_encode(
+                pa.compute.cast(column, pa.string())
+            )
+        else:
+            raise ValueError(f'Unknown dtype {kind!r} for {name}')
+        table = table.set_column(index, name, column)
+    return table
+
+
+def query_arrow(
+        sql: str,
+        connection: str,
+        params=[],
+        dtypes: dict = None,
+        batch_size: int = ARROW_BATCH_SIZE,
+    ):
+    """
+    Runs a SQL query and returns the rows as an Arrow table.
+
+    Rows are pulled from the cursor batch_size at a time and turned into
+    Arrow columns directly, without a pandas frame in between, so Polars
+    (pl.from_arrow) and pandas (Table.to_pandas) can both take the result
+    with at most one copy.
+
+    Args:
+        sql (str): The SQL query to execute.
+        connection (str): The SQLite database connection string.
+        params (list): Values bound to the query placeholders.
+        dtypes (dict): Column name to 'int', 'str' or 'category', e.g.
+            DTYPES.
+            Columns missing from the result are ignored.
+        batch_size (int): Rows fetched per round trip.
+
+    Returns:
+        pyarrow.Table: The query result.
+    """
+    pool = get_pool(connection)
+    table = pool.run(
+        lambda conn: _fetch_arrow(conn, pool.backend, sql, params, batch_size)
+    )
+    return _cast_arrow(table, dtypes or {})
+
+
+def run_query(
+        sql: str,
+        connection: str,
+        params=[],
+        output: str = 'pandas',
+        dtypes: dict = None,
+    ):
     """
     Runs a SQL query on the given SQLite database connection.
 
     Args:
         sql (str): The SQL query to execute.
         connection (str): The SQLite database connection string.
+        params (list): Values bound to the query placeholders.
+        output (str): 'pandas', 'arrow' (a pyarrow.Table) or 'polars'.
+            Use 'polars' rather than pl.from_pandas on a pandas result;
+            it reads straight from Arrow.
+        dtypes (dict): Column casts applied on the way out; see
+            query_arrow. Categoricals sort lexically, like the text they
+            replace.
 
     Returns:
-        pd.DataFrame: The result of the SQL query as a 
-        pandas DataFrame.
+        pd.DataFrame | pyarrow.Table | pl.DataFrame: The result of the
+        SQL query.
     """
-    with sqlitecloud.connect(connection) as conn:
-        return pd.read_sql(sql, conn, params=params)
\ No newline at end of file
+    if output not in OUTPUTS:
+        raise ValueError(f'output must be one of {OUTPUTS}, not {output!r}')
+    if output == 'pandas' and not dtypes:
+        pool = get_pool(connection)
+        if pool.backend == 'duckdb':
+            # pandas only knows sqlite3 among raw DB-API connections
+            return pool.run(lambda conn: conn.execute(sql, params).df())
+        return pool.run(lambda conn: pd.read_sql(sql, conn, params=params))
+    table = query_arrow(
+        sql=sql, connection=connection, params=params, dtypes=dtypes
+    )
+    categories = [
+        name for name, kind in (dtypes or {}).items()
+        if kind == 'category' and name in table.column_names
+    ]
+    if output == 'arrow':
+        return table
+    if output == 'polars':
+        df = pl.from_arrow(table)
+        if categories:
+            df = df.with_columns([
+                pl.col(name).cat.set_ordering('lexical') for name in categories
+            ])
+        return df
+    df = table.to_pandas()
+    for name in categories:
+        df[name] = df[name].cat.reorder_categories(
+            sorted(df[name].cat.categories)
+        )
+    return df
+
+
+@contextmanager
+def transaction(connection: str):
+    """
+    Cursor on a pooled connection inside an explicit transaction that
+    commits when the block exits cleanly and rolls back otherwise.
+
+    BEGIN is sent on every backend: SQLite Cloud runs in autocommit and
+    would otherwise commit each statement on its own, and it also makes
+    DDL transactional on local SQLite.
+
+    Args:
+        connection (str): The SQLite database connection string.
+
+    Yields:
+        A DB-API cursor.
+    """
+    pool = get_pool(connection)
+    with pool.connection() as conn:
+        # A DuckDB cursor is a separate connection with its own
+        # transaction; run on the connection so BEGIN and COMMIT match
+        cursor = conn if pool.backend == 'duckdb' else conn.cursor()
+        cursor.execute('BEGIN')
+        try:
+            yield cursor
+        except Exception:
+            try:
+                cursor.execute('ROLLBACK')
+            except Exception:
+                pass
+            raise
+        conn.commit()
+
+
+def is_missing_table(exc: Exception) -> bool:
+    """
+    Whether a query failed because a table or view doesn't exist, as
+    reported by SQLite, SQLite Cloud or DuckDB.
+    """
+    message = str(exc).lower()
+    return 'no such table' in message or (
+        'catalog error' in message and 'does not exist' in message
+    )
+
+
+def execute(sql: str, connection: str, params=()):
+    """
+    Runs a single write statement and commits it.
+
+    Args:
+        sql (str): The SQL statement to execute.
+        connection (str): The SQLite database connection string.
+        params (tuple): Values bound to the statement placeholders.
+    """
+    with transaction(connection) as cursor:
+        cursor.execute(sql, params)
+
+
+def execute_many(sql: str, connection: str, params_list):
+    """
+    Runs one write statement per parameter tuple in a single transaction.
+
+    Args:
+        sql (str): The SQL statement to execute.
+        connection (str): The SQLite database connection string.
+        params_list (iterable): Parameter tuples, one per execution.
+    """
+    with transaction(connection) as cursor:
+        for params in params_list:
+            cursor.execute(sql, params)
+
+
+REPLICA_TABLES = (
+    'GAMES',
+    'PLAYERS',
+    'SPOTS',
+    'PLAYS',
+    'GAME_SUMMARY',
+    'GAME_STATS_PLAYS',
+    'MINUTES',
+    'MINUTES_PLAYED',
+    'TEAM_GAME_TOTALS',
+    'PLAY_EXPECTED_POINTS',
+)
+
+
+def _write_table(conn, backend: str, name: str, df: pd.DataFrame):
+    if backend == 'sqlite':
+        df.to_sql(name, conn, if_exists='replace', index=False)
+    elif backend == 'duckdb':
+        conn.register('replica_frame', df)
+        try:
+            conn.execute(
+                f'CREATE OR REPLACE TABLE {name} AS SELECT * FROM replica_frame'
+            )
+        finally:
+            conn.unregister('replica_frame')
+    else:
+        raise ValueError(f'Cannot replicate into a {backend} backend')
+
+
+def replicate(source: str, target: str, tables=REPLICA_TABLES) -> dict:
+    """
+    Snapshot tables (and views, as plain tables) from one backend into a
+    local SQLite or DuckDB file so read-heavy pages can run against it.
+
+    Names missing from the source are skipped.
+
+    Args:
+        source (str): Connection string to copy from.
+        target (str): sqlite:/// or duckdb:/// connection string to
+            copy into.
+        tables (iterable): Table or view names to copy.
+
+    Returns:
+        dict: Rows copied per name that existed in the source.
+    """
+    backend = resolve_backend(target)[0]
+    if backend == 'sqlitecloud':
+        raise ValueError('Replica target must be a sqlite:/// or duckdb:/// file')
+    copied = {}
+    with get_pool(target).connection() as conn:
+        for name in tables:
+            try:
+                df = run_query(sql=f'SELECT * FROM {name}', connection=source)
+            except Exception:
+                continue
+            _write_table(conn, backend, name, df)
+            copied[name] = len(df)
+        conn.commit()
+    return copied
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Copy the app tables into a local SQLite/DuckDB replica.'
+    )
+    parser.add_argument('source', help='Connection string to copy from')
+    parser.add_argument('target', help='sqlite:/// or duckdb:/// target')
+    args = parser.parse_args()
+    for name, rows in replicate(args.source, args.target).items():
+        print(f'{name}: {rows} rows')
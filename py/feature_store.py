@@ -0,0 +1,514 @@
+import hashlib
+import inspect
+import json
+import os
+import threading
+
+import polars as pl
+
+
+STORE_DIR = 'data/feature_store'
+FEATURES_FILE = 'features.parquet'
+MANIFEST_FILE = 'manifest.json'
+
+# Bump to force a rebuild when something outside build_features (the
+# play-by-play query, say) changes what the stored features mean.
+SCHEMA_VERSION = 2
+
+# Forward-filled across game boundaries, so an incremental rebuild has to
+# seed them with the last stored value before the rebuilt range.
+CARRIED_COLUMNS = (
+    'LAST_ROLLING_POINTS_TEAM_NDA',
+    'LAST_ROLLING_POINTS_TEAM_OPPONENT',
+)
+
+# The page and the ingest-time scorer both update the store
+_store_lock = threading.Lock()
+
+
+class PartialHistory(Exception):
+    """
+    Raised by load_features(since=...) when updating the store needs
+    plays from before since.
+
+    Attributes:
+        first_game (int | None): GAME_ID to load plays from instead, or
+            None when the whole history is needed.
+    """
+
+    def __init__(self, first_game=None):
+        super().__init__(
+            'plays from the whole history are needed' if first_game is None
+            else f'plays from GAME_ID {first_game} on are needed'
+        )
+        self.first_game = first_game
+
+
+def build_features(player_data, carry=None):
+    '''
+    Build features for basketball play events.
+
+    Parameters:
+    play_event (pd.DataFrame): DataFrame containing play event data.
+    spot (pd.DataFrame): DataFrame containing spot data.
+    players (pd.DataFrame): DataFrame containing player data.
+    games (pd.DataFrame): DataFrame containing game data.
+    carry (dict): Values of the LAST_ROLLING_POINTS_TEAM_* columns at the
+        play just before player_data starts, used instead of 0 for its
+        leading rows. Only needed when building a later slice of the plays.
+
+    Returns:
+    pd.DataFrame: DataFrame with additional features built from the input data.
+    
+    Features created:
+    - INTIAL_PERCENTAGE: Initial percentage based on player ID.
+    - MAKE: Binary indicator if the shot was made.
+    - ATTEMPT: Binary indicator of a shot attempt.
+    - INIT_EXPECTED: Initial expected points.
+    - SPOT_TOTAL_MAKES: Total makes by spot.
+    - SPOT_TOTAL_ATTEMPTS: Total attempts by spot.
+    - SPOT_TOTAL_PERCENTAGE: Shooting percentage by spot.
+    - GAME_MAKES: Total makes in the game.
+    - GAME_ATTEMPTS: Total attempts in the game.
+    - GAME_PERCENTAGE: Shooting percentage in the game.
+    - GAME_TOTAL_MAKES: Total makes in the game by year.
+    - GAME_TOTAL_ATTEMPTS: Total attempts in the game by year.
+    - SHOT_DEFENSE_CODED: Coded shot defense.
+    - GAME_ROLLING_MAKES: Rolling sum of makes in the game.
+    - GAME_ROLLING_ATTEMPTS: Rolling sum of attempts in the game.
+    - ROLLING_PERCENT: Rolling shooting percentage.
+    - SEASON_LAST_5: Rolling sum of makes in the last 5 games.
+    - SEASON_LAST_5_ATTEMPTS: Rolling sum of attempts in the last 5 games.
+    - SEASON_LAST_5_PERCENT: Rolling shooting percentage in the last 5 games.
+    - HOME_FLAG: Binary indicator if the game is at home.
+    - ACTUAL_POINTS: Actual points scored.
+    - TEAM: Team identifier.
+    - ROLLING_POINTS_TEAM: Rolling sum of points by team.
+    - GAME_TEAM_MAKES: Total makes by team in the game.
+    - GAME_TEAM_ATTEMPTS: Total attempts by team in the game.
+    - GAME_TEAM_PERCENTAGE: Shooting percentage by team in the game.
+    - LAST_ROLLING_POINTS_TEAM_NDA: Last rolling points for NDA team.
+    - LAST_ROLLING_POINTS_TEAM_OPPONENT: Last rolling points for opponent team.
+    - TEAM_SPREAD: Difference in rolling points between teams.
+    '''
+    CODED_SHOT_DEFENSE = {
+        'OPEN': 0,
+        'GUARDED': 1,
+        'HEAVILY_GUARDED': 2,
+        'Heavily Guarded': 2,
+        'Guarded': 1
+    }
+    _player_merge_list = ['PLAYER_ID', 'SPOT', 'SHOT_DEFENSE', 'YEAR']
+    _player_game_merge_list = ['GAME_ID', 'PLAYER_ID', 'YEAR', 'SPOT', 'SHOT_DEFENSE']
+    _player_year_list = ['GAME_ID', 'PLAYER_ID', 'YEAR']
+    _player_game_list = ['GAME_ID', 'PLAYER_ID', 'YEAR', 'SHOT_DEFENSE']
+    _team_game_list = ['GAME_ID', 'TEAM', 'YEAR', 'SPOT', 'SHOT_DEFENSE']
+    play_event_spot = (
+        player_data.sort(by=['GAME_ID', 'PLAY_NUM'])
+                   .with_columns(
+                       INTIAL_PERCENTAGE=pl.when(
+                            condition=pl.col(name='PLAYER_ID') == '0'
+                          ).then(
+                            statement=pl.col(name='OPP_EXPECTED') / pl.col(name='POINTS')
+                          ).otherwise(statement=0.33),
+                       MAKE=pl.when(condition=pl.col(name='MAKE_MISS') == 'Y')
+                              .then(statement=1)
+                              .otherwise(statement=0),
+                       ATTEMPT=1
+                   )
+    )
+    #play_event_spot = player_event_spot.to_pandas()
+    play_event_spot = play_event_spot.with_columns(
+        INIT_EXPECTED=(
+            pl.col(name='INTIAL_PERCENTAGE') * pl.col(name='POINTS')
+        ),
+        SPOT_TOTAL_MAKES=(
+            pl.col(name='MAKE')
+              .sum()
+              .over(_player_merge_list)
+        ),
+        SPOT_TOTAL_ATTEMPTS=(
+            pl.col(name='ATTEMPT')
+              .sum()
+              .over(_player_merge_list)
+        ),
+    )
+    play_event_spot = (
+        play_event_spot.with_columns(
+            SPOT_TOTAL_PERCENTAGE=(
+                pl.col(name='SPOT_TOTAL_MAKES')
+                / pl.col(name='SPOT_TOTAL_ATTEMPTS')
+            ),
+            GAME_MAKES=(
+                pl.col(name='MAKE')
+                  .sum()
+                  .over(_player_game_merge_list)
+            ),
+            GAME_ATTEMPTS=(
+                pl.col('ATTEMPT')
+                  .sum()
+                  .over(_player_game_merge_list)
+            ),
+            GAME_TOTAL_MAKES=(
+                pl.col('MAKE')
+                  .sum()
+                  .over(_player_year_list)
+            ),
+            GAME_TOTAL_ATTEMPTS=(
+                pl.col('ATTEMPT')
+                  .sum()
+                  .over(_player_year_list)
+            )
+        )
+    )
+    #play_event_spot = play_event_spot.to_pandas()
+    play_event_spot = play_event_spot.with_columns(
+        GAME_PERCENTAGE=(
+            pl.col(name='GAME_MAKES') / pl.col(name='GAME_ATTEMPTS')
+        ),
+        SHOT_DEFENSE_CODED=(
+            pl.col(name='SHOT_DEFENSE').map_dict(CODED_SHOT_DEFENSE)
+        )
+    )
+    play_event_spot = play_event_spot.with_columns(
+        GAME_ROLLING_MAKES=(
+            pl.col('MAKE')
+              .rolling_sum(window_size=1000, min_periods=0)
+              .over(_player_game_list)
+        ),
+        GAME_ROLLING_ATTEMPTS=(
+            pl.col('ATTEMPT')
+              .rolling_sum(window_size=1000, min_periods=0)
+                .over(_player_game_list)
+        ),
+        SEASON_LAST_5=(
+            pl.col('MAKE')
+              .rolling_sum(window_size=5, min_periods=0)
+              .over(['PLAYER_ID', 'YEAR'])
+        ),
+        SEASON_LAST_5_ATTEMPTS=(
+            pl.col('ATTEMPT')
+              .rolling_sum(window_size=5, min_periods=0)
+              .over(['PLAYER_ID', 'YEAR'])
+        ),
+        HOME_FLAG=(
+            pl.when(condition=pl.col(name='LOCATION') == 'Home')
+              .then(statement=1)
+              .otherwise(statement=0)
+        ),
+        ACTUAL_POINTS=(
+            pl.col(name='MAKE') * pl.col(name='POINTS')
+        ),
+        TEAM=(
+            pl.when(condition=pl.col(name='PLAYER_ID') == '0')
+              .then(statement='OPPONENT')
+              .otherwise(statement='NDA')
+        )
+
+    )
+    play_event_spot = play_event_spot.with_columns(
+        ROLLING_PERCENT=(
+            pl.col(name='GAME_ROLLING_MAKES')
+            / pl.col(name='GAME_ROLLING_ATTEMPTS')
+        ),
+        SEASON_LAST_5_PERCENT=(
+            pl.col(name='SEASON_LAST_5')
+            / pl.col(name='SEASON_LAST_5_ATTEMPTS')
+        ),
+        ROLLING_POINTS_TEAM=(
+            pl.col('ACTUAL_POINTS')
+            .rolling_sum(window_size=1000, min_periods=0)
+            .over(['GAME_ID', 'YEAR', 'TEAM'])
+        ),
+        GAME_TEAM_MAKES=(
+            pl.col('MAKE')
+            .sum()
+            .over(_team_game_list)
+        ),
+        GAME_TEAM_ATTEMPTS=(
+            pl.col('ATTEMPT')
+            .sum()
+            .over(_team_game_list)
+        ),
+    )
+    play_event_spot = play_event_spot.with_columns(
+        GAME_TEAM_PERCENTAGE=(
+            pl.col(name='GAME_TEAM_MAKES')
+            / pl.col(name='GAME_TEAM_ATTEMPTS')
+        ),
+        LAST_ROLLING_POINTS_TEAM_NDA=(
+            pl.when(pl.col('TEAM') == 'NDA')
+            .then(pl.col('ROLLING_POINTS_TEAM').shift(1).over('GAME_ID'))
+            .otherwise(None)
+        )
+    )
+    carry = carry or {}
+    play_event_spot = play_event_spot.with_columns(
+        LAST_ROLLING_POINTS_TEAM_NDA=(
+            pl.col('LAST_ROLLING_POINTS_TEAM_NDA')
+            .fill_null(strategy='forward')
+            .fill_null(value=carry.get('LAST_ROLLING_POINTS_TEAM_NDA', 0))
+        ),
+        LAST_ROLLING_POINTS_TEAM_OPPONENT=(
+            pl.when(pl.col('TEAM') == 'OPPONENT')
+            .then(pl.col('ROLLING_POINTS_TEAM').shift(1).over('GAME_ID'))
+            .otherwise(None)
+        )
+    )
+    play_event_spot = play_event_spot.with_columns(
+        LAST_ROLLING_POINTS_TEAM_OPPONENT=(
+            pl.col('LAST_ROLLING_POINTS_TEAM_OPPONENT')
+            .fill_null(strategy='forward')
+            .fill_null(
+                value=carry.get('LAST_ROLLING_POINTS_TEAM_OPPONENT', 0)
+            )
+        )
+    )
+    play_event_spot = play_event_spot.with_columns(
+        TEAM_SPREAD=(
+            pl.col('ROLLING_POINTS_TEAM') 
+            - pl.col('LAST_ROLLING_POINTS_TEAM_OPPONENT')
+        )
+    )
+    #play_event_spot = play_event_spot.to_pandas()
+    # Compute LAST_ROLLING_POINTS_TEAM_NDA in polars before converting to pandas
+    return play_event_spot
+
+
+def feature_version() -> str:
+    """
+    Hash identifying how stored features were computed.
+
+    Covers the source of build_features, the polars version (row hashes
+    and window semantics can shift between releases) and SCHEMA_VERSION,
+    so editing a feature definition invalidates the store.
+
+    Returns:
+        str: Hex digest.
+    """
+    digest = hashlib.sha256()
+    digest.update(inspect.getsource(build_features).encode())
+    digest.update(pl.__version__.encode())
+    digest.update(str(SCHEMA_VERSION).encode())
+    return digest.hexdigest()
+
+
+def game_fingerprints(player_data: pl.DataFrame) -> dict:
+    """
+    Per-game fingerprint of the play-by-play rows.
+
+    Args:
+        player_data (pl.DataFrame): Output of get_play_by_play_sql.
+
+    Returns:
+        dict: str(GAME_ID) to a string that changes whenever any of the
+        game's plays is added, removed or edited.
+    """
+    ordered = player_data.select(sorted(player_data.columns))
+    fingerprints = (
+        ordered.with_columns(ROW_HASH=ordered.hash_rows(seed=0))
+               .groupby('GAME_ID')
+               .agg(
+                   HASH=pl.col('ROW_HASH').sum(),
+                   ROWS=pl.count()
+               )
+    )
+    return {
+        str(game_id): f'{row_hash}:{rows}'
+        for game_id, row_hash, rows in fingerprints.iter_rows()
+    }
+
+
+def _rebuild_from(
+        player_data: pl.DataFrame,
+        stored: pl.DataFrame,
+        changed: set,
+        since: int = None
+    ) -> pl.DataFrame:
+    # Season windows (spot totals, last 5) need the whole season, and the
+    # carried columns run on in GAME_ID order, so rebuild the smallest
+    # GAME_ID suffix that covers every season touched by a changed game.
+    games = pl.concat(
+        [
+            player_data.select('GAME_ID', 'YEAR'),
+            stored.select('GAME_ID', 'YEAR'),
+        ],
+        how='vertical_relaxed'
+    ).unique()
+    games = games.with_columns(KEY=pl.col('GAME_ID').cast(pl.Utf8))
+    seasons = set(games.filter(pl.col('KEY').is_in(list(changed)))['YEAR'])
+    while True:
+        first_game = (
+            games.filter(pl.col('YEAR').is_in(list(seasons)))['GAME_ID'].min()
+        )
+        later = set(games.filter(pl.col('GAME_ID') >= first_game)['YEAR'])
+        if later <= seasons:
+            break
+        seasons |= later
+    if since is not None and first_game < since:
+        raise PartialHistory(int(first_game))
+
+    prefix = stored.filter(pl.col('GAME_ID') < first_game)
+    carry = {}
+    if len(prefix):
+        last = prefix.sort(by=['GAME_ID', 'PLAY_NUM']).tail(1)
+        carry = {column: last[column][0] for column in CARRIED_COLUMNS}
+    suffix = build_features(
+        player_data.filter(pl.col('GAME_ID') >= first_game), carry=carry
+    )
+    return pl.concat(
+        [prefix, suffix.select(prefix.columns)], how='vertical_relaxed'
+    )
+
+
+def _write_store(store_dir: str, features: pl.DataFrame, manifest: dict):
+    os.makedirs(store_dir, exist_ok=True)
+    features_path = os.path.join(store_dir, FEATURES_FILE)
+    manifest_path = os.path.join(store_dir, MANIFEST_FILE)
+    # Write both to temporary names first so a crash never leaves a
+    # manifest describing the wrong Parquet file.
+    features.write_parquet(features_path + '.tmp')
+    with open(manifest_path + '.tmp', 'w') as file:
+        json.dump(manifest, file)
+    os.replace(features_path + '.tmp', features_path)
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+
+def _read_store(store_dir: str):
+    try:
+        with open(os.path.join(store_dir, MANIFEST_FILE)) as file:
+            manifest = json.load(file)
+        features = pl.read_parquet(os.path.join(store_dir, FEATURES_FILE))
+    except (OSError, ValueError, pl.ArrowError, pl.ComputeError):
+        return None, None
+    return manifest, features
+
+
+def _load_features(
+        player_data: pl.DataFrame,
+        store_dir: str,
+        since: int = None
+    ) -> pl.DataFrame:
+    version = feature_version()
+    fingerprints = game_fingerprints(player_data)
+    manifest, stored = _read_store(store_dir)
+
+    if manifest is None or manifest.get('version') != version:
+        if since is not None:
+            raise PartialHistory()
+        features = build_features(player_data)
+    else:
+        previous = manifest.get('games', {})
+        if since is not None:
+            # Games before since weren't loaded and keep their stored state
+            fingerprints = {
+                **{
+                    game_id: fingerprint
+                    for game_id, fingerprint in previous.items()
+                    if int(game_id) < since
+                },
+                **fingerprints,
+            }
+        changed = {
+            game_id for game_id in fingerprints.keys() | previous.keys()
+            if fingerprints.get(game_id) != previous.get(game_id)
+        }
+        if not changed:
+            return stored
+        try:
+            features = _rebuild_from(player_data, stored, changed, since)
+        except (pl.ComputeError, pl.SchemaError, pl.ColumnNotFoundError):
+            if since is not None:
+                raise PartialHistory()
+            features = build_features(player_data)
+
+    features = features.sort(by=['GAME_ID', 'PLAY_NUM'])
+    _write_store(
+        store_dir, features, {'version': version, 'games': fingerprints}
+    )
+    return features
+
+
+def history_start(game_id: int, store_dir: str = STORE_DIR) -> int | None:
+    """
+    GAME_ID from which plays are needed to bring the store up to date
+    after game_id changed: the first stored game of its season, or of the
+    nearest earlier stored game's season when game_id is new.
+
+    Args:
+        game_id (int): Earliest game whose plays changed.
+        store_dir (str): Directory holding the Parquet file and manifest.
+
+    Returns:
+        int | None: A since value for load_features, or None when the
+        store is missing or stale and the whole history is needed.
+    """
+    with _store_lock:
+        manifest, stored = _read_store(store_dir)
+    if manifest is None or manifest.get('version') != feature_version():
+        return None
+    games = stored.select('GAME_ID', 'YEAR').unique()
+    earlier = games.filter(pl.col('GAME_ID') <= game_id).sort(by='GAME_ID')
+    if not len(earlier):
+        return None
+    season = earlier['YEAR'][-1]
+    return int(games.filter(pl.col('YEAR') == season)['GAME_ID'].min())
+
+
+def load_features(
+        player_data: pl.DataFrame,
+        store_dir: str = STORE_DIR,
+        since: int = None
+    ) -> pl.DataFrame:
+    """
+    build_features output for player_data, served from a Parquet store.
+
+    The store is keyed by (GAME_ID, PLAY_NUM) and a manifest records the
+    feature_version and each game's fingerprint. Only the seasons of
+    games whose plays changed (and any games after them) are rebuilt; a
+    version mismatch or unreadable store triggers a full rebuild.
+
+    Args:
+        player_data (pl.DataFrame): Output of get_play_by_play_sql.
+        store_dir (str): Directory holding the Parquet file and manifest.
+        since (int): player_data only holds games with GAME_ID >= since;
+            earlier games are served from the store as they are.
+
+    Returns:
+        pl.DataFrame: Same rows and columns as build_features(player_data),
+        sorted by GAME_ID and PLAY_NUM.
+
+    Raises:
+        PartialHistory: With since, when the update needs earlier plays.
+    """
+    with _store_lock:
+        return _load_features(player_data, store_dir, since)
+
+if __name__ == '__main__':
+    import argparse
+
+    from py import data_source, sql
+
+    parser = argparse.ArgumentParser(
+        description='Bring the play feature store up to date.'
+    )
+    parser.add_argument('connection', help='Database connection string')
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    parser.add_argument(
+        '--rebuild', action='store_true', help='Discard the store first'
+    )
+    args = parser.parse_args()
+
+    if args.rebuild:
+        for name in (FEATURES_FILE, MANIFEST_FILE):
+            path = os.path.join(args.store_dir, name)
+            if os.path.exists(path):
+                os.remove(path)
+    player_data = data_source.run_query(
+        sql=sql.get_play_by_play_sql(),
+        connection=args.connection,
+        output='polars',
+        dtypes=data_source.ID_DTYPES
+    )
+    features = load_features(player_data, store_dir=args.store_dir)
+    print(f'{len(features)} plays in {args.store_dir}')
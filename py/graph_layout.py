@@ -0,0 +1,260 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import networkx as nx
+import numpy as np
+
+
+VIS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'lib', 'vis-9.1.2'
+)
+LAYOUT_SEED = 13
+LAYOUT_K = 2
+CACHE_SIZE = 64
+# Smallest padding around already-placed nodes, so a degenerate drawing
+# (one node, or all of them on a line) still leaves room for newcomers
+MIN_MARGIN = 0.2
+# vis.js works in pixels; spring_layout positions sit in about [-1, 1]
+VIS_SCALE = 600
+
+_layouts = OrderedDict()
+_lock = threading.Lock()
+
+
+def graph_fingerprint(G: nx.Graph) -> str:
+    """
+    Hash of a graph's nodes and weighted edges, independent of the
+    order they were added in.
+
+    Args:
+        G (nx.Graph): The graph.
+
+    Returns:
+        str: Hex digest.
+    """
+    digest = hashlib.sha256()
+    for node in sorted(map(str, G.nodes())):
+        digest.update(f'n{node}\0'.encode())
+    for u, v, weight in sorted(
+            (str(u), str(v), data.get('weight', 1))
+            for u, v, data in G.edges(data=True)):
+        digest.update(f'e{u}\0{v}\0{weight}\0'.encode())
+    return digest.hexdigest()
+
+
+def _bounds(known: dict) -> tuple:
+    # Box around the placed nodes, padded by at least MIN_MARGIN
+    placed = np.array(list(known.values()))
+    low, high = placed.min(axis=0), placed.max(axis=0)
+    margin = np.maximum(0.1 * (high - low), MIN_MARGIN)
+    return low - margin, high + margin
+
+
+def _seed_new_nodes(G: nx.Graph, known: dict, seed: int) -> dict:
+    # Start new nodes at the centre of their placed neighbours (or
+    # somewhere inside the current drawing) so they settle nearby
+    rng = np.random.default_rng(seed)
+    low, high = _bounds(known)
+    start = dict(known)
+    for node in G.nodes():
+        if node in start:
+            continue
+        neighbours = [
+            start[other] for other in nx.all_neighbors(G, node)
+            if other in start
+        ]
+        if neighbours:
+            start[node] = tuple(
+                np.mean(neighbours, axis=0) + rng.normal(0, 0.01, 2)
+            )
+        else:
+            start[node] = tuple(rng.uniform(low, high))
+    return start
+
+
+def _positions_digest(known: dict) -> str:
+    digest = hashlib.sha256()
+    for node, (x, y) in sorted((str(node), xy) for node, xy in known.items()):
+        digest.update(f'{node}\0{x!r}\0{y!r}\0'.encode())
+    return digest.hexdigest()
+
+
+def layout(
+        G: nx.Graph,
+        k: float = LAYOUT_K,
+        seed: int = LAYOUT_SEED,
+        previous: dict = None
+    ) -> dict:
+    """
+    Spring layout positions, cached by graph fingerprint.
+
+    Without previous, the result depends only on G, k and seed. Pass
+    the layout this view drew last time as previous and the nodes it
+    shares with G are held fixed, so only new nodes are moved by the
+    spring simulation, starting from their placed neighbours. Adding a
+    player filter or a game then doesn't reshuffle the lineups already
+    on screen. With fewer than two shared nodes there is nothing to
+    anchor to and G is laid out from scratch.
+
+    k only applies to a from-scratch layout: with fixed nodes
+    spring_layout doesn't rescale, so new nodes use its default spacing.
+
+    Args:
+        G (nx.Graph): The graph to lay out.
+        k (float): spring_layout optimal node distance.
+        seed (int): spring_layout random seed.
+        previous (dict): Node to (x, y) from this view's last layout,
+            e.g. kept in st.session_state.
+
+    Returns:
+        dict: Node to (x, y).
+    """
+    known = {
+        node: previous[node] for node in G.nodes()
+        if previous and node in previous
+    }
+    if len(known) < 2:
+        known = {}
+    key = (graph_fingerprint(G), k, seed, _positions_digest(known))
+    with _lock:
+        cached = _layouts.get(key)
+        if cached is not None:
+            _layouts.move_to_end(key)
+            return cached
+
+    if known and len(known) == len(G):
+        pos = known
+    elif known:
+        pos = nx.spring_layout(
+            G, pos=_seed_new_nodes(G, known, seed), fixed=list(known),
+            seed=seed
+        )
+        # Unconnected newcomers get pushed far out; keep them in frame
+        low, high = _bounds(known)
+        pos = {
+            node: xy if node in known else np.clip(xy, low, high)
+            for node, xy in pos.items()
+        }
+    else:
+        pos = nx.spring_layout(G, k=k, seed=seed)
+    pos = {node: (float(x), float(y)) for node, (x, y) in pos.items()}
+
+    with _lock:
+        _layouts[key] = pos
+        while len(_layouts) > CACHE_SIZE:
+            _layouts.popitem(last=False)
+    return pos
+
+
+@lru_cache(maxsize=1)
+def _vis_assets() -> tuple:
+    with open(os.path.join(VIS_DIR, 'vis-network.min.js')) as file:
+        script = file.read()
+    with open(os.path.join(VIS_DIR, 'vis-network.css')) as file:
+        style = file.read()
+    return script, style
+
+
+def _json(value) -> str:
+    # Safe to drop inside a <script> block
+    return json.dumps(value).replace('<', '\\u003c')
+
+
+def to_vis_html(
+        G: nx.DiGraph,
+        pos: dict,
+        node_colors: dict = None,
+        node_titles: dict = None,
+        height: int = 750
+    ) -> str:
+    """
+    Standalone vis-network page for a graph with fixed positions, for
+    streamlit.components.v1.html. Uses the vendored lib/vis-9.1.2
+    assets, inlined, so nothing is fetched from a CDN.
+
+    Args:
+        G (nx.DiGraph): Graph with optional 'weight' on edges.
+        pos (dict): Node to (x, y), e.g. from layout().
+        node_colors (dict): Node to CSS color.
+        node_titles (dict): Node to hover text.
+        height (int): Canvas height in pixels.
+
+    Returns:
+        str: HTML document.
+    """
+    node_colors = node_colors or {}
+    node_titles = node_titles or {}
+    ids = {node: i for i, node in enumerate(G.nodes())}
+    nodes = [
+        {
+            'id': ids[node],
+            'label': str(node),
+            'x': pos[node][0] * VIS_SCALE,
+            # vis.js y grows downwards
+            'y': -pos[node][1] * VIS_SCALE,
+            'color': node_colors.get(node, 'green'),
+            'title': node_titles.get(node, str(node)),
+        }
+        for node in G.nodes()
+    ]
+    edges = [
+        {
+            'from': ids[u],
+            'to': ids[v],
+            'value': data.get('weight', 1),
+            'title': f"{data.get('weight', 1)} transitions",
+        }
+        for u, v, data in G.edges(data=True)
+    ]
+    options = {
+        'physics': False,
+        'nodes': {
+            'shape': 'dot',
+            'size': 18,
+            'font': {'size': 14, 'strokeWidth': 3, 'strokeColor': 'white'},
+        },
+        'edges': {
+            'arrows': {'to': {'enabled': True, 'scaleFactor': 0.6}},
+            'color': {'color': '#555555', 'inherit': False},
+            'scaling': {'min': 1, 'max': 12},
+            'smooth': False,
+        },
+        'interaction': {
+            'hover': True,
+            'navigationButtons': True,
+            'tooltipDelay': 100,
+        },
+    }
+    script, style = _vis_assets()
+    return f'''<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<style>{style}</style>
+<style>
+html, body {{ margin: 0; }}
+#network {{ width: 100%; height: {height}px; }}
+.vis-tooltip {{ white-space: pre-line; }}
+</style>
+<script>{script}</script>
+</head>
+<body>
+<div id="network"></div>
+<script>
+new vis.Network(
+    document.getElementById("network"),
+    {{
+        nodes: new vis.DataSet({_json(nodes)}),
+        edges: new vis.DataSet({_json(edges)})
+    }},
+    {_json(options)}
+);
+</script>
+</body>
+</html>
+'''
@@ -0,0 +1,324 @@
+import numpy as np
+import pandas as pd
+
+
+GAME_END_SEC = 36 * 60
+MAX_PLAYERS = 64
+
+
+def lineup_players(minutes_data: pd.DataFrame) -> np.ndarray:
+    """
+    Player ids in bit order for lineup masks: bit i is players[i].
+
+    Args:
+        minutes_data (pd.DataFrame): Rows from view_minutes_sql.
+
+    Returns:
+        np.ndarray: Sorted unique PLAYER_IDs as int64.
+    """
+    players = np.unique(minutes_data['PLAYER_ID'].astype(int).to_numpy())
+    if len(players) > MAX_PLAYERS:
+        raise ValueError(
+            f'{len(players)} players do not fit a {MAX_PLAYERS}-bit lineup mask'
+        )
+    return players
+
+
+def mask_to_ids(mask: int, players: np.ndarray) -> tuple:
+    """
+    Player ids in a lineup mask, ascending.
+
+    Args:
+        mask (int): Lineup bitmask.
+        players (np.ndarray): Output of lineup_players.
+
+    Returns:
+        tuple: The ids, e.g. (3, 10, 12, 21, 24).
+    """
+    mask = int(mask)
+    return tuple(
+        int(player) for bit, player in enumerate(players) if mask >> bit & 1
+    )
+
+
+def _game_segments(
+        time_in: np.ndarray,
+        time_out: np.ndarray,
+        bits: np.ndarray,
+        game_end_sec: int,
+        player_count: int
+    ) -> tuple:
+    # Every substitution time once, ascending, padded out to 0 and the end
+    times = np.unique(
+        np.clip(np.concatenate([time_in, time_out]), 0, game_end_sec)
+        .astype(np.int64)
+    )
+    if times[0] != 0:
+        times = np.insert(times, 0, 0)
+    if times[-1] != game_end_sec:
+        times = np.append(times, game_end_sec)
+
+    # Segment j runs from times[j + 1] down to times[j] on the game clock.
+    # A stint covers it when TIME_IN >= times[j + 1] and TIME_OUT <= times[j],
+    # i.e. for j in [first, last]; mark those bounds and cumsum once.
+    segments = len(times) - 1
+    first = np.searchsorted(times, time_out, side='left')
+    last = np.searchsorted(times, time_in, side='right') - 2
+    valid = first <= last
+    on_court = np.zeros((segments + 1, player_count), dtype=np.int64)
+    np.add.at(on_court, (first[valid], bits[valid]), 1)
+    np.add.at(on_court, (last[valid] + 1, bits[valid]), -1)
+    on_court = np.cumsum(on_court, axis=0)[:-1] > 0
+    masks = (
+        on_court.astype(np.uint64)
+        << np.arange(player_count, dtype=np.uint64)
+    ).sum(axis=1, dtype=np.uint64)
+    # Latest segment first, as the clock runs
+    return times[:0:-1], times[-2::-1], masks[::-1].astype(np.int64)
+
+
+def build_lineup_intervals(
+        minutes_data: pd.DataFrame,
+        game_end_sec: int = GAME_END_SEC,
+        players: np.ndarray = None
+    ) -> pd.DataFrame:
+    """
+    Split each game into segments between substitutions, with the
+    lineup on the floor and the score at either end.
+
+    Works as a sweep over each game's sorted substitution times: every
+    stint marks the first and last segment it covers and a cumulative
+    sum gives who is on the floor in every segment at once. Lineups are
+    int64 bitmasks over the players array (LINEUP_MASK); LINEUP_KEY keeps
+    the str(tuple) form, rendered once per distinct lineup.
+
+    Args:
+        minutes_data (pd.DataFrame): Rows from view_minutes_sql.
+        game_end_sec (int): Length of a game in seconds.
+        players (np.ndarray): Bit order for the masks. Defaults to
+            lineup_players(minutes_data).
+
+    Returns:
+        pd.DataFrame: One row per segment with TIME_IN, TIME_OUT,
+        LINEUP_MASK, LINEUP_KEY, SCORE_IN, SCORE_OUT, OPP_SCORE_IN,
+        OPP_SCORE_OUT, GAME_ID, SECONDS_PLAYED, MIN_PLAYED (at least 1),
+        POINTS_SCORED and OPP_POINTS_SCORED.
+    """
+    if players is None:
+        players = lineup_players(minutes_data)
+    minutes_data = minutes_data.sort_values(by='GAME_ID', kind='stable')
+    game_ids, starts = np.unique(
+        minutes_data['GAME_ID'].to_numpy(), return_index=True
+    )
+    stops = np.append(starts[1:], len(minutes_data))
+    time_in = minutes_data['TIME_IN'].to_numpy()
+    time_out = minutes_data['TIME_OUT'].to_numpy()
+    bits = np.searchsorted(
+        players, minutes_data['PLAYER_ID'].astype(int).to_numpy()
+    )
+    segments = [
+        _game_segments(
+            time_in[start:stop], time_out[start:stop], bits[start:stop],
+            game_end_sec, len(players)
+        )
+        for start, stop in zip(starts, stops)
+    ]
+    clean_lineups = pd.DataFrame({
+        'TIME_IN': np.concatenate([seg[0] for seg in segments]),
+        'TIME_OUT': np.concatenate([seg[1] for seg in segments]),
+        'LINEUP_MASK': np.concatenate([seg[2] for seg in segments]),
+        'GAME_ID': np.repeat(game_ids, [len(seg[0]) for seg in segments]),
+    })
+
+    # Score at either end of a segment: the lowest score recorded for a
+    # stint starting (or ending) exactly there, NaN if none does.
+    score_in = (
+        minutes_data.groupby(by=['GAME_ID', 'TIME_IN'], as_index=False)
+                    .agg(SCORE_IN=('TEAM_POINT_IN', 'min'),
+                         OPP_SCORE_IN=('OPP_POINT_IN', 'min'))
+    )
+    score_out = (
+        minutes_data.groupby(by=['GAME_ID', 'TIME_OUT'], as_index=False)
+                    .agg(SCORE_OUT=('TEAM_POINT_OUT', 'min'),
+                         OPP_SCORE_OUT=('OPP_POINT_OUT', 'min'))
+    )
+    clean_lineups = (
+        clean_lineups.merge(score_in, on=['GAME_ID', 'TIME_IN'], how='left')
+                     .merge(score_out, on=['GAME_ID', 'TIME_OUT'], how='left')
+    )
+    clean_lineups = clean_lineups[[
+        'TIME_IN', 'TIME_OUT', 'LINEUP_MASK', 'SCORE_IN', 'SCORE_OUT',
+        'OPP_SCORE_IN', 'OPP_SCORE_OUT', 'GAME_ID'
+    ]]
+    keys = {
+        mask: str(mask_to_ids(mask, players))
+        for mask in clean_lineups['LINEUP_MASK'].unique()
+    }
+    clean_lineups.insert(
+        loc=3,
+        column='LINEUP_KEY',
+        value=clean_lineups['LINEUP_MASK'].map(keys)
+    )
+
+    clean_lineups['SECONDS_PLAYED'] = (
+        clean_lineups['TIME_IN'] - clean_lineups['TIME_OUT']
+    )
+    clean_lineups['MIN_PLAYED'] = (
+        clean_lineups['SECONDS_PLAYED'] / 60
+    )
+    clean_lineups['MIN_PLAYED'] = np.where(
+        clean_lineups['MIN_PLAYED'] < 1, 1, clean_lineups['MIN_PLAYED']
+    )
+    clean_lineups['POINTS_SCORED'] = (
+        clean_lineups['SCORE_OUT'] - clean_lineups['SCORE_IN']
+    )
+    clean_lineups['OPP_POINTS_SCORED'] = (
+        clean_lineups['OPP_SCORE_OUT'] - clean_lineups['OPP_SCORE_IN']
+    )
+    return clean_lineups
+
+
+def transition_edges(segments: pd.DataFrame) -> pd.DataFrame:
+    """
+    Weighted lineup-to-lineup transitions.
+
+    Segments are ordered by game clock within each game; each segment
+    links to the next one left in the same game. Repeats of the same
+    lineup (no change) are not edges.
+
+    Args:
+        segments (pd.DataFrame): build_lineup_intervals rows, possibly
+            filtered, with GAME_ID, TIME_IN and LINEUP_MASK.
+
+    Returns:
+        pd.DataFrame: SOURCE, TARGET (masks) and WEIGHT, the number of
+        times the transition happened.
+    """
+    ordered = segments.sort_values(
+        by=['GAME_ID', 'TIME_IN'], ascending=[True, False], kind='stable'
+    )
+    source = ordered['LINEUP_MASK'].to_numpy()
+    game = ordered['GAME_ID'].to_numpy()
+    keep = (game[:-1] == game[1:]) & (source[:-1] != source[1:])
+    edges = pd.DataFrame({
+        'SOURCE': source[:-1][keep],
+        'TARGET': source[1:][keep],
+    })
+    return (
+        edges.groupby(by=['SOURCE', 'TARGET'], as_index=False, sort=False)
+             .size()
+             .rename(columns={'size': 'WEIGHT'})
+    )
+
+
+class LineupIndex:
+    """
+    Distinct lineups as 64-bit masks with an inverted player index.
+
+    Bit i of a mask is players[i]. For each player the index keeps the
+    positions of the lineups they appear in, so "every lineup with A
+    and B" intersects two short arrays instead of scanning every lineup.
+
+    Args:
+        masks (array-like): Lineup masks, e.g. a LINEUP_MASK column;
+            duplicates are dropped.
+        players (np.ndarray): Bit order the masks were built with.
+    """
+
+    def __init__(self, masks, players: np.ndarray):
+        self.players = np.asarray(players, dtype=np.int64)
+        self.masks = np.unique(np.asarray(masks, dtype=np.int64))
+        on_court = (
+            self.masks.view(np.uint64)[:, None]
+            >> np.arange(len(self.players), dtype=np.uint64)
+        ) & np.uint64(1)
+        self._by_player = {
+            int(player): np.flatnonzero(on_court[:, bit])
+            for bit, player in enumerate(self.players)
+        }
+        self._bit = {int(player): bit for bit, player in enumerate(self.players)}
+
+    def __len__(self) -> int:
+        return len(self.masks)
+
+    def player_mask(self, player_ids) -> int:
+        """
+        Mask with the given players' bits set.
+
+        Args:
+            player_ids (iterable): Player ids.
+
+        Returns:
+            int: The mask, as a signed 64-bit value like LINEUP_MASK.
+        """
+        mask = 0
+        for player in player_ids:
+            mask |= 1 << self._bit[int(player)]
+        return int(np.array(mask, dtype=np.uint64).view(np.int64))
+
+    def containing(self, player_ids) -> np.ndarray:
+        """
+        Every lineup that includes all of the given players.
+
+        Args:
+            player_ids (iterable): Player ids; empty matches every lineup.
+
+        Returns:
+            np.ndarray: Matching masks, ascending.
+        """
+        positions = None
+        for player in player_ids:
+            found = self._by_player.get(int(player))
+            if found is None:
+                return self.masks[:0]
+            positions = (
+                found if positions is None
+                else np.intersect1d(positions, found, assume_unique=True)
+            )
+        return self.masks if positions is None else self.masks[positions]
+
+    def ids(self, mask: int) -> tuple:
+        """Player ids in one lineup, ascending."""
+        return mask_to_ids(mask, self.players)
+
+    def _render(self, masks, label) -> np.ndarray:
+        # Render each distinct lineup once, then fan back out
+        unique, inverse = np.unique(
+            np.asarray(masks, dtype=np.int64), return_inverse=True
+        )
+        labels = np.array(
+            [label(self.ids(mask)) for mask in unique], dtype=object
+        )
+        return labels[inverse]
+
+    def keys(self, masks) -> np.ndarray:
+        """
+        str(tuple) form of each lineup, e.g. '(3, 10, 12, 21, 24)'.
+
+        Args:
+            masks (array-like): Lineup masks.
+
+        Returns:
+            np.ndarray: One string per mask.
+        """
+        return self._render(masks, str)
+
+    def names(self, masks, player_names: dict, sep: str = ', ') -> np.ndarray:
+        """
+        Player names in each lineup joined into one label.
+
+        Args:
+            masks (array-like): Lineup masks.
+            player_names (dict): Player id to display name; ids missing
+                from it are shown as the id.
+            sep (str): Separator between names.
+
+        Returns:
+            np.ndarray: One label per mask.
+        """
+        return self._render(
+            masks,
+            lambda ids: sep.join(
+                player_names.get(player, str(player)) for player in ids
+            )
+        )
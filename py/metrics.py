@@ -0,0 +1,187 @@
+import time
+
+import numpy as np
+import polars as pl
+
+
+# Counting stats the metrics are built from, as in GAME_SUMMARY
+BASE_COLUMNS = [
+    'TWO_FGM', 'TWO_FGA', 'THREE_FGM', 'THREE_FGA', 'FTM', 'FTA',
+    'FGM', 'FGA', 'OFFENSIVE_REBOUNDS', 'ASSISTS', 'TURNOVER', 'POINTS',
+]
+
+# In the order apply_derived adds them
+DERIVED_COLUMNS = [
+    'TWO_POINTS_SCORED', 'THREE_POINTS_SCORED', 'TOTAL_POINTS_SCORED',
+    'FIELD_POINTS_SCORED', 'OE_NUM', 'OE_DENOM', 'EFG_NUM', 'POSSESSIONS',
+    'TURNOVER_RATE', '2PPA', '3PPA', 'PPA', 'OFFENSIVE_EFFICENCY', 'EFG%',
+    'EFF_POINTS', 'POINTS_PER_POSSESSION', 'TRUE_SHOOTING_PERCENTAGE',
+    'FREE_THROW_RATE', 'POSSESSIONS_PER_MINUTE', 'ASSIST_RATE',
+]
+
+GAME_MINUTES = 36
+
+
+def _ratio(numerator: pl.Expr, denominator: pl.Expr) -> pl.Expr:
+    return (
+        pl.when(denominator != 0)
+          .then(numerator / denominator)
+          .otherwise(0)
+    )
+
+
+def derived_exprs(possessions: pl.Expr = None) -> dict:
+    """
+    Expressions for every derived metric, written only in terms of
+    BASE_COLUMNS so they can all be evaluated in one with_columns.
+
+    Args:
+        possessions (pl.Expr): Possession count to use instead of the
+            FGA - OREB + TO + .44 * FTA estimate, e.g. pl.col('POSSESSIONS')
+            when the input already carries one.
+
+    Returns:
+        dict: DERIVED_COLUMNS name to expression, in that order.
+    """
+    two_fgm, three_fgm = pl.col('TWO_FGM'), pl.col('THREE_FGM')
+    fga, fta = pl.col('FGA'), pl.col('FTA')
+    assists, turnovers = pl.col('ASSISTS'), pl.col('TURNOVER')
+    points = pl.col('POINTS')
+
+    two_points = 2 * two_fgm
+    three_points = 3 * three_fgm
+    field_points = two_points + three_points
+    oe_num = pl.col('FGM') + assists
+    oe_denom = fga - pl.col('OFFENSIVE_REBOUNDS') + assists + turnovers
+    efg_num = two_fgm + 1.5 * three_fgm
+    if possessions is None:
+        possessions = (
+            fga - pl.col('OFFENSIVE_REBOUNDS') + turnovers + .44 * fta
+        )
+    offensive_efficiency = _ratio(oe_num, oe_denom)
+    shooting_attempts = fga + .44 * fta
+
+    return {
+        'TWO_POINTS_SCORED': two_points,
+        'THREE_POINTS_SCORED': three_points,
+        'TOTAL_POINTS_SCORED': field_points + pl.col('FTM'),
+        'FIELD_POINTS_SCORED': field_points,
+        'OE_NUM': oe_num,
+        'OE_DENOM': oe_denom,
+        'EFG_NUM': efg_num,
+        'POSSESSIONS': possessions,
+        'TURNOVER_RATE': _ratio(turnovers, possessions),
+        '2PPA': _ratio(two_points, pl.col('TWO_FGA')),
+        '3PPA': _ratio(three_points, pl.col('THREE_FGA')),
+        'PPA': _ratio(field_points, fga),
+        'OFFENSIVE_EFFICENCY': offensive_efficiency,
+        'EFG%': _ratio(efg_num, fga),
+        'EFF_POINTS': points * offensive_efficiency,
+        'POINTS_PER_POSSESSION': _ratio(points, possessions),
+        'TRUE_SHOOTING_PERCENTAGE': _ratio(points, 2 * shooting_attempts),
+        'FREE_THROW_RATE': _ratio(fta, fga),
+        'POSSESSIONS_PER_MINUTE': possessions / GAME_MINUTES,
+        'ASSIST_RATE': _ratio(assists, pl.col('FGM')),
+    }
+
+
+def derive(data: pl.LazyFrame, columns: list = None) -> pl.LazyFrame:
+    """
+    Add derived metrics to a lazy query.
+
+    Every metric goes into a single with_columns node, so callers can
+    keep filtering, grouping and selecting around it and Polars plans
+    the whole thing at once. A POSSESSIONS column already in the input
+    (TEAM_GAME_TOTALS has one) is used rather than re-estimated.
+
+    Args:
+        data (pl.LazyFrame): Rows holding BASE_COLUMNS, at any level
+            (player-game, player-season, team-game, ...).
+        columns (list): Metrics to add. Defaults to DERIVED_COLUMNS.
+
+    Returns:
+        pl.LazyFrame: data with the metrics appended.
+    """
+    possessions = (
+        pl.col('POSSESSIONS') if 'POSSESSIONS' in data.schema else None
+    )
+    exprs = derived_exprs(possessions=possessions)
+    return data.with_columns([
+        exprs[name].alias(name) for name in (columns or DERIVED_COLUMNS)
+    ])
+
+
+def apply_derived(data, columns: list = None):
+    """
+    Derived metrics for summed counting stats.
+
+    Args:
+        data (pl.DataFrame | pl.LazyFrame | pd.DataFrame): Rows holding
+            BASE_COLUMNS. Pass Polars frames where possible; pandas input
+            is converted once on the way in and once on the way out.
+        columns (list): Metrics to add. Defaults to DERIVED_COLUMNS.
+
+    Returns:
+        The same kind of frame as data, with the metrics appended.
+    """
+    if isinstance(data, pl.LazyFrame):
+        return derive(data, columns=columns)
+    if isinstance(data, pl.DataFrame):
+        return derive(data.lazy(), columns=columns).collect()
+    return (
+        derive(pl.from_pandas(data).lazy(), columns=columns)
+        .collect()
+        .to_pandas()
+    )
+
+
+def _synthetic_totals(rows: int, seed: int = 0) -> pl.DataFrame:
+    rng = np.random.default_rng(seed)
+    data = {
+        name: rng.integers(0, 30, rows)
+        for name in [
+            'TWO_FGM', 'TWO_FGA', 'THREE_FGM', 'THREE_FGA', 'FTM', 'FTA',
+            'OFFENSIVE_REBOUNDS', 'ASSISTS', 'TURNOVER',
+        ]
+    }
+    data['FGM'] = data['TWO_FGM'] + data['THREE_FGM']
+    data['FGA'] = data['TWO_FGA'] + data['THREE_FGA']
+    data['POINTS'] = 2 * data['TWO_FGM'] + 3 * data['THREE_FGM'] + data['FTM']
+    return pl.DataFrame(data)
+
+
+def benchmark(rows: int = 100000, repeat: int = 20) -> dict:
+    """
+    Time apply_derived on synthetic totals.
+
+    Args:
+        rows (int): Rows in the synthetic frame.
+        repeat (int): Runs to average over.
+
+    Returns:
+        dict: Mean milliseconds per call for eager and lazy input.
+    """
+    data = _synthetic_totals(rows)
+    timings = {}
+    for label, frame, collect in [
+            ('eager', data, False), ('lazy', data.lazy(), True)]:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = apply_derived(frame)
+            if collect:
+                result.collect()
+        timings[label] = (time.perf_counter() - start) / repeat * 1000
+    return timings
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Micro-benchmark for the derived metrics plan.'
+    )
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    for label, ms in benchmark(rows=args.rows, repeat=args.repeat).items():
+        print(f'{label}: {ms:.2f} ms per call ({args.rows} rows)')
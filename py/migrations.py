@@ -0,0 +1,431 @@
+import argparse
+import re
+import time
+from datetime import datetime, timezone
+
+from py import data_source, sql
+
+
+ID_COLUMNS = ('GAME_ID', 'PLAYER_ID', 'NUMBER')
+FLOAT_TYPES = ('REAL', 'FLOAT', 'DOUBLE', 'DOUBLE PRECISION')
+# DEFERRED_MIGRATIONS entry for a materialized summary fill that had to
+# wait for MINUTES_PLAYED
+SUMMARY_REFRESH = 'game summary refresh'
+
+# (index name, table, columns). Tables that don't exist on a given
+# database (MINUTES and GAME_STATS_PLAYS only live in the cloud copy)
+# are skipped.
+INDEXES = (
+    # delete_shot() and the per-game PLAYS lookups
+    ('IX_PLAYS_GAME_PLAY_PLAYER', 'PLAYS', ('GAME_ID', 'PLAY_NUM', 'PLAYER_ID')),
+    ('IX_PLAYS_PLAYER_GAME', 'PLAYS', ('PLAYER_ID', 'GAME_ID')),
+    # PLAYS -> GAMES on GAME_ID, then GAMES.SEASON -> PLAYERS.YEAR
+    ('IX_GAMES_GAME_SEASON', 'GAMES', ('GAME_ID', 'SEASON')),
+    ('IX_GAMES_SEASON', 'GAMES', ('SEASON',)),
+    ('IX_PLAYERS_NUMBER_YEAR', 'PLAYERS', ('NUMBER', 'YEAR')),
+    ('IX_PLAYERS_YEAR_NUMBER', 'PLAYERS', ('YEAR', 'NUMBER')),
+    ('IX_SPOTS_SPOT', 'SPOTS', ('SPOT',)),
+    ('IX_GAME_SUMMARY_GAME_PLAYER', 'GAME_SUMMARY', ('GAME_ID', 'PLAYER_ID')),
+    ('IX_GAME_SUMMARY_PLAYER_GAME', 'GAME_SUMMARY', ('PLAYER_ID', 'GAME_ID')),
+    ('IX_MINUTES_GAME_PLAYER', 'MINUTES', ('GAME_ID', 'PLAYER_ID')),
+    ('IX_GAME_STATS_PLAYS_GAME_PLAYER', 'GAME_STATS_PLAYS',
+     ('GAME_ID', 'PLAYER_ID', 'STAT')),
+)
+
+BENCHMARK_QUERIES = {
+    'play_by_play': sql.get_play_by_play_sql,
+    'team_shot_chart_plays': sql.team_shot_chart_plays_sql,
+    'game_summary': sql.get_game_summary_sql,
+    'game_summary_source': sql.get_game_summary_source_sql,
+    'delete_shot_lookup': lambda: '''
+    SELECT *
+      FROM PLAYS
+     WHERE GAME_ID = (SELECT MAX(GAME_ID) FROM PLAYS)
+       AND PLAY_NUM = 1
+       AND PLAYER_ID = 0
+    ''',
+}
+
+
+def _dialect(connection: str) -> str:
+    backend = data_source.resolve_backend(connection)[0]
+    return 'duckdb' if backend == 'duckdb' else 'sqlite'
+
+
+def _tables(cursor, dialect: str) -> set:
+    if dialect == 'duckdb':
+        cursor.execute(
+            "SELECT table_name FROM information_schema.tables "
+            "WHERE table_type = 'BASE TABLE'"
+        )
+    else:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def _has_relation(cursor, dialect: str, name: str) -> bool:
+    """Whether a table or view exists."""
+    if dialect == 'duckdb':
+        cursor.execute(
+            'SELECT COUNT(*) FROM information_schema.tables '
+            'WHERE table_name = ?',
+            (name,)
+        )
+    else:
+        cursor.execute(
+            "SELECT COUNT(*) FROM sqlite_master "
+            "WHERE type IN ('table', 'view') AND name = ?",
+            (name,)
+        )
+    return cursor.fetchall()[0][0] > 0
+
+
+def _refresh_game_summary(cursor, dialect: str):
+    # The summary source joins MINUTES_PLAYED, which only the cloud copy
+    # has; elsewhere the fill is recorded as deferred, and
+    # refresh_summary() runs it once the view exists.
+    cursor.execute(
+        'CREATE TABLE IF NOT EXISTS DEFERRED_MIGRATIONS ('
+        'NAME TEXT PRIMARY KEY, DEFERRED_AT TEXT)'
+    )
+    cursor.execute(
+        'DELETE FROM DEFERRED_MIGRATIONS WHERE NAME = ?', (SUMMARY_REFRESH,)
+    )
+    if not _has_relation(cursor, dialect, 'MINUTES_PLAYED'):
+        cursor.execute(
+            'INSERT INTO DEFERRED_MIGRATIONS (NAME, DEFERRED_AT) VALUES (?, ?)',
+            (SUMMARY_REFRESH, datetime.now(timezone.utc).isoformat())
+        )
+        return
+    cursor.execute(sql.delete_game_summary_materialized_sql())
+    cursor.execute(sql.insert_game_summary_materialized_sql())
+
+
+def _columns(cursor, dialect: str, table: str) -> list:
+    """(name, declared type) pairs in table order."""
+    if dialect == 'duckdb':
+        cursor.execute(
+            'SELECT column_name, data_type FROM information_schema.columns '
+            'WHERE table_name = ? ORDER BY ordinal_position',
+            (table,)
+        )
+        return [(name, col_type) for name, col_type in cursor.fetchall()]
+    cursor.execute(f'PRAGMA table_info("{table}")')
+    return [(row[1], row[2]) for row in cursor.fetchall()]
+
+
+def _is_whole(cursor, table: str, column: str) -> bool:
+    cursor.execute(
+        f'SELECT COUNT(*) FROM "{table}" '
+        f'WHERE "{column}" IS NOT NULL '
+        f'AND "{column}" != CAST("{column}" AS INTEGER)'
+    )
+    return cursor.fetchall()[0][0] == 0
+
+
+def _typed_table_sql(create_sql: str, table: str, convert: set) -> str | None:
+    """
+    The table's own CREATE TABLE statement, renamed to table__typed with
+    the convert columns declared INTEGER. Keys, NOT NULL, DEFAULT and
+    UNIQUE clauses are kept as written. None when the statement can't be
+    rewritten unambiguously.
+    """
+    quoted = r'[\["`]?{}[\]"`]?'
+    statement, count = re.subn(
+        r'^\s*CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?'
+        + quoted.format(re.escape(table)) + r'(?=[\s(])',
+        f'CREATE TABLE "{table}__typed"',
+        create_sql,
+        flags=re.IGNORECASE
+    )
+    if count != 1:
+        return None
+    float_types = '|'.join(
+        re.escape(col_type).replace(r'\ ', r'\s+')
+        for col_type in sorted(FLOAT_TYPES, key=len, reverse=True)
+    )
+    for name in convert:
+        statement, count = re.subn(
+            r'([(,]\s*' + quoted.format(re.escape(name)) + r'\s+)'
+            rf'(?:{float_types})\b',
+            r'\1INTEGER',
+            statement,
+            flags=re.IGNORECASE
+        )
+        if count != 1:
+            return None
+    return statement
+
+
+def _rebuild_sqlite_table(cursor, table: str, columns: list, convert: set):
+    cursor.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (table,)
+    )
+    typed_sql = _typed_table_sql(cursor.fetchall()[0][0], table, convert)
+    if typed_sql is None:
+        # Leave the column types alone rather than lose constraints
+        return
+    # Indexes and triggers go with the dropped table; UNIQUE and
+    # PRIMARY KEY autoindexes (sql IS NULL) come back with the DDL.
+    cursor.execute(
+        "SELECT sql FROM sqlite_master "
+        "WHERE type IN ('index', 'trigger') AND tbl_name = ? "
+        "AND sql IS NOT NULL",
+        (table,)
+    )
+    dependent_sql = [row[0] for row in cursor.fetchall()]
+    names = ', '.join(f'"{name}"' for name, _ in columns)
+    selects = ', '.join(
+        f'CAST("{name}" AS INTEGER)' if name in convert else f'"{name}"'
+        for name, _ in columns
+    )
+    # Keep views that reference the table (MINUTES_PLAYED and friends)
+    # pointing at it by name through the drop and rename.
+    cursor.execute('PRAGMA legacy_alter_table = ON')
+    cursor.execute(typed_sql)
+    cursor.execute(
+        f'INSERT INTO "{table}__typed" ({names}) '
+        f'SELECT {selects} FROM "{table}"'
+    )
+    cursor.execute(f'DROP TABLE "{table}"')
+    cursor.execute(f'ALTER TABLE "{table}__typed" RENAME TO "{table}"')
+    cursor.execute('PRAGMA legacy_alter_table = OFF')
+    for statement in dependent_sql:
+        cursor.execute(statement)
+
+
+def _integer_ids(cursor, dialect: str):
+    for table in sorted(_tables(cursor, dialect)):
+        columns = _columns(cursor, dialect, table)
+        convert = {
+            name for name, col_type in columns
+            if name in ID_COLUMNS
+            and col_type.upper() in FLOAT_TYPES
+            and _is_whole(cursor, table, name)
+        }
+        if not convert:
+            continue
+        if dialect == 'duckdb':
+            for name in sorted(convert):
+                cursor.execute(
+                    f'ALTER TABLE "{table}" ALTER COLUMN "{name}" TYPE BIGINT'
+                )
+        else:
+            _rebuild_sqlite_table(cursor, table, columns, convert)
+
+
+def _add_indexes(cursor, dialect: str):
+    tables = _tables(cursor, dialect)
+    for name, table, columns in INDEXES:
+        if table not in tables:
+            continue
+        column_list = ', '.join(f'"{column}"' for column in columns)
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON "{table}" ({column_list})'
+        )
+
+
+def _materialize_game_summary(cursor, dialect: str):
+    cursor.execute(sql.create_game_summary_materialized_sql())
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS IX_GAME_SUMMARY_MAT_GAME_PLAYER '
+        'ON GAME_SUMMARY_MATERIALIZED (GAME_ID, PLAYER_ID)'
+    )
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS IX_GAME_SUMMARY_MAT_SEASON '
+        'ON GAME_SUMMARY_MATERIALIZED (SEASON)'
+    )
+    _refresh_game_summary(cursor, dialect)
+
+
+def _unique_game_summary(cursor, dialect: str):
+    # Earlier existence checks could miss a row and insert it twice; the
+    # last-written copy wins.
+    cursor.execute(
+        'DELETE FROM GAME_SUMMARY WHERE rowid NOT IN ('
+        'SELECT MAX(rowid) FROM GAME_SUMMARY GROUP BY PLAYER_ID, GAME_ID)'
+    )
+    cursor.execute(
+        'CREATE UNIQUE INDEX IF NOT EXISTS UX_GAME_SUMMARY_PLAYER_GAME '
+        'ON GAME_SUMMARY (PLAYER_ID, GAME_ID)'
+    )
+    _refresh_game_summary(cursor, dialect)
+
+
+def _play_expected_points(cursor, dialect: str):
+    # Filled by py.scoring at ingest time and by its backfill command
+    cursor.execute(sql.create_play_expected_points_sql())
+
+
+# Append only: a database records the highest version it has applied.
+MIGRATIONS = (
+    (1, 'integer id columns', _integer_ids),
+    (2, 'join and filter indexes', _add_indexes),
+    (3, 'materialized game summary', _materialize_game_summary),
+    (4, 'unique game summary key', _unique_game_summary),
+    (5, 'play expected points table', _play_expected_points),
+)
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(connection: str) -> int:
+    """
+    Highest migration version applied to a database.
+
+    Args:
+        connection (str): The database connection string.
+
+    Returns:
+        int: 0 for a database that has never been migrated.
+    """
+    with data_source.transaction(connection) as cursor:
+        cursor.execute(
+            'CREATE TABLE IF NOT EXISTS SCHEMA_VERSION ('
+            'VERSION INTEGER PRIMARY KEY, NAME TEXT, APPLIED_AT TEXT)'
+        )
+        cursor.execute('SELECT MAX(VERSION) FROM SCHEMA_VERSION')
+        version = cursor.fetchall()[0][0]
+    return int(version or 0)
+
+
+def summary_refresh_due(connection: str) -> bool:
+    """
+    Whether GAME_SUMMARY_MATERIALIZED still needs the full fill that
+    migration skipped, and MINUTES_PLAYED now exists to build it from.
+
+    Args:
+        connection (str): The database connection string.
+
+    Returns:
+        bool: True when refresh_summary() should be run.
+    """
+    dialect = _dialect(connection)
+    with data_source.transaction(connection) as cursor:
+        if not (_has_relation(cursor, dialect, 'DEFERRED_MIGRATIONS')
+                and _has_relation(cursor, dialect, 'MINUTES_PLAYED')):
+            return False
+        cursor.execute(
+            'SELECT COUNT(*) FROM DEFERRED_MIGRATIONS WHERE NAME = ?',
+            (SUMMARY_REFRESH,)
+        )
+        return cursor.fetchall()[0][0] > 0
+
+
+def refresh_summary(connection: str):
+    """
+    Rebuild GAME_SUMMARY_MATERIALIZED in full and clear a deferred fill.
+
+    Args:
+        connection (str): The database connection string.
+
+    Raises:
+        RuntimeError: The database has no MINUTES_PLAYED to build from.
+    """
+    dialect = _dialect(connection)
+    with data_source.transaction(connection) as cursor:
+        if not _has_relation(cursor, dialect, 'MINUTES_PLAYED'):
+            raise RuntimeError(
+                'GAME_SUMMARY_MATERIALIZED is built from MINUTES_PLAYED, '
+                'which this database does not have'
+            )
+        _refresh_game_summary(cursor, dialect)
+
+
+def migrate(connection: str) -> list:
+    """
+    Apply every migration newer than the database's recorded version,
+    each in its own transaction. Running it again is a no-op.
+
+    Args:
+        connection (str): The database connection string.
+
+    Returns:
+        list: (version, name) of the migrations that were applied.
+    """
+    dialect = _dialect(connection)
+    applied = []
+    start = current_version(connection)
+    for version, name, step in MIGRATIONS:
+        if version <= start:
+            continue
+        with data_source.transaction(connection) as cursor:
+            step(cursor, dialect)
+            cursor.execute(
+                'INSERT INTO SCHEMA_VERSION (VERSION, NAME, APPLIED_AT) '
+                'VALUES (?, ?, ?)',
+                (version, name, datetime.now(timezone.utc).isoformat())
+            )
+        applied.append((version, name))
+    if applied and current_version(connection) != applied[-1][0]:
+        raise RuntimeError(
+            f'Migrations to version {applied[-1][0]} did not persist; '
+            f'the database is still at {current_version(connection)}'
+        )
+    return applied
+
+
+def benchmark(connection: str, repeat: int = 5, queries=None) -> dict:
+    """
+    Best-of-N wall time for the join-heavy page queries.
+
+    Queries that fail on this database (e.g. ones needing cloud-only
+    views) are left out of the result.
+
+    Args:
+        connection (str): The database connection string.
+        repeat (int): Runs per query; the fastest is reported.
+        queries (dict): Name to SQL-returning function. Defaults to
+            BENCHMARK_QUERIES.
+
+    Returns:
+        dict: Query name to seconds.
+    """
+    timings = {}
+    for name, query in (queries or BENCHMARK_QUERIES).items():
+        best = None
+        try:
+            for _ in range(repeat):
+                started = time.perf_counter()
+                data_source.run_query(sql=query(), connection=connection)
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+        except Exception:
+            continue
+        timings[name] = best
+    return timings
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Apply schema migrations to the stats database.'
+    )
+    parser.add_argument('connection', help='Database connection string')
+    parser.add_argument(
+        '--benchmark', action='store_true',
+        help='Time the page queries before and after migrating'
+    )
+    parser.add_argument(
+        '--refresh-summary', action='store_true',
+        help='Rebuild GAME_SUMMARY_MATERIALIZED in full after migrating'
+    )
+    args = parser.parse_args()
+
+    before = benchmark(args.connection) if args.benchmark else {}
+    applied = migrate(args.connection)
+    for version, name in applied:
+        print(f'applied {version}: {name}')
+    if not applied:
+        print(f'already at version {current_version(args.connection)}')
+    if args.refresh_summary:
+        refresh_summary(args.connection)
+        print('rebuilt GAME_SUMMARY_MATERIALIZED')
+    elif summary_refresh_due(args.connection):
+        print('MINUTES_PLAYED is available; run again with --refresh-summary')
+    if args.benchmark:
+        after = benchmark(args.connection)
+        for name, seconds in after.items():
+            print(
+                f'{name}: {before.get(name, float("nan")) * 1000:.1f} ms -> '
+                f'{seconds * 1000:.1f} ms'
+            )
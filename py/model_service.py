@@ -0,0 +1,149 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import joblib
+import numpy as np
+import polars as pl
+
+
+MODEL_PATH = 'pipeline.pkl'
+CACHE_SIZE = 200000
+
+MODEL_COLUMNS = [
+    'XSPOT', 'YSPOT',
+    'INTIAL_PERCENTAGE',
+    'SHOT_DEFENSE_CODED', 'INIT_EXPECTED',
+    'HOME_FLAG', 'OPP_EXPECTED',
+    'LAST_ROLLING_POINTS_TEAM_OPPONENT',
+    'LAST_ROLLING_POINTS_TEAM_NDA',
+]
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ModelService:
+    """
+    The shot make model, loaded once and scored in batches.
+
+    Predictions are cached by a hash of the model input columns, so
+    scoring the same plays again (switching back to a game, reruns of
+    a page) skips the pipeline entirely. Only rows missing from the
+    cache are sent to predict_proba, in a single call.
+
+    Args:
+        path (str): Path to the joblib-pickled sklearn pipeline.
+        mmap_mode (str): Passed to joblib.load; 'r' memory-maps large
+            numpy arrays in the pickle instead of reading them in.
+        cache_size (int): Most predictions kept, least recently used
+            evicted first.
+    """
+
+    def __init__(
+            self,
+            path: str = MODEL_PATH,
+            mmap_mode: str | None = None,
+            cache_size: int = CACHE_SIZE,
+        ):
+        self.path = path
+        self.mmap_mode = mmap_mode
+        self.cache_size = cache_size
+        self.mtime = os.path.getmtime(path)
+        self.model_version = _file_hash(path)
+        self.pipeline = joblib.load(filename=path, mmap_mode=mmap_mode)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0}
+
+    def input_hashes(self, features: pl.DataFrame) -> pl.Series:
+        """
+        Hash of each row's model inputs; the prediction cache key.
+
+        Args:
+            features (pl.DataFrame): Rows holding at least MODEL_COLUMNS.
+
+        Returns:
+            pl.Series: UInt64 hash per row.
+        """
+        return features.select(MODEL_COLUMNS).hash_rows(seed=0)
+
+    def predict_proba(self, features: pl.DataFrame) -> np.ndarray:
+        """
+        Make probability for each row.
+
+        Args:
+            features (pl.DataFrame): Rows holding at least MODEL_COLUMNS.
+
+        Returns:
+            np.ndarray: Probability of the positive class, one per row.
+        """
+        X = features.select(MODEL_COLUMNS)
+        if len(X) == 0:
+            return np.empty(0)
+        keys = self.input_hashes(X).to_list()
+        probs = np.empty(len(keys))
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                prob = self._cache.get(key)
+                if prob is None:
+                    missing.append(i)
+                else:
+                    self._cache.move_to_end(key)
+                    probs[i] = prob
+            self._stats['hits'] += len(keys) - len(missing)
+            self._stats['misses'] += len(missing)
+        if missing:
+            scored = self.pipeline.predict_proba(X[missing])[:, 1]
+            probs[missing] = scored
+            with self._lock:
+                for i, prob in zip(missing, scored):
+                    self._cache[keys[i]] = float(prob)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return probs
+
+    def stats(self) -> dict:
+        """
+        Snapshot of the prediction cache counters.
+
+        Returns:
+            dict: hits, misses, cached row count and the model_version.
+        """
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot['cached'] = len(self._cache)
+        snapshot['model_version'] = self.model_version
+        return snapshot
+
+
+def get_model_service(
+        path: str = MODEL_PATH, mmap_mode: str | None = None
+    ) -> ModelService:
+    """
+    Return the process-wide service for a pipeline file, loading it on
+    first use and again only if the file has been replaced since.
+
+    Args:
+        path (str): Path to the joblib-pickled sklearn pipeline.
+        mmap_mode (str): See ModelService.
+
+    Returns:
+        ModelService: The shared service.
+    """
+    with _services_lock:
+        service = _services.get((path, mmap_mode))
+        if service is None or service.mtime != os.path.getmtime(path):
+            service = ModelService(path, mmap_mode=mmap_mode)
+            _services[(path, mmap_mode)] = service
+        return service
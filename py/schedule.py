@@ -0,0 +1,209 @@
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+
+# GAMES.DATE is stored as M/D/YYYY text
+DATE_FORMAT = '%m/%d/%Y'
+
+# Separators the SQL views put between OPPONENT and DATE: get_player_game_sql
+# and get_play_by_play_sql, GAME_SUMMARY_MATERIALIZED, the team shot chart
+# U_ID and the plain 'OPPONENT DATE' GAME column
+LABEL_SEPARATORS = (' - ', '  -  ', ' -  ', ' ')
+
+
+class Game(NamedTuple):
+    game_id: int
+    opponent: str
+    date: pd.Timestamp
+    raw_date: str
+    season: int
+    location: str
+    label: str
+
+
+class GameIndex:
+    """
+    Games parsed once and held by GAME_ID for O(1) lookups.
+
+    Dates are parsed a single time on construction, games are kept in
+    date order, and every label form the SQL views produce maps back to
+    its GAME_ID, so pages never split labels or re-filter a games frame
+    to find the game that was selected.
+
+    Args:
+        games_df (pd.DataFrame | pl.DataFrame): GAME_ID, OPPONENT, DATE,
+            SEASON and optionally LOCATION, e.g. from get_games_sql.
+            Repeated GAME_IDs (as in get_player_game_sql) are dropped.
+    """
+
+    def __init__(self, games_df):
+        game_ids = np.asarray(games_df['GAME_ID'].to_numpy(), dtype=float)
+        game_ids, first = np.unique(game_ids.astype(np.int64), return_index=True)
+        opponents = np.asarray(games_df['OPPONENT'].to_numpy(), dtype=object)[first]
+        raw_dates = np.asarray(games_df['DATE'].to_numpy(), dtype=object)[first]
+        seasons = np.asarray(games_df['SEASON'].to_numpy(), dtype=float)[first]
+        if 'LOCATION' in games_df.columns:
+            locations = np.asarray(
+                games_df['LOCATION'].to_numpy(), dtype=object
+            )[first]
+        else:
+            locations = np.full(len(game_ids), None, dtype=object)
+        dates = pd.to_datetime(
+            pd.Series(raw_dates, dtype=object), format=DATE_FORMAT,
+            errors='coerce'
+        )
+
+        # Oldest first; games on the same day keep GAME_ID order
+        order = np.lexsort((game_ids, dates.to_numpy()))
+        self.game_ids = game_ids[order]
+        self.dates = dates.to_numpy()[order]
+        self.seasons = seasons[order].astype(np.int64)
+        self.opponents = opponents[order]
+        self.games = [
+            Game(
+                game_id=int(game_id),
+                opponent=opponent,
+                date=pd.Timestamp(date),
+                raw_date=raw_date,
+                season=int(season),
+                location=location,
+                label=f'{opponent} - {raw_date}',
+            )
+            for game_id, opponent, date, raw_date, season, location in zip(
+                self.game_ids, self.opponents, self.dates,
+                raw_dates[order], self.seasons, locations[order]
+            )
+        ]
+        self._positions = {
+            game.game_id: position for position, game in enumerate(self.games)
+        }
+        self._labels = {}
+        for game in self.games:
+            for separator in LABEL_SEPARATORS:
+                key = f'{game.opponent}{separator}{game.raw_date}'
+                self._labels.setdefault(key, game.game_id)
+
+    def __len__(self) -> int:
+        return len(self.games)
+
+    def __contains__(self, game_id) -> bool:
+        return int(game_id) in self._positions
+
+    def __getitem__(self, game_id) -> Game:
+        return self.games[self._positions[int(game_id)]]
+
+    def get(self, game_id, default=None) -> Game | None:
+        """
+        Game for a GAME_ID, or default when it is not indexed.
+        """
+        position = self._positions.get(int(game_id))
+        return default if position is None else self.games[position]
+
+    def by_label(self, label: str) -> Game | None:
+        """
+        Game for any label the SQL views build from OPPONENT and DATE.
+        """
+        game_id = self._labels.get(label)
+        return None if game_id is None else self[game_id]
+
+    def label(self, game_id) -> str:
+        """
+        'OPPONENT - DATE' for a GAME_ID; usable as a selectbox format_func.
+        """
+        return self[game_id].label
+
+    def game_ids_for(self, season=None, newest_first: bool = True) -> list:
+        """
+        GAME_IDs in date order, optionally for one season.
+
+        Args:
+            season (int | float | str): SEASON value as stored in GAMES.
+            newest_first (bool): Most recent game first.
+
+        Returns:
+            list: GAME_IDs as ints.
+        """
+        game_ids = self.game_ids
+        if season is not None:
+            game_ids = game_ids[self.seasons == int(float(season))]
+        if newest_first:
+            game_ids = game_ids[::-1]
+        return game_ids.tolist()
+
+    def labels(self, season=None, newest_first: bool = True) -> list:
+        """
+        'OPPONENT - DATE' labels in date order, optionally for one season.
+        """
+        return [
+            self.label(game_id)
+            for game_id in self.game_ids_for(
+                season=season, newest_first=newest_first
+            )
+        ]
+
+    def dates_for(self, game_ids) -> np.ndarray:
+        """
+        Parsed dates for many GAME_IDs at once, NaT where not indexed.
+        """
+        positions = np.array(
+            [self._positions.get(int(game_id), -1) for game_id in game_ids],
+            dtype=np.int64
+        )
+        dates = self.dates[np.maximum(positions, 0)]
+        dates[positions < 0] = np.datetime64('NaT')
+        return dates
+
+
+# A slot per page's frame, so switching pages doesn't evict each other
+GAME_INDEX_SLOTS = 8
+
+_game_indexes = {}
+
+
+def get_game_index(games_df) -> GameIndex:
+    """
+    GameIndex for a games DataFrame, built once per DataFrame object.
+
+    Only frames held by st.cache_resource come back as the same object
+    on every rerun. st.cache_data returns a fresh copy each call, so a
+    page reading its games through st.cache_data (or uncached) should
+    keep the index itself in st.cache_resource instead.
+    """
+    cached = _game_indexes.pop(id(games_df), None)
+    if cached is None or cached[0] is not games_df:
+        cached = (games_df, GameIndex(games_df))
+    # Most recently used last
+    _game_indexes[id(games_df)] = cached
+    while len(_game_indexes) > GAME_INDEX_SLOTS:
+        del _game_indexes[next(iter(_game_indexes))]
+    return cached[1]
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    from py import data_source, sql
+
+    parser = argparse.ArgumentParser(
+        description='Build the game index and time label lookups.'
+    )
+    parser.add_argument('connection', help='Database connection string.')
+    parser.add_argument('--repeat', type=int, default=10000)
+    args = parser.parse_args()
+
+    games = data_source.run_query(
+        sql=sql.get_games_sql(), connection=args.connection
+    )
+    start = time.perf_counter()
+    index = GameIndex(games)
+    build_ms = (time.perf_counter() - start) * 1000
+    labels = index.labels()
+    start = time.perf_counter()
+    for i in range(args.repeat):
+        index.by_label(labels[i % len(labels)])
+    lookup_us = (time.perf_counter() - start) / args.repeat * 1e6
+    print(f'{len(index)} games indexed in {build_ms:.2f} ms')
+    print(f'by_label: {lookup_us:.2f} us per lookup')
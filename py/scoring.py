@@ -0,0 +1,355 @@
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+import polars as pl
+
+from py import data_source, feature_store, model_service, sql
+
+
+DEBOUNCE = 2.0
+RETRY_BASE = 5.0
+RETRY_MAX = 300.0
+
+# Statements whose first parameter is the GAME_ID of a changed play
+PLAY_WRITES = (sql.insert_plays_sql(), sql.delete_shot())
+
+_scorers = {}
+_scorers_lock = threading.Lock()
+
+
+def _load_play_data(connection: str, since: int = None) -> pl.DataFrame:
+    if since is None:
+        return data_source.run_query(
+            sql=sql.get_play_by_play_sql(),
+            connection=connection,
+            output='polars',
+            dtypes=data_source.ID_DTYPES
+        )
+    return data_source.run_query(
+        sql=sql.get_play_by_play_sql(filter='PLAYS.GAME_ID >= ?'),
+        connection=connection,
+        params=[int(since)],
+        output='polars',
+        dtypes=data_source.ID_DTYPES
+    )
+
+
+def _load_features(connection: str, first_game: int = None) -> pl.DataFrame:
+    # Plays from the start of first_game's season are usually enough to
+    # update the store; otherwise it names the game to load from instead
+    since = None
+    if first_game is not None:
+        since = feature_store.history_start(first_game)
+    while True:
+        try:
+            return feature_store.load_features(
+                _load_play_data(connection, since), since=since
+            )
+        except feature_store.PartialHistory as exc:
+            since = exc.first_game
+
+
+def score_features(
+        features: pl.DataFrame,
+        service: model_service.ModelService
+    ) -> pl.DataFrame:
+    """
+    PROB and EXPECTED_POINTS for each play, ready to persist.
+
+    Args:
+        features (pl.DataFrame): feature_store rows to score.
+        service (ModelService): The model to score them with.
+
+    Returns:
+        pl.DataFrame: GAME_ID, PLAY_NUM, MODEL_VERSION, INPUT_HASH, PROB
+        and EXPECTED_POINTS, one row per play.
+    """
+    return features.select(
+        pl.col('GAME_ID'),
+        pl.col('PLAY_NUM'),
+        pl.lit(service.model_version).alias('MODEL_VERSION'),
+        service.input_hashes(features).cast(pl.Utf8).alias('INPUT_HASH'),
+        pl.Series('PROB', service.predict_proba(features)),
+    ).with_columns(
+        EXPECTED_POINTS=pl.col('PROB') * features['POINTS']
+    )
+
+
+def _stored_hashes(
+        connection: str,
+        first_game: int,
+        model_version: str
+    ) -> dict:
+    stored = data_source.run_query(
+        sql=sql.get_play_expected_points_hashes_sql(),
+        connection=connection,
+        params=(int(first_game), model_version)
+    )
+    games = {}
+    for game_id, play_num, input_hash in zip(
+            stored['GAME_ID'], stored['PLAY_NUM'], stored['INPUT_HASH']):
+        games.setdefault(int(game_id), {})[int(play_num)] = input_hash
+    return games
+
+
+def score_games(
+        connection: str,
+        game_ids=None,
+        service: model_service.ModelService = None
+    ) -> int:
+    """
+    Score plays with the current model and store them in
+    PLAY_EXPECTED_POINTS, replacing that model version's rows for each
+    game scored.
+
+    A play's model inputs carry the running score from the plays before
+    it, including the end of the previous game, so inputs are rebuilt
+    for every game from the earliest one given onward. Only games whose
+    input hashes differ from the stored ones are rescored and rewritten.
+
+    Args:
+        connection (str): The database connection string.
+        game_ids (iterable): Games whose plays changed. None rescores
+            every game.
+        service (ModelService): Defaults to the shared pipeline.pkl
+            service.
+
+    Returns:
+        int: Plays written.
+    """
+    service = service or model_service.get_model_service()
+    first_game = 0
+    if game_ids is None:
+        features = _load_features(connection)
+    else:
+        game_ids = [int(game_id) for game_id in game_ids]
+        if not game_ids:
+            return 0
+        first_game = min(game_ids)
+        features = _load_features(connection, first_game).filter(
+            pl.col('GAME_ID') >= first_game
+        )
+
+    # PLAY_NUM to INPUT_HASH per game; a repeated PLAY_NUM keeps its last
+    # row, as the upsert on (GAME_ID, PLAY_NUM, MODEL_VERSION) would
+    current = {}
+    for game_id, play_num, input_hash in zip(
+            features['GAME_ID'].to_list(), features['PLAY_NUM'].to_list(),
+            service.input_hashes(features).cast(pl.Utf8).to_list()):
+        current.setdefault(int(game_id), {})[int(play_num)] = input_hash
+    stored = _stored_hashes(connection, first_game, service.model_version)
+    # Games that gained, lost or changed plays, including games whose
+    # plays were all deleted
+    changed = sorted(
+        game_id for game_id in current.keys() | stored.keys()
+        if current.get(game_id) != stored.get(game_id)
+    )
+    if not changed:
+        return 0
+
+    scores = score_features(
+        features.filter(pl.col('GAME_ID').is_in(changed)), service
+    )
+    scored_at = datetime.now(timezone.utc).isoformat()
+    with data_source.transaction(connection) as cursor:
+        cursor.executemany(
+            sql.delete_play_expected_points_sql(),
+            [(game_id, service.model_version) for game_id in changed]
+        )
+        cursor.executemany(
+            sql.insert_play_expected_points_sql(),
+            [
+                (
+                    int(game_id), int(play_num), version, input_hash,
+                    float(prob), float(points), scored_at,
+                )
+                for game_id, play_num, version, input_hash, prob, points
+                in scores.iter_rows()
+            ]
+        )
+    return len(scores)
+
+
+def backfill(connection: str, prune: bool = False) -> int:
+    """
+    Rescore every play, e.g. after pipeline.pkl is retrained.
+
+    Args:
+        connection (str): The database connection string.
+        prune (bool): Also delete rows scored by other model versions.
+
+    Returns:
+        int: Plays written.
+    """
+    service = model_service.get_model_service()
+    written = score_games(connection, service=service)
+    if prune:
+        data_source.execute(
+            sql=sql.prune_play_expected_points_sql(),
+            connection=connection,
+            params=(service.model_version,)
+        )
+    return written
+
+
+def attach_scores(
+        features: pl.DataFrame,
+        connection: str,
+        service: model_service.ModelService = None
+    ) -> pl.DataFrame:
+    """
+    Add PROB to feature rows, preferring stored scores.
+
+    Stored rows are used when they were scored by the current model
+    from the same inputs; anything else (new plays the scorer hasn't
+    reached yet, a database without the table) is scored live.
+
+    Args:
+        features (pl.DataFrame): feature_store rows, typically one game.
+        connection (str): Database holding PLAY_EXPECTED_POINTS.
+        service (ModelService): Defaults to the shared pipeline.pkl
+            service.
+
+    Returns:
+        pl.DataFrame: features with a PROB column, in the same order.
+    """
+    service = service or model_service.get_model_service()
+    hashes = service.input_hashes(features).cast(pl.Utf8)
+    stored = []
+    for game_id in features['GAME_ID'].unique().to_list():
+        try:
+            stored.append(
+                data_source.run_query(
+                    sql=sql.get_play_expected_points_sql(),
+                    connection=connection,
+                    params=(int(game_id), service.model_version)
+                )
+            )
+        except Exception as exc:
+            # A database without the table is scored live; anything
+            # else (network, auth) is a real failure
+            if not data_source.is_missing_table(exc):
+                raise
+            break
+    lookup = {
+        (int(game_id), int(play_num), input_hash): prob
+        for frame in stored
+        for game_id, play_num, input_hash, prob in zip(
+            frame['GAME_ID'], frame['PLAY_NUM'],
+            frame['INPUT_HASH'], frame['PROB']
+        )
+    }
+    probs = np.array([
+        lookup.get((int(game_id), int(play_num), input_hash), np.nan)
+        for game_id, play_num, input_hash in zip(
+            features['GAME_ID'], features['PLAY_NUM'], hashes
+        )
+    ], dtype=float)
+    missing = np.isnan(probs)
+    if missing.any():
+        probs[missing] = service.predict_proba(
+            features.filter(pl.Series(missing))
+        )
+    return features.with_columns(PROB=pl.Series(probs))
+
+
+class IngestScorer:
+    """
+    Write-queue listener that scores plays once their inserts and
+    deletes reach the database.
+
+    Changed games are collected from each committed batch and scored on
+    a background thread after a short quiet period, so a burst of shots
+    entered during a game costs one rescore rather than one per shot.
+    Games whose scoring failed stay dirty and are retried with
+    exponential backoff.
+
+    Args:
+        connection (str): Connection string the plays were written to.
+        debounce (float): Seconds to wait for more changes before scoring.
+    """
+
+    def __init__(self, connection: str, debounce: float = DEBOUNCE):
+        self.connection = connection
+        self.debounce = debounce
+        self.last_error = None
+        self._dirty = set()
+        self._failures = 0
+        self._retry_in = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name='ingest-scorer', daemon=True
+        )
+        self._thread.start()
+
+    def __call__(self, statements):
+        games = {
+            params[0] for statement, params in statements
+            if statement in PLAY_WRITES
+        }
+        if games:
+            with self._lock:
+                self._dirty |= games
+            self._wake.set()
+
+    def _run(self):
+        while True:
+            # Woken by a change, or by the retry timer after a failure
+            self._wake.wait(timeout=self._retry_in)
+            # Let the rest of a burst of writes land first
+            while self._wake.wait(timeout=self.debounce):
+                self._wake.clear()
+            with self._lock:
+                games, self._dirty = self._dirty, set()
+            if not games:
+                continue
+            try:
+                score_games(self.connection, game_ids=games)
+                self.last_error = None
+                self._failures = 0
+                self._retry_in = None
+            except Exception as exc:
+                self.last_error = str(exc)
+                self._failures += 1
+                self._retry_in = min(
+                    RETRY_MAX, RETRY_BASE * 2 ** (self._failures - 1)
+                )
+                with self._lock:
+                    self._dirty |= games
+
+
+def get_ingest_scorer(connection: str) -> IngestScorer:
+    """
+    Return the process-wide ingest scorer for a connection string,
+    creating it on first use. Pass it to WriteBehindQueue.add_listener.
+
+    Args:
+        connection (str): The database connection string.
+
+    Returns:
+        IngestScorer: The shared scorer.
+    """
+    with _scorers_lock:
+        scorer = _scorers.get(connection)
+        if scorer is None:
+            scorer = IngestScorer(connection)
+            _scorers[connection] = scorer
+        return scorer
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Rescore every play into PLAY_EXPECTED_POINTS.'
+    )
+    parser.add_argument('connection', help='Database connection string')
+    parser.add_argument(
+        '--prune', action='store_true',
+        help='Delete scores from other model versions afterwards'
+    )
+    args = parser.parse_args()
+    written = backfill(args.connection, prune=args.prune)
+    print(f'scored {written} plays')
@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+
+
+# Gradable shot spots; the row order of GRADE_TABLE
+SPOTS = (
+    'RB2', 'LB2', 'ML2', 'FT2', 'LE2', 'RE2', 'LMR2', 'RMR2',
+    'LC3', 'LW3', 'TK3', 'RW3', 'RC3',
+)
+# Column order of GRADE_TABLE. Codes match feature_store's
+# SHOT_DEFENSE_CODED, and the PLAYS spellings share their codes.
+DEFENSES = ('OPEN', 'GUARDED', 'HEAVILY_GUARDED')
+DEFENSE_LABELS = ('Open', 'Guarded', 'Heavily Guarded')
+GRADES = ('A', 'B', 'C', 'D', 'F')
+GRADE_POINTS = np.array([4, 3, 2, 1, 0], dtype=np.int8)
+UNGRADED = -1
+
+_A, _B, _C, _D, _F = range(len(GRADES))
+# Grade index for each (spot, defense)
+GRADE_TABLE = np.array([
+    [_A, _B, _C],  # RB2
+    [_A, _B, _C],  # LB2
+    [_A, _B, _C],  # ML2
+    [_C, _D, _F],  # FT2
+    [_C, _D, _F],  # LE2
+    [_C, _D, _F],  # RE2
+    [_C, _D, _F],  # LMR2
+    [_C, _D, _F],  # RMR2
+    [_A, _C, _F],  # LC3
+    [_A, _C, _F],  # LW3
+    [_A, _C, _F],  # TK3
+    [_A, _C, _F],  # RW3
+    [_A, _C, _F],  # RC3
+], dtype=np.int8)
+
+# One extra row and column of UNGRADED, so the -1 code for an unknown
+# spot or defense indexes straight into it
+_LOOKUP = np.full(
+    (len(SPOTS) + 1, len(DEFENSES) + 1), UNGRADED, dtype=np.int8
+)
+_LOOKUP[:-1, :-1] = GRADE_TABLE
+
+
+def encode_spots(spots) -> np.ndarray:
+    """
+    Small-int codes for shot spots.
+
+    Args:
+        spots (array-like): SHOT_SPOT values.
+
+    Returns:
+        np.ndarray: Index into SPOTS per shot, -1 for spots that are not
+            graded (free throws, missing values).
+    """
+    return pd.Categorical(np.asarray(spots, dtype=object), categories=SPOTS).codes
+
+
+def encode_defenses(defenses) -> np.ndarray:
+    """
+    Small-int codes for shot defense.
+
+    Args:
+        defenses (array-like): SHOT_DEFENSE values, in either the
+            normalized ('HEAVILY_GUARDED') or PLAYS ('Heavily Guarded')
+            spelling.
+
+    Returns:
+        np.ndarray: Index into DEFENSES per shot, -1 when unknown.
+    """
+    codes = pd.Categorical(
+        np.asarray(defenses, dtype=object),
+        categories=DEFENSES + DEFENSE_LABELS
+    ).codes
+    return np.where(codes < 0, codes, codes % len(DEFENSES)).astype(np.int8)
+
+
+def normalize_defenses(defenses) -> np.ndarray:
+    """
+    SHOT_DEFENSE in the normalized spelling; unknown values are kept.
+    """
+    defenses = np.asarray(defenses, dtype=object)
+    codes = encode_defenses(defenses)
+    return np.where(
+        codes < 0, defenses, np.asarray(DEFENSES, dtype=object)[codes]
+    )
+
+
+def grade_codes(spot_codes: np.ndarray, defense_codes: np.ndarray) -> np.ndarray:
+    """
+    Grade index into GRADES for encoded shots, UNGRADED where the spot
+    or defense code is -1.
+    """
+    return _LOOKUP[spot_codes, defense_codes]
+
+
+def grade_shots(
+        pbp: pd.DataFrame,
+        spot_column: str = 'SHOT_SPOT',
+        defense_column: str = 'SHOT_DEFENSE'
+    ) -> pd.DataFrame:
+    """
+    Grade every shot in a play-by-play frame at once.
+
+    Args:
+        pbp (pd.DataFrame): Plays with spot and defense columns, e.g. from
+            get_play_by_play_sql or team_shot_chart_plays_sql.
+        spot_column (str): Column holding the shot spot.
+        defense_column (str): Column holding the shot defense.
+
+    Returns:
+        pd.DataFrame: The gradable shots with SCORE (letter grade) and
+            GPA (4 for an A down to 0 for an F) added.
+    """
+    codes = grade_codes(
+        encode_spots(pbp[spot_column]), encode_defenses(pbp[defense_column])
+    )
+    graded = codes != UNGRADED
+    pbp = pbp[graded].copy()
+    codes = codes[graded]
+    pbp['SCORE'] = np.asarray(GRADES, dtype=object)[codes]
+    pbp['GPA'] = GRADE_POINTS[codes]
+    return pbp
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(
+        description='Micro-benchmark for vectorized shot grading.'
+    )
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    shots = pd.DataFrame({
+        'SHOT_SPOT': rng.choice(SPOTS + ('FREE_THROW1',), args.rows),
+        'SHOT_DEFENSE': rng.choice(DEFENSES, args.rows),
+    })
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        grade_shots(shots)
+    ms = (time.perf_counter() - start) / args.repeat * 1000
+    print(f'grade_shots: {ms:.2f} ms per call ({args.rows} rows)')
@@ -0,0 +1,189 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from statistics import NormalDist
+
+import numpy as np
+import polars as pl
+
+
+CHUNK_SIZE = 2000
+BATCH_SIZE = 10000
+
+
+def _team_arrays(shots: pl.DataFrame) -> tuple:
+    probs = shots['PROB'].to_numpy().astype(float)
+    # Expected points per shot at 100%: POINTS x ATTEMPT
+    weights = (
+        shots['POINTS'].to_numpy().astype(float)
+        * shots['ATTEMPT'].to_numpy().astype(float)
+    )
+    return probs, weights
+
+
+def _simulate_team(
+        probs: np.ndarray,
+        weights: np.ndarray,
+        sims: int,
+        standard_dev: float,
+        rng: np.random.Generator,
+    ) -> np.ndarray:
+    if len(probs) == 0:
+        return np.zeros(sims)
+    simulated = rng.normal(
+        loc=probs, scale=standard_dev, size=(sims, len(probs))
+    )
+    np.clip(simulated, 0, 1, out=simulated)
+    simulated *= weights
+    np.maximum(simulated, 0, out=simulated)
+    return simulated.sum(axis=1)
+
+
+def _simulate_batch(
+        nda: tuple,
+        opp: tuple,
+        sims: int,
+        standard_dev: float,
+        seed: np.random.SeedSequence,
+        chunk_size: int,
+        on_chunk=None,
+    ) -> tuple:
+    nda_rng, opp_rng = [np.random.default_rng(child) for child in seed.spawn(2)]
+    nda_points = np.empty(sims)
+    opp_points = np.empty(sims)
+    for start in range(0, sims, chunk_size):
+        stop = min(start + chunk_size, sims)
+        nda_points[start:stop] = _simulate_team(
+            *nda, stop - start, standard_dev, nda_rng
+        )
+        opp_points[start:stop] = _simulate_team(
+            *opp, stop - start, standard_dev, opp_rng
+        )
+        if on_chunk is not None:
+            on_chunk(stop / sims)
+    return nda_points, opp_points
+
+
+def run_simulations(
+        tritons: pl.DataFrame,
+        opp: pl.DataFrame,
+        sims: int,
+        standard_dev: float,
+        seed=None,
+        chunk_size: int = CHUNK_SIZE,
+        on_chunk=None,
+        workers: int | None = None,
+        batch_size: int = BATCH_SIZE,
+    ) -> pl.DataFrame:
+    """
+    Monte Carlo game outcomes from per-shot make probabilities.
+
+    Each simulation draws every shot's make probability from
+    N(PROB, standard_dev), clips it to [0, 1], scores it as
+    POINTS * ATTEMPT * probability (floored at 0) and sums per team.
+    Simulations are drawn as (chunk_size x n_shots) matrices so memory
+    stays bounded however many are requested.
+
+    Simulations are always cut into batch_size batches, each seeded from
+    its own SeedSequence.spawn child. With workers > 1 the batches run
+    across a spawn-started process pool (the Streamlit server is
+    threaded, so forking is unsafe) that is shut down before returning;
+    otherwise they run in-process. Batches are reassembled in order, so a
+    seeded run is bit-identical for any worker count.
+
+    Args:
+        tritons (pl.DataFrame): Our shots with PROB, POINTS and ATTEMPT.
+        opp (pl.DataFrame): Opponent shots with the same columns.
+        sims (int): Number of simulations to run.
+        standard_dev (float): Standard deviation for the normal draws.
+        seed (int | np.random.SeedSequence): Seed for reproducible runs.
+            Each team gets its own child stream, so results don't depend
+            on chunk_size.
+        chunk_size (int): Simulations drawn per matrix.
+        on_chunk (callable): Called with the fraction complete after each
+            chunk (or batch, in parallel mode), e.g. to move a progress bar.
+        workers (int): Processes to spread batches over; None or 1 runs
+            in-process. 0 uses every core.
+        batch_size (int): Simulations per seeded batch.
+
+    Returns:
+        pl.DataFrame: RUN, NDA_SIMULATED_POINTS, OPP_SIMULATED_POINTS and
+        WIN (1 when we outscore the opponent), one row per simulation.
+    """
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    nda = _team_arrays(tritons)
+    opp = _team_arrays(opp)
+
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    sizes = [
+        min(batch_size, sims - start) for start in range(0, sims, batch_size)
+    ]
+    children = seed.spawn(len(sizes))
+    results = [None] * len(sizes)
+    if workers is None or workers <= 1:
+        done = 0
+        for i, (size, child) in enumerate(zip(sizes, children)):
+            progress = None
+            if on_chunk is not None:
+                progress = lambda fraction, done=done, size=size: on_chunk(
+                    (done + fraction * size) / sims
+                )
+            results[i] = _simulate_batch(
+                nda, opp, size, standard_dev, child, chunk_size, progress
+            )
+            done += size
+    else:
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(
+                max_workers=workers, mp_context=context) as executor:
+            futures = {
+                executor.submit(
+                    _simulate_batch,
+                    nda, opp, size, standard_dev, child, chunk_size
+                ): i
+                for i, (size, child) in enumerate(zip(sizes, children))
+            }
+            done = 0
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+                done += sizes[futures[future]]
+                if on_chunk is not None:
+                    on_chunk(done / sims)
+    if results:
+        nda_points = np.concatenate([result[0] for result in results])
+        opp_points = np.concatenate([result[1] for result in results])
+    else:
+        nda_points = opp_points = np.empty(0)
+
+    return pl.DataFrame({
+        'RUN': np.arange(sims, dtype=np.int32),
+        'NDA_SIMULATED_POINTS': nda_points,
+        'OPP_SIMULATED_POINTS': opp_points,
+        'WIN': (nda_points > opp_points).astype(np.int32),
+    })
+
+
+def win_probability(all_sims: pl.DataFrame, confidence: float = 0.95) -> tuple:
+    """
+    Share of simulations won, with a Wilson score interval.
+
+    Args:
+        all_sims (pl.DataFrame): Output of run_simulations.
+        confidence (float): Two-sided confidence level.
+
+    Returns:
+        tuple: (win probability, lower bound, upper bound).
+    """
+    n = len(all_sims)
+    if n == 0:
+        return 0.0, 0.0, 1.0
+    p = float(all_sims['WIN'].mean())
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    denominator = 1 + z ** 2 / n
+    center = (p + z ** 2 / (2 * n)) / denominator
+    margin = (
+        z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / denominator
+    )
+    return p, max(0.0, center - margin), min(1.0, center + margin)
@@ -28,26 +28,6 @@ def get_games_sql():
     """
     return sql
 
-def insert_game_summary_sql():
-    sql = """
-    INSERT INTO GAME_SUMMARY (PLAYER_ID,
-                              GAME_ID,
-                              TWO_FGM,
-                              TWO_FGA,
-                              THREE_FGM,
-                              THREE_FGA,
-                              FTM,
-                              FTA,
-                              OFFENSIVE_REBOUNDS,
-                              DEFENSIVE_REBOUNDS,
-                              ASSISTS,
-                              STEALS,
-                              BLOCKS,
-                              TURNOVER,
-                              FOULS)
-    VALUES (?,? ,?,?,?,?,?,?,?,?,?,?,?,?,?)
-    """
-    return sql
 def get_shot_spots_sql():
     sql = """
     SELECT SPOT,
@@ -74,24 +54,94 @@ def insert_minutes_sql():
     """
     return sql
 
-def update_game_summary_sql():
+def upsert_game_summary_sql():
     sql = """
-    UPDATE GAME_SUMMARY
-       SET TWO_FGM = ?,
-           TWO_FGA = ?,
-           THREE_FGM = ?,
-           THREE_FGA = ?,
-           FTM = ?,
-           FTA = ?,
-           OFFENSIVE_REBOUNDS = ?,
-           DEFENSIVE_REBOUNDS = ?,
-           ASSISTS = ?,
-           STEALS = ?,
-           BLOCKS = ?,
-           TURNOVER = ?,
-           FOULS = ?
-        WHERE PLAYER_ID = ?
-            AND GAME_ID = ?
+    INSERT INTO GAME_SUMMARY (PLAYER_ID,
+                              GAME_ID,
+                              TWO_FGM,
+                              TWO_FGA,
+                              THREE_FGM,
+                              THREE_FGA,
+                              FTM,
+                              FTA,
+                              OFFENSIVE_REBOUNDS,
+                              DEFENSIVE_REBOUNDS,
+                              ASSISTS,
+                              STEALS,
+                              BLOCKS,
+                              TURNOVER,
+                              FOULS)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (PLAYER_ID, GAME_ID) DO UPDATE
+       SET
+           TWO_FGM = excluded.TWO_FGM,
+           TWO_FGA = excluded.TWO_FGA,
+           THREE_FGM = excluded.THREE_FGM,
+           THREE_FGA = excluded.THREE_FGA,
+           FTM = excluded.FTM,
+           FTA = excluded.FTA,
+           OFFENSIVE_REBOUNDS = excluded.OFFENSIVE_REBOUNDS,
+           DEFENSIVE_REBOUNDS = excluded.DEFENSIVE_REBOUNDS,
+           ASSISTS = excluded.ASSISTS,
+           STEALS = excluded.STEALS,
+           BLOCKS = excluded.BLOCKS,
+           TURNOVER = excluded.TURNOVER,
+           FOULS = excluded.FOULS
+    """
+    return sql
+
+def upsert_game_summary_from_plays_sql():
+    # No GROUP BY: the aggregate always yields exactly one row, so a
+    # player with every stat deleted is written back as zeros.
+    sql = """
+    INSERT INTO GAME_SUMMARY (PLAYER_ID,
+                              GAME_ID,
+                              TWO_FGM,
+                              TWO_FGA,
+                              THREE_FGM,
+                              THREE_FGA,
+                              FTM,
+                              FTA,
+                              OFFENSIVE_REBOUNDS,
+                              DEFENSIVE_REBOUNDS,
+                              ASSISTS,
+                              STEALS,
+                              BLOCKS,
+                              TURNOVER,
+                              FOULS)
+    SELECT ?,
+           ?,
+           COALESCE(SUM(CASE WHEN STAT = 'TWO_FGM' THEN 1 ELSE 0 END), 0),
+           COALESCE(SUM(CASE WHEN STAT = 'TWO_FGA' THEN 1 ELSE 0 END), 0),
+           COALESCE(SUM(CASE WHEN STAT = 'THREE_FGM' THEN 1 ELSE 0 END), 0),
+           COALESCE(SUM(CASE WHEN STAT = 'THREE_FGA' THEN 1 ELSE 0 END), 0),
+           COALESCE(SUM(CASE WHEN STAT = 'FTM' THEN 1 ELSE 0 END), 0),
+           COALESCE(SUM(CASE WHEN STAT = 'FTA' THEN 1 ELSE 0 END), 0),
+           COALESCE(SUM(CASE WHEN STAT = 'OFFENSIVE_REBOUNDS' THEN 1 ELSE 0 END), 0),
+           COALESCE(SUM(CASE WHEN STAT = 'DEFENSIVE_REBOUNDS' THEN 1 ELSE 0 END), 0),
+           COALESCE(SUM(CASE WHEN STAT = 'ASSISTS' THEN 1 ELSE 0 END), 0),
+           COALESCE(SUM(CASE WHEN STAT = 'STEALS' THEN 1 ELSE 0 END), 0),
+           COALESCE(SUM(CASE WHEN STAT = 'BLOCKS' THEN 1 ELSE 0 END), 0),
+           COALESCE(SUM(CASE WHEN STAT = 'TURNOVER' THEN 1 ELSE 0 END), 0),
+           COALESCE(SUM(CASE WHEN STAT = 'FOULS' THEN 1 ELSE 0 END), 0)
+      FROM GAME_STATS_PLAYS
+     WHERE GAME_ID = ?
+       AND PLAYER_ID = ?
+    ON CONFLICT (PLAYER_ID, GAME_ID) DO UPDATE
+       SET
+           TWO_FGM = excluded.TWO_FGM,
+           TWO_FGA = excluded.TWO_FGA,
+           THREE_FGM = excluded.THREE_FGM,
+           THREE_FGA = excluded.THREE_FGA,
+           FTM = excluded.FTM,
+           FTA = excluded.FTA,
+           OFFENSIVE_REBOUNDS = excluded.OFFENSIVE_REBOUNDS,
+           DEFENSIVE_REBOUNDS = excluded.DEFENSIVE_REBOUNDS,
+           ASSISTS = excluded.ASSISTS,
+           STEALS = excluded.STEALS,
+           BLOCKS = excluded.BLOCKS,
+           TURNOVER = excluded.TURNOVER,
+           FOULS = excluded.FOULS
     """
     return sql
 
@@ -143,7 +193,7 @@ SELECT SPOTS.SPOT,
   INNER JOIN PLAYERS
   ON PLAYERS.NUMBER = PLAYS.PLAYER_ID
   AND GAMES.SEASON = PLAYERS.YEAR
-  WHERE GAMES.OPPONENT || ' - ' || GAMES.DATE = '?'
+  WHERE PLAYS.GAME_ID = ?
   """
     return sql
 
@@ -170,30 +220,6 @@ def insert_plays_sql():
     """
     return sql
 
-def get_formatted_game_sql():
-    sql = """
-    SELECT GAME_ID,
-                    PLAYER_ID,
-                    SUM(CASE WHEN STAT = 'TWO_FGM' THEN 1 ELSE 0 END) AS TWO_FGM,
-      SUM(CASE WHEN STAT = 'TWO_FGA' THEN 1 ELSE 0 END) AS TWO_FGA,
-      SUM(CASE WHEN STAT = 'THREE_FGM' THEN 1 ELSE 0 END) AS THREE_FGM,
-      SUM(CASE WHEN STAT = 'THREE_FGA' THEN 1 ELSE 0 END) AS THREE_FGA,
-    SUM(CASE WHEN STAT = 'FTM' THEN 1 ELSE 0 END) AS FTM,
-      SUM(CASE WHEN STAT = 'FTA' THEN 1 ELSE 0 END) AS FTA,
-      SUM(CASE WHEN STAT = 'OFFENSIVE_REBOUNDS' THEN 1 ELSE 0 END) AS OFFENSIVE_REBOUNDS,
-      SUM(CASE WHEN STAT = 'DEFENSIVE_REBOUNDS' THEN 1 ELSE 0 END) AS DEFENSIVE_REBOUNDS,
-      SUM(CASE WHEN STAT = 'ASSISTS' THEN 1 ELSE 0 END) AS ASSISTS,
-      SUM(CASE WHEN STAT = 'STEALS' THEN 1 ELSE 0 END) AS STEALS,
-      SUM(CASE WHEN STAT = 'BLOCKS' THEN 1 ELSE 0 END) AS BLOCKS,
-      SUM(CASE WHEN STAT = 'TURNOVER' THEN 1 ELSE 0 END) AS TURNOVER,
-      SUM(CASE WHEN STAT = 'FOULS' THEN 1 ELSE 0 END) AS FOULS
-      FROM GAME_STATS_PLAYS
-      WHERE GAME_ID = this_game_id
-      AND PLAYER_ID = this_player_id
-    GROUP BY GAME_ID, PLAYER_ID
-    """
-    return sql
-
 def select_quick_game_info(game_id):
     sql = f"""
     SELECT *
@@ -289,7 +315,7 @@ def get_this_game():
     """
     return sql
 
-def get_game_summary_sql():
+def get_game_summary_source_sql():
     sql = """
           WITH AVG_MINUTES AS (
               SELECT MINUTES_PLAYED.PLAYER_ID,
@@ -364,10 +390,77 @@ def get_game_summary_sql():
     """
     return sql
 
-def team_shot_chart_sql():
+def create_game_summary_materialized_sql():
     sql = """
-    WITH RAW_DATA AS (
-    SELECT PLAYS.GAME_ID,
+    CREATE TABLE IF NOT EXISTS GAME_SUMMARY_MATERIALIZED (
+        PLAYER_ID BIGINT,
+        GAME_ID BIGINT,
+        TWO_FGM DOUBLE,
+        TWO_FGA DOUBLE,
+        THREE_FGM DOUBLE,
+        THREE_FGA DOUBLE,
+        FTM DOUBLE,
+        FTA DOUBLE,
+        OFFENSIVE_REBOUNDS DOUBLE,
+        DEFENSIVE_REBOUNDS DOUBLE,
+        ASSISTS DOUBLE,
+        STEALS DOUBLE,
+        BLOCKS DOUBLE,
+        TURNOVER DOUBLE,
+        FOULS DOUBLE,
+        FGA DOUBLE,
+        FGM DOUBLE,
+        POINTS DOUBLE,
+        GAME_SCORE DOUBLE,
+        OPPONENT TEXT,
+        LOCATION TEXT,
+        DATE TEXT,
+        SEASON DOUBLE,
+        LABEL TEXT,
+        NUMBER BIGINT,
+        FIRST_NAME TEXT,
+        LAST_NAME TEXT,
+        YEAR BIGINT,
+        NAME TEXT,
+        MINUTES_PLAYED DOUBLE
+    )
+    """
+    return sql
+
+def delete_game_summary_materialized_sql(filter='1 = 1'):
+    sql = f"""
+    DELETE FROM GAME_SUMMARY_MATERIALIZED
+     WHERE {filter}
+    """
+    return sql
+
+def insert_game_summary_materialized_sql(filter='1 = 1'):
+    sql = f"""
+    INSERT INTO GAME_SUMMARY_MATERIALIZED
+    SELECT *
+      FROM ({get_game_summary_source_sql()}) AS SOURCE
+     WHERE {filter}
+    """
+    return sql
+
+def get_game_summary_sql():
+    sql = """
+    SELECT *
+      FROM GAME_SUMMARY_MATERIALIZED
+    """
+    return sql
+
+def get_game_summary_game_sql():
+    sql = """
+    SELECT *
+      FROM GAME_SUMMARY_MATERIALIZED
+     WHERE GAME_ID = ?
+    """
+    return sql
+
+def team_shot_chart_plays_sql():
+    sql = """
+SELECT PLAYS.GAME_ID,
                 PLAYS.PLAYER_ID,
                 PLAYS.SHOT_SPOT,
                 CASE
@@ -390,191 +483,39 @@ def team_shot_chart_sql():
                 GAMES.LOCATION,
                 GAMES.DATE,
                 GAMES.SEASON,
-                GAMES.OPPONENT || ' ' || GAMES.DATE AS GAME,
                 GAMES.OPPONENT || ' -  ' || GAMES.DATE AS U_ID,
+                GAMES.OPPONENT
+                || ' - '
+                || GAMES.DATE AS LABEL,
                 CASE
-                        WHEN PLAYS.MAKE_MISS = 'Y'
-                            THEN 1
-                        ELSE 0
-                END AS MAKE,
-                CASE
-                        WHEN PLAYS.SHOT_DEFENSE = 'HEAVILY_GUARDED'
-                            THEN 1
-                        ELSE 0
-                END AS HEAVILY_GUARDED,
-                1 AS ATTEMPT
-    FROM PLAYS
-    INNER JOIN SPOTS
-    ON PLAYS.SHOT_SPOT = SPOTS.SPOT
-    INNER JOIN GAMES
-        ON GAMES.GAME_ID = PLAYS.GAME_ID
-    WHERE PLAYS.PLAYER_ID != '0'),
-
-    SUMMED_TABLE AS (
-    SELECT U_ID,
-                    XSPOT,
-                    YSPOT,
-                    SHOT_SPOT,
-                    POINTS,
-                    OPPONENT,
-                    LOCATION,
-                    DATE,
-                    SEASON,
-                    GAME_ID,
-                    PAINT_TOUCH,
-                    SUM(MAKE) AS MAKES,
-                    SUM(HEAVILY_GUARDED) HEAVILY_GUARDED,
-                    SUM(ATTEMPT) AS ATTEMPTS
-        FROM RAW_DATA
-        GROUP BY U_ID,
-                    XSPOT,
-                    YSPOT,
-                    SHOT_SPOT,
-                    POINTS,
-                    OPPONENT,
-                    LOCATION,
-                    DATE,
-                    SEASON,
-                    GAME_ID,
-                    PAINT_TOUCH)
-
-    SELECT U_ID,
-                    XSPOT,
-                    YSPOT,
-                    SHOT_SPOT,
-                    POINTS,
-                    OPPONENT,
-                    GAME_ID,
-                    LOCATION,
-                    DATE,
-                    SEASON,
-                    MAKES,
-                    HEAVILY_GUARDED,
-                    ATTEMPTS,
-                    PAINT_TOUCH,
-                    CASE
-                            WHEN ATTEMPTS = 0
-                                THEN 0
-                        ELSE CAST(MAKES AS FLOAT) / CAST(ATTEMPTS AS FLOAT)
-                    END AS MAKE_PERCENT,
-                    CASE
-                            WHEN ATTEMPTS = 0
-                                THEN 0
-                        ELSE CAST(HEAVILY_GUARDED AS FLOAT) / CAST(ATTEMPTS AS FLOAT)
-                    END  HG_PERCENT,
-                    CASE
-                            WHEN ATTEMPTS = 0
-                                THEN 0
-                        ELSE CAST(POINTS * MAKES AS FLOAT) / CAST(ATTEMPTS AS FLOAT)
-                    END  AS POINTS_PER_ATTEMPT
-    FROM SUMMED_TABLE
-    """
-    return sql
-
-def opp_shot_chart_sql():
-    sql = """
-    WITH RAW_DATA AS (
-    SELECT PLAYS.GAME_ID,
-                PLAYS.PLAYER_ID,
-                PLAYS.SHOT_SPOT,
+                  WHEN PLAYS.PLAYER_ID = '0'
+                    THEN 'OPP'
+                  ELSE 'NDA'
+                END AS TEAM,
                 CASE
-                  WHEN PLAYS.SHOT_DEFENSE = 'Open'
-                    THEN 'OPEN'
-                  WHEN PLAYS.SHOT_DEFENSE = 'Guarded'
-                    THEN 'GUARDED'
-                  WHEN PLAYS.SHOT_DEFENSE = 'Heavily Guarded'
-                    THEN 'HEAVILY_GUARDED'
-                  ELSE PLAYS.SHOT_DEFENSE
-                END AS SHOT_DEFENSE,
-                PLAYS.MAKE_MISS,
-                PLAYS.PLAY_NUM,
-                COALESCE(PLAYS.PAINT_TOUCH, 'N') AS PAINT_TOUCH,
-                COALESCE(PLAYS.SPOT_X, SPOTS.XSPOT) AS XSPOT,
-                COALESCE(PLAYS.SPOT_Y, SPOTS.YSPOT) AS YSPOT,
-                SPOTS.OPP_EXPECTED,
-                SPOTS.POINTS,
-                GAMES.OPPONENT,
-                GAMES.LOCATION,
-                GAMES.DATE,
-                GAMES.SEASON,
-                GAMES.OPPONENT || ' ' || GAMES.DATE AS GAME,
-                GAMES.OPPONENT || ' -  ' || GAMES.DATE AS U_ID,
+                  WHEN EXISTS (SELECT 1
+                                 FROM PLAYERS
+                                WHERE PLAYERS.NUMBER = PLAYS.PLAYER_ID
+                                  AND PLAYERS.YEAR = GAMES.SEASON)
+                    THEN 1
+                  ELSE 0
+                END AS ON_ROSTER,
                 CASE
-                        WHEN PLAYS.MAKE_MISS = 'Y'
-                            THEN 1
-                        ELSE 0
+                  WHEN PLAYS.MAKE_MISS = 'Y'
+                    THEN 1
+                  ELSE 0
                 END AS MAKE,
                 CASE
-                        WHEN PLAYS.SHOT_DEFENSE = 'HEAVILY_GUARDED'
-                            THEN 1
-                        ELSE 0
+                  WHEN PLAYS.SHOT_DEFENSE = 'HEAVILY_GUARDED'
+                    THEN 1
+                  ELSE 0
                 END AS HEAVILY_GUARDED,
                 1 AS ATTEMPT
-    FROM PLAYS
-    INNER JOIN SPOTS
-    ON PLAYS.SHOT_SPOT = SPOTS.SPOT
-    INNER JOIN GAMES
-        ON GAMES.GAME_ID = PLAYS.GAME_ID
-    WHERE PLAYS.PLAYER_ID = '0'),
-
-    SUMMED_TABLE AS (
-    SELECT U_ID,
-                    XSPOT,
-                    YSPOT,
-                    SHOT_SPOT,
-                    POINTS,
-                    OPPONENT,
-                    LOCATION,
-                    DATE,
-                    SEASON,
-                    GAME_ID,
-                    PAINT_TOUCH,
-                    SUM(MAKE) AS MAKES,
-                    SUM(HEAVILY_GUARDED) HEAVILY_GUARDED,
-                    SUM(ATTEMPT) AS ATTEMPTS
-        FROM RAW_DATA
-        GROUP BY U_ID,
-                    XSPOT,
-                    YSPOT,
-                    SHOT_SPOT,
-                    POINTS,
-                    OPPONENT,
-                    LOCATION,
-                    DATE,
-                    SEASON,
-                    GAME_ID,
-                    PAINT_TOUCH)
-
-    SELECT U_ID,
-                    XSPOT,
-                    YSPOT,
-                    SHOT_SPOT,
-                    POINTS,
-                    OPPONENT,
-                    GAME_ID,
-                    LOCATION,
-                    DATE,
-                    SEASON,
-                    MAKES,
-                    HEAVILY_GUARDED,
-                    ATTEMPTS,
-                    PAINT_TOUCH,
-                    CASE
-                            WHEN ATTEMPTS = 0
-                                THEN 0
-                        ELSE CAST(MAKES AS FLOAT) / CAST(ATTEMPTS AS FLOAT)
-                    END AS MAKE_PERCENT,
-                    CASE
-                            WHEN ATTEMPTS = 0
-                                THEN 0
-                        ELSE CAST(HEAVILY_GUARDED AS FLOAT) / CAST(ATTEMPTS AS FLOAT)
-                    END  HG_PERCENT,
-                    CASE
-                            WHEN ATTEMPTS = 0
-                                THEN 0
-                        ELSE CAST(POINTS * MAKES AS FLOAT) / CAST(ATTEMPTS AS FLOAT)
-                    END  AS POINTS_PER_ATTEMPT
-    FROM SUMMED_TABLE
+FROM PLAYS
+INNER JOIN SPOTS
+  ON PLAYS.SHOT_SPOT = SPOTS.SPOT
+INNER JOIN GAMES
+  ON GAMES.GAME_ID = PLAYS.GAME_ID
     """
     return sql
 
@@ -773,8 +714,45 @@ SELECT NAME,
     return sql
 
 
-def get_play_by_play_sql():
+def shot_locations_sql():
     sql = """
+SELECT PLAYS.GAME_ID,
+                PLAYS.PLAYER_ID,
+                PLAYS.SHOT_SPOT,
+                COALESCE(PLAYS.SPOT_X, SPOTS.XSPOT) AS XSPOT,
+                COALESCE(PLAYS.SPOT_Y, SPOTS.YSPOT) AS YSPOT,
+                SPOTS.OPP_EXPECTED,
+                SPOTS.POINTS,
+                GAMES.SEASON,
+                GAMES.OPPONENT || ' ' || GAMES.DATE AS GAME,
+                PLAYERS.FIRST_NAME
+                || ' '
+                || PLAYERS.LAST_NAME AS NAME,
+                CASE
+                  WHEN PLAYS.PLAYER_ID = '0'
+                    THEN 'OPP'
+                  ELSE 'NDA'
+                END AS TEAM,
+                CASE
+                  WHEN PLAYS.MAKE_MISS = 'Y'
+                    THEN 1
+                  ELSE 0
+                END AS MAKE
+FROM PLAYS
+INNER JOIN SPOTS
+  ON PLAYS.SHOT_SPOT = SPOTS.SPOT
+INNER JOIN GAMES
+  ON GAMES.GAME_ID = PLAYS.GAME_ID
+LEFT JOIN PLAYERS
+  ON PLAYERS.NUMBER = PLAYS.PLAYER_ID
+AND PLAYERS.YEAR = GAMES.SEASON
+WHERE SPOTS.POINTS > 1
+    """
+    return sql
+
+
+def get_play_by_play_sql(filter='1 = 1'):
+    sql = f"""
 SELECT PLAYS.GAME_ID,
                 PLAYS.PLAYER_ID,
                 PLAYS.SHOT_SPOT,
@@ -820,6 +798,7 @@ INNER JOIN GAMES
 INNER JOIN PLAYERS
   ON PLAYERS.NUMBER = PLAYS.PLAYER_ID
 AND PLAYERS.YEAR = GAMES.SEASON
+WHERE {filter}
     """
     return sql
 
@@ -829,4 +808,79 @@ def delete_shot():
     DELETE FROM PLAYS
      WHERE GAME_ID = ? AND PLAY_NUM = ? AND PLAYER_ID = ?
     """
-    return sql
\ No newline at end of file
+    return sql
+
+def create_play_expected_points_sql():
+    sql = """
+    CREATE TABLE IF NOT EXISTS PLAY_EXPECTED_POINTS (
+        GAME_ID BIGINT NOT NULL,
+        PLAY_NUM BIGINT NOT NULL,
+        MODEL_VERSION TEXT NOT NULL,
+        INPUT_HASH TEXT,
+        PROB DOUBLE,
+        EXPECTED_POINTS DOUBLE,
+        SCORED_AT TEXT,
+        PRIMARY KEY (GAME_ID, PLAY_NUM, MODEL_VERSION)
+    )
+    """
+    return sql
+
+
+def delete_play_expected_points_sql():
+    sql = """
+    DELETE FROM PLAY_EXPECTED_POINTS
+     WHERE GAME_ID = ? AND MODEL_VERSION = ?
+    """
+    return sql
+
+
+def insert_play_expected_points_sql():
+    sql = """
+    INSERT INTO PLAY_EXPECTED_POINTS (GAME_ID,
+                                      PLAY_NUM,
+                                      MODEL_VERSION,
+                                      INPUT_HASH,
+                                      PROB,
+                                      EXPECTED_POINTS,
+                                      SCORED_AT)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (GAME_ID, PLAY_NUM, MODEL_VERSION) DO UPDATE
+       SET
+           INPUT_HASH = excluded.INPUT_HASH,
+           PROB = excluded.PROB,
+           EXPECTED_POINTS = excluded.EXPECTED_POINTS,
+           SCORED_AT = excluded.SCORED_AT
+    """
+    return sql
+
+
+def get_play_expected_points_hashes_sql():
+    sql = """
+    SELECT GAME_ID,
+           PLAY_NUM,
+           INPUT_HASH
+      FROM PLAY_EXPECTED_POINTS
+     WHERE GAME_ID >= ? AND MODEL_VERSION = ?
+    """
+    return sql
+
+
+def get_play_expected_points_sql():
+    sql = """
+    SELECT GAME_ID,
+           PLAY_NUM,
+           INPUT_HASH,
+           PROB,
+           EXPECTED_POINTS
+      FROM PLAY_EXPECTED_POINTS
+     WHERE GAME_ID = ? AND MODEL_VERSION = ?
+    """
+    return sql
+
+
+def prune_play_expected_points_sql():
+    sql = """
+    DELETE FROM PLAY_EXPECTED_POINTS
+     WHERE MODEL_VERSION != ?
+    """
+    return sql
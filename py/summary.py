@@ -0,0 +1,72 @@
+from py import data_source, sql
+
+
+def _summary_filter(season=None, game_id=None, player_id=None) -> tuple:
+    if player_id is not None:
+        if game_id is None:
+            raise ValueError('player_id refreshes also need a game_id')
+        return 'GAME_ID = ? AND PLAYER_ID = ?', (int(game_id), int(player_id))
+    if game_id is not None:
+        return 'GAME_ID = ?', (int(game_id),)
+    if season is not None:
+        return 'SEASON = ?', (int(season),)
+    return '1 = 1', ()
+
+
+def refresh_statements(season=None, game_id=None, player_id=None) -> list:
+    """
+    The (sql, params) pairs refresh_game_summary runs, for callers that
+    journal writes instead of running them (see py/write_queue).
+    """
+    where, params = _summary_filter(
+        season=season, game_id=game_id, player_id=player_id
+    )
+    return [
+        (sql.delete_game_summary_materialized_sql(where), params),
+        (sql.insert_game_summary_materialized_sql(where), params),
+    ]
+
+
+def refresh_game_summary(
+        connection: str, season=None, game_id=None, player_id=None
+    ):
+    """
+    Recompute GAME_SUMMARY_MATERIALIZED rows from GAME_SUMMARY, GAMES,
+    PLAYERS and MINUTES_PLAYED.
+
+    Pass the narrowest key the write touched: a player-game after a stat
+    change, a game after a game is added or removed, a season after
+    minutes or the roster change (season average minutes feed every row
+    of that season). With no key the whole table is rebuilt.
+
+    Args:
+        connection (str): The database connection string.
+        season (int): Season to rebuild.
+        game_id (int): Game to rebuild.
+        player_id (int): Player to rebuild within game_id.
+    """
+    statements = refresh_statements(
+        season=season, game_id=game_id, player_id=player_id
+    )
+    with data_source.transaction(connection) as cursor:
+        for statement, params in statements:
+            cursor.execute(statement, params)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Rebuild the materialized game summary table.'
+    )
+    parser.add_argument('connection', help='Database connection string')
+    parser.add_argument('--season', type=int)
+    parser.add_argument('--game-id', type=int)
+    parser.add_argument('--player-id', type=int)
+    args = parser.parse_args()
+    refresh_game_summary(
+        args.connection,
+        season=args.season,
+        game_id=args.game_id,
+        player_id=args.player_id,
+    )
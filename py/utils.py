@@ -7,6 +7,8 @@ import numpy as np
 import streamlit as st
 import math
 import plotly.graph_objects as go
+import threading
+from collections import OrderedDict
 
 
 def ellipse_arc(x_center=0.0,
@@ -20,139 +22,261 @@ def ellipse_arc(x_center=0.0,
         t = np.linspace(start_angle, end_angle, N)
         x = x_center + a * np.cos(t)
         y = y_center + b * np.sin(t)
-        path = f'M {x[0]}, {y[0]}'
-        for k in range(1, len(t)):
-            path += f'L{x[k]}, {y[k]}'
+        # Format every vertex in one pass rather than growing a string
+        points = np.char.add(np.char.add(x.astype(str), ', '), y.astype(str))
+        path = 'M ' + 'L'.join(points)
         if closed:
             path += ' Z'
         return path
 
-def build_blank_shot_chart():
-    fig = go.Figure()
-    fig_height = 600 * (470 + 2 * 10) / (500 + 2 * 10)
-    fig.update_layout(width=10, height=fig_height)
-    fig.update_xaxes(range=[-250 - 10, 250 + 10])
-    fig.update_yaxes(range=[-52.5 - 10, 417.5 + 10])
-    threept_break_y = 0.47765084
-    three_line_col = "#777777"
-    main_line_col = "#777777"
-    fig.update_layout(margin=dict(l=20, r=20, t=20, b=20),
-                      paper_bgcolor="white",
-                      plot_bgcolor="white",
-                      clickmode='event+select',
-                      yaxis=dict(scaleanchor="x",
-                                 scaleratio=1,
-                                 showgrid=False,
-                                 zeroline=False,
-                                 showline=False,
-                                 ticks='',
-                                 showticklabels=False,
-                                 fixedrange=True,),
-                      xaxis=dict(showgrid=False,
-                                 zeroline=False,
-                                 showline=False,
-                                 ticks='',
-                                 showticklabels=False,
-                                 fixedrange=True,),
-                      shapes=[dict(type="rect", 
-                                   x0=-250, 
-                                   y0=-52.5, 
-                                   x1=250, 
-                                   y1=417.5,
-                                   line=dict(color=main_line_col, width=1),
-                                   layer='below'),
-                              dict(type="rect", 
-                                   x0=-60, 
-                                   y0=-52.5, 
-                                   x1=60, 
-                                   y1=137.5,
-                                   line=dict(color=main_line_col, width=1),
-                                   layer='below'),
-                              dict(type="circle", 
-                                   x0=-60, 
-                                   y0=77.5, 
-                                   x1=60, 
-                                   y1=197.5, 
-                                   xref="x", 
-                                   yref="y",
-                                   line=dict(color=main_line_col, width=1),
-                                   layer='below'),
-                              dict(type="line", 
-                                   x0=-60, 
-                                   y0=137.5, 
-                                   x1=60, 
-                                   y1=137.5,
-                                   line=dict(color=main_line_col, width=1),
-                                   layer='below'),
-                               dict(type="rect", 
-                                    x0=-2, 
-                                    y0=-7.25, 
-                                    x1=2, 
-                                    y1=-12.5,
-                                    line=dict(color="#ec7607", width=1),
-                                    fillcolor='#ec7607',),
-                               dict(type="circle", 
-                                    x0=-7.5, 
-                                    y0=-7.5, 
-                                    x1=7.5, 
-                                    y1=7.5, 
-                                    xref="x", 
-                                    yref="y",
-                                    line=dict(color="#ec7607", width=1),),
-                              dict(type="line", 
-                                   x0=-30, 
-                                   y0=-12.5, 
-                                   x1=30, 
-                                   y1=-12.5,
-                                   line=dict(color="#ec7607", width=1),),
-                              dict(type="path",
-                                   path=ellipse_arc(
-                                       a=40, 
-                                       b=40,
-                                       start_angle=0,
-                                       end_angle=np.pi
-                                   ),
-                                   line=dict(color=main_line_col, width=1),
-                                   layer='below'),
-                              dict(type="path",
-                                   path=ellipse_arc(
-                                       a=200.5, 
-                                       b=200.5, 
-                                       start_angle=0.0, 
-                                       end_angle=np.pi - 0.0,
-                                       N=5000
-                                   ),
-                                   line=dict(color=main_line_col, width=1),
-                                   layer='below'),
-                              dict(type="line", 
-                                   x0=-200.5, 
-                                   y0=-52.5,
-                                   x1=-200.5, 
-                                   y1=threept_break_y,
-                                   line=dict(color=three_line_col, width=1), 
-                                   layer='below'),
-                              dict(type="line", 
-                                   x0=200.5, 
-                                   y0=-52.5, 
-                                   x1=200.5, 
-                                   y1=threept_break_y,
-                                   line=dict(color=three_line_col, width=1),
-                                   layer='below'),
-                              dict(type="path",
-                                   path=ellipse_arc(
-                                       y_center=417.5, 
-                                       a=60, 
-                                       b=60, 
-                                       start_angle=-0, 
-                                       end_angle=-np.pi
-                                   ),
-                                  line=dict(color=main_line_col, width=1), 
-                                  layer='below'),]
-    )
-    
+
+COURT_LINE_COLOR = "#777777"
+RIM_COLOR = "#ec7607"
+THREE_POINT_BREAK_Y = 0.47765084
+
+
+def _court_shapes():
+    line = dict(color=COURT_LINE_COLOR, width=1)
+    rim = dict(color=RIM_COLOR, width=1)
+    return [dict(type="rect", x0=-250, y0=-52.5, x1=250, y1=417.5,
+                 line=line, layer='below'),
+            dict(type="rect", x0=-60, y0=-52.5, x1=60, y1=137.5,
+                 line=line, layer='below'),
+            dict(type="circle", x0=-60, y0=77.5, x1=60, y1=197.5,
+                 xref="x", yref="y", line=line, layer='below'),
+            dict(type="line", x0=-60, y0=137.5, x1=60, y1=137.5,
+                 line=line, layer='below'),
+            dict(type="rect", x0=-2, y0=-7.25, x1=2, y1=-12.5,
+                 line=rim, fillcolor=RIM_COLOR,),
+            dict(type="circle", x0=-7.5, y0=-7.5, x1=7.5, y1=7.5,
+                 xref="x", yref="y", line=rim,),
+            dict(type="line", x0=-30, y0=-12.5, x1=30, y1=-12.5,
+                 line=rim,),
+            dict(type="path",
+                 path=ellipse_arc(a=40, b=40, start_angle=0,
+                                  end_angle=np.pi),
+                 line=line, layer='below'),
+            dict(type="path",
+                 path=ellipse_arc(a=200.5, b=200.5, start_angle=0.0,
+                                  end_angle=np.pi - 0.0, N=5000),
+                 line=line, layer='below'),
+            dict(type="line", x0=-200.5, y0=-52.5,
+                 x1=-200.5, y1=THREE_POINT_BREAK_Y,
+                 line=line, layer='below'),
+            dict(type="line", x0=200.5, y0=-52.5,
+                 x1=200.5, y1=THREE_POINT_BREAK_Y,
+                 line=line, layer='below'),
+            dict(type="path",
+                 path=ellipse_arc(y_center=417.5, a=60, b=60,
+                                  start_angle=-0, end_angle=-np.pi),
+                 line=line, layer='below'),]
+
+
+# Built once at import; every shot chart starts from this layout and
+# only adds its own traces
+COURT_LAYOUT = go.Layout(
+    width=10,
+    height=600 * (470 + 2 * 10) / (500 + 2 * 10),
+    margin=dict(l=20, r=20, t=20, b=20),
+    paper_bgcolor="white",
+    plot_bgcolor="white",
+    yaxis=dict(range=[-52.5 - 10, 417.5 + 10],
+               scaleanchor="x",
+               scaleratio=1,
+               showgrid=False,
+               zeroline=False,
+               showline=False,
+               ticks='',
+               showticklabels=False,
+               fixedrange=True,),
+    xaxis=dict(range=[-250 - 10, 250 + 10],
+               showgrid=False,
+               zeroline=False,
+               showline=False,
+               ticks='',
+               showticklabels=False,
+               fixedrange=True,),
+    shapes=_court_shapes(),
+)
+
+
+def court_figure(**layout) -> go.Figure:
+    """
+    Empty half court figure from COURT_LAYOUT.
+
+    Args:
+        **layout: Extra layout properties for this figure only.
+
+    Returns:
+        go.Figure: A new figure; COURT_LAYOUT itself is not modified.
+    """
+    fig = go.Figure(layout=COURT_LAYOUT)
+    if layout:
+        fig.update_layout(**layout)
     return fig
 
 
+def build_blank_shot_chart():
+    return court_figure(clickmode='event+select')
+
+
+THREE_POINT_RADIUS = 200.5
+
+
+def _clean_spot_name(spot):
+    if isinstance(spot, str):
+        return spot.strip().strip('"')
+    return spot
+
+
+class SpotIndex:
+    """
+    Shot spots held as NumPy arrays for resolving many clicks at once.
+
+    Spots are split into 2pt and 3pt partitions by POINTS. A coordinate
+    beyond the three-point radius only matches 3pt spots (falling back
+    to TK3 when there are none), one inside it only matches 2pt spots
+    (falling back to RB2), and one exactly on the line matches any spot,
+    with max_distance turning a far match into TK3.
+
+    Args:
+        spots_df (pd.DataFrame): SPOT, XSPOT, YSPOT, POINTS and
+            optionally OPP_EXPECTED, as returned by get_shot_spots_sql.
+    """
+
+    def __init__(self, spots_df: pd.DataFrame):
+        self.spots = np.array(
+            [_clean_spot_name(spot) for spot in spots_df['SPOT']],
+            dtype=object
+        )
+        self.x = spots_df['XSPOT'].astype(float).to_numpy()
+        self.y = spots_df['YSPOT'].astype(float).to_numpy()
+        self.points = spots_df['POINTS'].to_numpy()
+        if 'OPP_EXPECTED' in spots_df.columns:
+            self.opp_expected = spots_df['OPP_EXPECTED'].to_numpy(dtype=object)
+        else:
+            self.opp_expected = np.full(len(spots_df), None, dtype=object)
+        self.is_three = self.points == 3
+        self.is_two = self.points == 2
+        free_throw = np.flatnonzero(self.spots == 'FREE_THROW1')
+        self.free_throw = free_throw[0] if len(free_throw) else None
+
+    def resolve(self, xs, ys, max_distance: float | None = None) -> pd.DataFrame:
+        """
+        Nearest spot for every (x, y) pair.
+
+        Args:
+            xs (array-like): Click x coordinates.
+            ys (array-like): Click y coordinates.
+            max_distance (float): Furthest an on-the-line click may be from
+                its nearest spot before it is treated as TK3.
+
+        Returns:
+            pd.DataFrame: SPOT, DISTANCE, POINTS and OPP_EXPECTED, one row
+            per input coordinate in input order.
+        """
+        xs = np.asarray(xs, dtype=float).reshape(-1)
+        ys = np.asarray(ys, dtype=float).reshape(-1)
+        basket_distance = np.hypot(xs, ys)
+        beyond = basket_distance > THREE_POINT_RADIUS
+        inside = basket_distance < THREE_POINT_RADIUS
+
+        # (n clicks x m spots); m is a dozen or so, so this stays small
+        distances = np.hypot(
+            xs[:, None] - self.x[None, :], ys[:, None] - self.y[None, :]
+        )
+        eligible = np.ones_like(distances, dtype=bool)
+        eligible[beyond] = self.is_three
+        eligible[inside] = self.is_two
+        distances = np.where(eligible, distances, np.inf)
+        if distances.shape[1]:
+            nearest = distances.argmin(axis=1)
+            min_distance = distances[np.arange(len(xs)), nearest]
+        else:
+            nearest = np.zeros(len(xs), dtype=int)
+            min_distance = np.full(len(xs), np.inf)
+        found = np.isfinite(min_distance)
+
+        spot = np.full(len(xs), None, dtype=object)
+        points = np.full(len(xs), None, dtype=object)
+        opp_expected = np.full(len(xs), None, dtype=object)
+        if found.any():
+            spot[found] = self.spots[nearest[found]]
+            points[found] = self.points[nearest[found]]
+            opp_expected[found] = self.opp_expected[nearest[found]]
+        points[beyond & found] = 3
+        points[inside & found] = 2
+        distance = np.where(found, min_distance, basket_distance)
+
+        # Partition fallbacks when a partition has no spots
+        no_three = beyond & ~found
+        spot[no_three], points[no_three], opp_expected[no_three] = 'TK3', 3, .66
+        no_two = inside & ~found
+        spot[no_two], points[no_two], opp_expected[no_two] = 'RB2', 2, .45
+
+        if max_distance is not None:
+            too_far = ~beyond & ~inside & (min_distance > max_distance)
+            spot[too_far], points[too_far], opp_expected[too_far] = 'TK3', 3, .66
+
+        return pd.DataFrame({
+            'SPOT': spot,
+            'DISTANCE': distance,
+            'POINTS': points,
+            'OPP_EXPECTED': opp_expected,
+        })
+
+    def nearest(
+            self,
+            x: float,
+            y: float,
+            is_free_throw: bool = False,
+            max_distance: float | None = None,
+        ) -> dict:
+        """
+        Single-click form of resolve, returned as the spot dict used by
+        the play entry page.
+        """
+        if is_free_throw:
+            if self.free_throw is None:
+                return {
+                    'spot': 'FREE_THROW1',
+                    'distance': 0.0,
+                    'points': 1,
+                    'opp_expected': 0.66
+                }
+            return {
+                'spot': 'FREE_THROW1',
+                'distance': 0.0,
+                'points': self.points[self.free_throw],
+                'opp_expected': self.opp_expected[self.free_throw]
+            }
+        row = self.resolve([x], [y], max_distance=max_distance).iloc[0]
+        return {
+            'spot': row['SPOT'],
+            'distance': float(row['DISTANCE']),
+            'points': row['POINTS'],
+            'opp_expected': row['OPP_EXPECTED']
+        }
+
+
+_spot_indexes = {}
+
+
+def get_spot_index(spots_df: pd.DataFrame) -> SpotIndex:
+    """
+    SpotIndex for a spots DataFrame, built once per DataFrame object.
+
+    Pages keep their spots frame in st.cache_resource, so the same object
+    comes back on every rerun and the index is reused.
+    """
+    cached = _spot_indexes.get(id(spots_df))
+    if cached is not None and cached[0] is spots_df:
+        return cached[1]
+    index = SpotIndex(spots_df)
+    _spot_indexes.clear()
+    _spot_indexes[id(spots_df)] = (spots_df, index)
+    return index
+
 
 def get_nearest_spot(
         x: float,
@@ -164,147 +288,182 @@ def get_nearest_spot(
     """
     Return the best-matching spot for coordinate (x, y).
     """
-    THREE_POINT_RADIUS = 200.5
-    # Free throw short-circuit
-    if is_free_throw:
-        if spots_df is None:
-            spots_df = load_spots()
-        ft_row = spots_df[spots_df['SPOT'].str.strip('"') == 'FREE_THROW1']
-        if not ft_row.empty:
-            row = ft_row.iloc[0]
-            json_spot = {
-                'spot': 'FREE_THROW1',
-                'distance': 0.0,
-                'points': row.get('POINTS'),
-                'opp_expected': row.get('OPP_EXPECTED')
-            }
-            return json_spot
-        else:
-          json_spot = {
-              'spot': 'FREE_THROW1',
-              'distance': 0.0,
-              'points': 1,
-              'opp_expected': 0.66
-          }
-          return json_spot
-
-    # Load spots if not provided
     if spots_df is None:
-        spots_df = load_spots()
-
-    # Compute basket distance
-    basket_distance = math.hypot(x, y)
-    # If beyond 3pt line, restrict search to 3pt spots only
-    if basket_distance > THREE_POINT_RADIUS:
-        three_spots = spots_df[spots_df['POINTS'] == 3].copy()
-        if three_spots.empty:
-            json_spot = {
-               'spot': 'TK3',
-               'distance': basket_distance,
-               'points': 3,
-               'opp_expected': .66
-            }
-            return json_spot
+        raise ValueError('get_nearest_spot needs the shot spots DataFrame')
+    return get_spot_index(spots_df).nearest(
+        x=x, y=y, is_free_throw=is_free_throw, max_distance=max_distance
+    )
 
-        dx = x - three_spots['XSPOT'].astype(float).to_numpy()
-        dy = y - three_spots['YSPOT'].astype(float).to_numpy()
-        distances = np.hypot(dx, dy)
 
-        min_idx = distances.argmin()
-        min_distance = float(distances[min_idx])
-        matched = three_spots.iloc[min_idx]
-        if isinstance(matched['SPOT'], str):
-            my_spot = matched['SPOT'].strip().strip('"')
-        else:
-            my_spot = matched['SPOT']
-        json_spot = {
-          'spot': my_spot,
-          'distance': min_distance,
-          'points': 3,
-          'opp_expected': matched.get('OPP_EXPECTED')
-        }
-        return json_spot
-    
-    if basket_distance < THREE_POINT_RADIUS:
-          two_spots = spots_df[spots_df['POINTS'] == 2].copy()
-          if two_spots.empty:
-              json_spot = {
-                  'spot': 'RB2',
-                  'distance': basket_distance,
-                  'points': 2,
-                  'opp_expected': .45
-               }
-              return json_spot
-          dx = x - two_spots['XSPOT'].astype(float).to_numpy()
-          dy = y - two_spots['YSPOT'].astype(float).to_numpy()
-          distances = np.hypot(dx, dy)
-          min_idx = distances.argmin()
-          min_distance = float(distances[min_idx])
-          matched = two_spots.iloc[min_idx]
-          if isinstance(matched['SPOT'], str):
-              my_spot = matched['SPOT'].strip().strip('"')
-          else:
-              my_spot = matched['SPOT']
-          json_spot = {
-               'spot': my_spot,
-               'distance': min_distance,
-               'points': 2,
-               'opp_expected': matched.get('OPP_EXPECTED')
-          }
-          return json_spot
-
-
-    # Otherwise: normal nearest spot search
-    dx = x - spots_df['XSPOT'].astype(float).to_numpy()
-    dy = y - spots_df['YSPOT'].astype(float).to_numpy()
-    distances = np.hypot(dx, dy)
-
-    min_idx = distances.argmin()
-    min_distance = float(distances[min_idx])
-    matched = spots_df.iloc[min_idx]
-
-    if (max_distance is not None) and (min_distance > max_distance):
-        json_spot = {
-            'spot': 'TK3',
-            'distance': min_distance,
-            'points': 3,
-            'opp_expected': .66
-        }
-        return json_spot
-    
-    if isinstance(matched['SPOT'], str):
-        my_spot = matched['SPOT'].strip().strip('"')
-    else:
-        my_spot = matched['SPOT']
+HEX_SIZE = 15.0
+HEX_CACHE_SIZE = 128
+
+
+class HexbinEngine:
+    """
+    Shots binned into a hexagonal grid from their raw court coordinates.
+
+    Coordinates, makes, point values and expected points are held as
+    NumPy arrays. Each filter combination and bin size is binned once
+    and the totals kept, so toggling between games, teams or players
+    already viewed doesn't touch the raw shots again.
+
+    Args:
+        shots_df (pd.DataFrame): One row per shot with XSPOT, YSPOT,
+            MAKE, POINTS and OPP_EXPECTED, as returned by
+            shot_locations_sql; any other columns can be filtered on.
+    """
+
+    def __init__(self, shots_df: pd.DataFrame):
+        self.shots = shots_df
+        self.x = shots_df['XSPOT'].astype(float).to_numpy()
+        self.y = shots_df['YSPOT'].astype(float).to_numpy()
+        self.make = shots_df['MAKE'].astype(int).to_numpy()
+        self.points = shots_df['POINTS'].astype(float).to_numpy()
+        self.expected = shots_df['OPP_EXPECTED'].astype(float).to_numpy()
+        self._bins = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _mask(self, filters: tuple) -> np.ndarray:
+        mask = np.ones(len(self.shots), dtype=bool)
+        for column, value in filters:
+            mask &= np.isin(self.shots[column].to_numpy(), value)
+        return mask
+
+    def bins(self, size: float = HEX_SIZE, **filters) -> pd.DataFrame:
+        """
+        Per-bin shot totals for the shots matching every filter.
+
+        Args:
+            size (float): Hexagon size (centre to corner) in court units.
+            **filters: Column name to a value or list of values to keep,
+                e.g. SEASON=2025, GAME_ID=[12, 13], TEAM='NDA'. None
+                skips the filter.
 
-    json_spot = {
-     'spot': my_spot,
-     'distance': min_distance,
-     'points': matched.get('POINTS'),
-     'opp_expected': matched.get('OPP_EXPECTED')
-    }
-    return json_spot
+        Returns:
+            pd.DataFrame: One row per non-empty bin with XSPOT, YSPOT
+            (the bin centre), ATTEMPTS, MAKES, MAKE_PERCENT,
+            POINTS_PER_ATTEMPT, EXPECTED_POINTS (summed over attempts)
+            and EXPECTED_PPA.
+        """
+        filters = tuple(sorted(
+            (column, tuple(sorted(np.atleast_1d(value).tolist())))
+            for column, value in filters.items() if value is not None
+        ))
+        key = (float(size), filters)
+        with self._lock:
+            cached = self._bins.get(key)
+            if cached is not None:
+                self._bins.move_to_end(key)
+                return cached
+
+        totals = self._bin(self._mask(filters), float(size))
+        with self._lock:
+            self._bins[key] = totals
+            while len(self._bins) > HEX_CACHE_SIZE:
+                self._bins.popitem(last=False)
+        return totals
+
+    def _bin(self, mask: np.ndarray, size: float) -> pd.DataFrame:
+        x, y = self.x[mask], self.y[mask]
+        # Pointy-top axial coordinates, rounded through cube coordinates
+        q = (np.sqrt(3) / 3 * x - y / 3) / size
+        r = (2 / 3 * y) / size
+        s = -q - r
+        rq, rr, rs = np.round(q), np.round(r), np.round(s)
+        dq, dr, ds = np.abs(rq - q), np.abs(rr - r), np.abs(rs - s)
+        fix_q = (dq > dr) & (dq > ds)
+        fix_r = ~fix_q & (dr > ds)
+        rq = np.where(fix_q, -rr - rs, rq)
+        rr = np.where(fix_r, -rq - rs, rr)
+
+        cells, inverse = np.unique(
+            np.column_stack([rq, rr]).astype(np.int64),
+            axis=0, return_inverse=True
+        )
+        inverse = inverse.reshape(-1)
+        count = len(cells)
+        attempts = np.bincount(inverse, minlength=count)
+        makes = np.bincount(inverse, weights=self.make[mask], minlength=count)
+        points = np.bincount(
+            inverse, weights=self.make[mask] * self.points[mask],
+            minlength=count
+        )
+        expected = np.bincount(
+            inverse, weights=self.expected[mask], minlength=count
+        )
+        return pd.DataFrame({
+            'XSPOT': size * np.sqrt(3) * (cells[:, 0] + cells[:, 1] / 2),
+            'YSPOT': size * 1.5 * cells[:, 1],
+            'ATTEMPTS': attempts,
+            'MAKES': makes.astype(np.int64),
+            'MAKE_PERCENT': makes / attempts,
+            'POINTS_PER_ATTEMPT': (points / attempts).round(3),
+            'EXPECTED_POINTS': expected,
+            'EXPECTED_PPA': (expected / attempts).round(3),
+        })
+
+
+_hexbin_engines = {}
+
+
+def get_hexbin_engine(shots_df: pd.DataFrame) -> HexbinEngine:
+    """
+    HexbinEngine for a shots DataFrame, built once per DataFrame object.
+
+    Like get_spot_index, this relies on pages keeping the frame in
+    st.cache_resource so the same object (and its binned totals) comes
+    back on every rerun.
+    """
+    cached = _hexbin_engines.get(id(shots_df))
+    if cached is not None and cached[0] is shots_df:
+        return cached[1]
+    engine = HexbinEngine(shots_df)
+    _hexbin_engines.clear()
+    _hexbin_engines[id(shots_df)] = (shots_df, engine)
+    return engine
+
+
+# Formatted by plotly.js from customdata, so no per-spot strings are
+# built in Python
+SHOT_HOVERTEMPLATE = (
+    '<i>Points Per Attempt: </i>%{customdata[0]:.1f}<BR>'
+    '<i>Attempts: </i>%{customdata[1]}<BR>'
+    '<i>FG%: </i>%{customdata[2]:.1f}%<BR>'
+    '<i>Expected PPA: </i>%{customdata[3]:.2f}'
+    '<extra></extra>'
+)
+
+
+def shot_customdata(totals: pd.DataFrame) -> np.ndarray:
+    """
+    Per-spot values read by SHOT_HOVERTEMPLATE.
+
+    Args:
+        totals (pd.DataFrame): POINTS_PER_ATTEMPT, ATTEMPTS,
+            MAKE_PERCENT and EXPECTED_PPA per spot or bin, e.g. from
+            HexbinEngine.bins.
+
+    Returns:
+        np.ndarray: (spots x 4) of PPA, attempts, FG% out of 100 and
+        expected PPA.
+    """
+    return np.column_stack([
+        totals['POINTS_PER_ATTEMPT'].to_numpy(dtype=float),
+        totals['ATTEMPTS'].to_numpy(),
+        totals['MAKE_PERCENT'].to_numpy(dtype=float) * 100,
+        totals['EXPECTED_PPA'].to_numpy(dtype=float),
+    ])
 
 
 def load_shot_chart_team(totals, team_selected):
     xlocs = totals['XSPOT']
     ylocs = totals['YSPOT']
     freq_by_hex = totals['ATTEMPTS']
-    accs_by_hex = totals['POINTS_PER_ATTEMPT']
-    makes = totals['MAKES']
-    spot = totals['SHOT_SPOT']
-    hg_percent = totals['MAKE_PERCENT'].round(3)
     marker_cmin = 0.0
     marker_cmax = 2
     ticktexts = [str(marker_cmin)+'-', "", str(marker_cmax)+'+']
-    hexbin_text = [
-        '<i>Points Per Attempt: </i>' + str(round(accs_by_hex[i], 1)) + '<BR>'
-        '<i>Attempts: </i>' + str(round(freq_by_hex[i], 2)) + '<BR>'
-        '<i>FG%: </i>' + str(round(hg_percent[i]* 100, 4)) + '%'
-        for i in range(len(freq_by_hex))
-    ]
-    str_selected = ','.join(team_selected)
-    fig = go.Figure()
+    fig = court_figure()
     fig.add_trace(go.Scatter(x=xlocs, 
                              y=ylocs, 
                              mode='markers',
@@ -338,122 +497,8 @@ def load_shot_chart_team(totals, team_selected):
                                          cmin=marker_cmin, 
                                          cmax=marker_cmax,
                              ),
-                             text=hexbin_text,
-                             hoverinfo='text')
-    )
-    fig_height = 600 * (470 + 2 * 10) / (500 + 2 * 10)
-    fig.update_layout(width=10, height=fig_height)
-    fig.update_xaxes(range=[-250 - 10, 250 + 10])
-    fig.update_yaxes(range=[-52.5 - 10, 417.5 + 10])
-    threept_break_y = 0.47765084
-    three_line_col = "#777777"
-    main_line_col = "#777777"
-    fig.update_layout(margin=dict(l=20, r=20, t=20, b=20),
-                      paper_bgcolor="white",
-                      plot_bgcolor="white",
-                      yaxis=dict(scaleanchor="x",
-                                 scaleratio=1,
-                                 showgrid=False,
-                                 zeroline=False,
-                                 showline=False,
-                                 ticks='',
-                                 showticklabels=False,
-                                 fixedrange=True,),
-                      xaxis=dict(showgrid=False,
-                                 zeroline=False,
-                                 showline=False,
-                                 ticks='',
-                                 showticklabels=False,
-                                 fixedrange=True,),
-                      shapes=[dict(type="rect", 
-                                   x0=-250, 
-                                   y0=-52.5, 
-                                   x1=250, 
-                                   y1=417.5,
-                                   line=dict(color=main_line_col, width=1),
-                                   layer='below'),
-                              dict(type="rect", 
-                                   x0=-60, 
-                                   y0=-52.5, 
-                                   x1=60, 
-                                   y1=137.5,
-                                   line=dict(color=main_line_col, width=1),
-                                   layer='below'),
-                              dict(type="circle", 
-                                   x0=-60, 
-                                   y0=77.5, 
-                                   x1=60, 
-                                   y1=197.5, 
-                                   xref="x", 
-                                   yref="y",
-                                   line=dict(color=main_line_col, width=1),
-                                   layer='below'),
-                              dict(type="line", 
-                                   x0=-60, 
-                                   y0=137.5, 
-                                   x1=60, 
-                                   y1=137.5,
-                                   line=dict(color=main_line_col, width=1),
-                                   layer='below'),
-                               dict(type="rect", 
-                                    x0=-2, 
-                                    y0=-7.25, 
-                                    x1=2, 
-                                    y1=-12.5,
-                                    line=dict(color="#ec7607", width=1),
-                                    fillcolor='#ec7607',),
-                               dict(type="circle", 
-                                    x0=-7.5, 
-                                    y0=-7.5, 
-                                    x1=7.5, 
-                                    y1=7.5, 
-                                    xref="x", 
-                                    yref="y",
-                                    line=dict(color="#ec7607", width=1),),
-                              dict(type="line", 
-                                   x0=-30, 
-                                   y0=-12.5, 
-                                   x1=30, 
-                                   y1=-12.5,
-                                   line=dict(color="#ec7607", width=1),),
-                              dict(type="path",
-                                   path=ellipse_arc(a=40,
-                                                    b=40, 
-                                                    start_angle=0, 
-                                                    end_angle=np.pi),
-                                   line=dict(color=main_line_col, 
-                                             width=1), 
-                                   layer='below'),
-                              dict(type="path",
-                                   path=ellipse_arc(a=200.5, 
-                                                    b=200.5, 
-                                                    start_angle=0.0, 
-                                                    end_angle=np.pi - 0.0, 
-                                                    N=5000),
-                                   line=dict(color=main_line_col, width=1),
-                                   layer='below'),
-                              dict(type="line", 
-                                   x0=-200.5, 
-                                   y0=-52.5,
-                                   x1=-200.5, 
-                                   y1=threept_break_y,
-                                   line=dict(color=three_line_col, width=1), 
-                                   layer='below'),
-                              dict(type="line", 
-                                   x0=200.5, 
-                                   y0=-52.5, 
-                                   x1=200.5, 
-                                   y1=threept_break_y,
-                                   line=dict(color=three_line_col, width=1), 
-                                   layer='below'),
-                              dict(type="path",
-                                   path=ellipse_arc(y_center=417.5, 
-                                                    a=60, 
-                                                    b=60, 
-                                                    start_angle=-0, 
-                                                    end_angle=-np.pi),
-                                  line=dict(color=main_line_col, width=1), 
-                                  layer='below'),]
+                             customdata=shot_customdata(totals),
+                             hovertemplate=SHOT_HOVERTEMPLATE)
     )
     return fig
     
@@ -461,9 +506,6 @@ def load_shot_chart_player(totals, players_selected):
     xlocs = totals['XSPOT']
     ylocs = totals['YSPOT']
     freq_by_hex = totals['ATTEMPTS']
-    accs_by_hex = totals['POINTS_PER_ATTEMPT']
-    spot = totals['SHOT_SPOT']
-    hg_percent = totals['MAKE_PERCENT'].round(3)
     marker_cmin = 0.0
     marker_cmax = 2
     ticktexts = [
@@ -471,22 +513,7 @@ def load_shot_chart_player(totals, players_selected):
         "", 
         str(marker_cmax)+'+'
     ]
-    hexbin_text = [
-        '<i>Points Per Attempt: </i>' + str(round(accs_by_hex[i], 1)) + '<BR>'
-        '<i>Attempts: </i>' + str(round(freq_by_hex[i], 2)) + '<BR>'
-        '<i>FG%: </i>' + str(round(hg_percent[i] * 100, 4)) + '%'
-        for i in range(len(freq_by_hex))
-    ]
-    str_selected = ','.join(players_selected)
-    symbols = []
-    for pct in hg_percent:
-        if pct > 0.5:
-            symbols.append('circle')
-        elif pct > 0.33:
-            symbols.append('hexagon')
-        else:
-            symbols.append('octagon')
-    fig = go.Figure()
+    fig = court_figure()
     fig.add_trace(
         go.Scatter(
             x=xlocs, 
@@ -523,121 +550,8 @@ def load_shot_chart_player(totals, players_selected):
                 cmin=marker_cmin, 
                 cmax=marker_cmax,
             ),
-            text=hexbin_text,
-            hoverinfo='text'
+            customdata=shot_customdata(totals),
+            hovertemplate=SHOT_HOVERTEMPLATE
           )
     )
-    fig_height = 600 * (470 + 2 * 10) / (500 + 2 * 10)
-    fig.update_layout(width=10, height=fig_height)
-    fig.update_xaxes(range=[-250 - 10, 250 + 10])
-    fig.update_yaxes(range=[-52.5 - 10, 417.5 + 10])
-    threept_break_y = 0.47765084
-    three_line_col = "#777777"
-    main_line_col = "#777777"
-    fig.update_layout(margin=dict(l=20, r=20, t=20, b=20),
-                      paper_bgcolor="white",
-                      plot_bgcolor="white",
-                      yaxis=dict(scaleanchor="x",
-                                 scaleratio=1,
-                                 showgrid=False,
-                                 zeroline=False,
-                                 showline=False,
-                                 ticks='',
-                                 showticklabels=False,
-                                 fixedrange=True,),
-                      xaxis=dict(showgrid=False,
-                                 zeroline=False,
-                                 showline=False,
-                                 ticks='',
-                                 showticklabels=False,
-                                 fixedrange=True,),
-                      shapes=[dict(type="rect", 
-                                   x0=-250, 
-                                   y0=-52.5, 
-                                   x1=250, 
-                                   y1=417.5,
-                                   line=dict(color=main_line_col, width=1),
-                                   layer='below'),
-                              dict(type="rect", 
-                                   x0=-60, 
-                                   y0=-52.5, 
-                                   x1=60, 
-                                   y1=137.5,
-                                   line=dict(color=main_line_col, width=1),
-                                   layer='below'),
-                              dict(type="circle", 
-                                   x0=-60, 
-                                   y0=77.5, 
-                                   x1=60, 
-                                   y1=197.5, 
-                                   xref="x", 
-                                   yref="y",
-                                   line=dict(color=main_line_col, width=1),
-                                   layer='below'),
-                              dict(type="line", 
-                                   x0=-60, 
-                                   y0=137.5, 
-                                   x1=60, 
-                                   y1=137.5,
-                                   line=dict(color=main_line_col, width=1),
-                                   layer='below'),
-                               dict(type="rect", 
-                                    x0=-2, 
-                                    y0=-7.25, 
-                                    x1=2, 
-                                    y1=-12.5,
-                                    line=dict(color="#ec7607", width=1),
-                                    fillcolor='#ec7607',),
-                               dict(type="circle", 
-                                    x0=-7.5, 
-                                    y0=-7.5, 
-                                    x1=7.5, 
-                                    y1=7.5, 
-                                    xref="x", 
-                                    yref="y",
-                                    line=dict(color="#ec7607", width=1),),
-                              dict(type="line", 
-                                   x0=-30, 
-                                   y0=-12.5, 
-                                   x1=30, 
-                                   y1=-12.5,
-                                   line=dict(color="#ec7607", width=1),),
-                              dict(type="path",
-                                   path=ellipse_arc(a=40,
-                                                    b=40, 
-                                                    start_angle=0, 
-                                                    end_angle=np.pi),
-                                   line=dict(color=main_line_col, width=1),
-                                   layer='below'),
-                              dict(type="path",
-                                   path=ellipse_arc(a=200.5, 
-                                                    b=200.5, 
-                                                    start_angle=0.0, 
-                                                    end_angle=np.pi - 0.0, 
-                                                    N=5000),
-                                   line=dict(color=main_line_col, width=1),
-                                   layer='below'),
-                              dict(type="line", 
-                                   x0=-200.5, 
-                                   y0=-52.5,
-                                   x1=-200.5, 
-                                   y1=threept_break_y,
-                                   line=dict(color=three_line_col, width=1), 
-                                   layer='below'),
-                              dict(type="line", 
-                                   x0=200.5, 
-                                   y0=-52.5, 
-                                   x1=200.5, 
-                                   y1=threept_break_y,
-                                   line=dict(color=three_line_col, width=1), 
-                                   layer='below'),
-                              dict(type="path",
-                                   path=ellipse_arc(y_center=417.5, 
-                                                    a=60, 
-                                                    b=60, 
-                                                    start_angle=-0, 
-                                                    end_angle=-np.pi),
-                                  line=dict(color=main_line_col, width=1), 
-                                  layer='below'),]
-    )
     return fig
\ No newline at end of file
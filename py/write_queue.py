@@ -0,0 +1,460 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+from py import data_source
+
+
+JOURNAL_PATH = 'data/write_journal.db'
+BATCH_SIZE = 50
+FLUSH_INTERVAL = 0.5
+RETRY_BASE = 1.0
+RETRY_MAX = 60.0
+MAX_ATTEMPTS = 5
+
+# Remote record of the journal ids applied by the latest batch of each
+# journal, written in the same transaction as the batch
+APPLIED_TABLE_SQL = (
+    'CREATE TABLE IF NOT EXISTS WRITE_QUEUE_APPLIED ('
+    'JOURNAL_ID TEXT NOT NULL, WRITE_ID INTEGER NOT NULL, '
+    'PRIMARY KEY (JOURNAL_ID, WRITE_ID))'
+)
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def _json_default(value):
+    # numpy scalars coming out of DataFrames
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f'Cannot journal {type(value).__name__} parameter')
+
+
+def connection_key(connection: str) -> str:
+    """
+    Stand-in for a connection string in the journal, so the API key in
+    a SQLite Cloud string is never written to disk.
+    """
+    return hashlib.sha256(connection.encode()).hexdigest()[:32]
+
+
+class WriteBehindQueue:
+    """
+    Durable local journal of write statements that a background thread
+    replays against the remote database in order.
+
+    enqueue() only touches a local SQLite file (WAL mode), so callers
+    never wait on the network. The flusher sends up to batch_size
+    statements per remote transaction in journal order and deletes them
+    from the journal once committed. Each batch also records its journal
+    ids remotely in WRITE_QUEUE_APPLIED, so a batch whose commit landed
+    but whose journal delete did not (the process died in between) is
+    skipped rather than applied twice. A failed batch is retried with
+    exponential backoff while the remote is unreachable. When the remote
+    is up the batch is halved until the failing statement is isolated.
+    A statement that fails max_attempts times stops the queue: later
+    writes may depend on it, so nothing behind it is replayed until it
+    is retried (retry_blocked) or set aside to FAILED_WRITES
+    (discard_blocked).
+
+    Args:
+        connection (str): Connection string the writes are replayed on.
+            It is kept in memory only; journal rows carry
+            connection_key(connection).
+        journal_path (str): Local SQLite file holding pending writes.
+        batch_size (int): Most statements sent per remote transaction.
+        flush_interval (float): Seconds between flush attempts when idle.
+        max_attempts (int): Failures before a statement stops the queue.
+    """
+
+    def __init__(
+            self,
+            connection: str,
+            journal_path: str = JOURNAL_PATH,
+            batch_size: int = BATCH_SIZE,
+            flush_interval: float = FLUSH_INTERVAL,
+            max_attempts: int = MAX_ATTEMPTS,
+        ):
+        self.connection = connection
+        self._key = connection_key(connection)
+        self.journal_path = journal_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.last_error = None
+        self.offline = False
+        self._batch_limit = batch_size
+        self._failures = 0
+        self._retry_at = 0.0
+        self._synced = 0
+        self._ledger_ready = False
+        self._listeners = []
+        self._journal_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._journal = sqlite3.connect(
+            journal_path, check_same_thread=False, isolation_level=None
+        )
+        self._journal.execute('PRAGMA journal_mode = WAL')
+        self._journal.execute('PRAGMA synchronous = NORMAL')
+        for table in ('PENDING_WRITES', 'FAILED_WRITES'):
+            self._journal.execute(
+                f'CREATE TABLE IF NOT EXISTS {table} ('
+                'ID INTEGER PRIMARY KEY AUTOINCREMENT, '
+                'CONNECTION TEXT, SQL TEXT, PARAMS TEXT, '
+                'ATTEMPTS INTEGER DEFAULT 0, LAST_ERROR TEXT, CREATED_AT REAL)'
+            )
+            # Journals written before rows were keyed by hash held the
+            # connection string itself
+            self._journal.execute(
+                f'UPDATE {table} SET CONNECTION = ? WHERE CONNECTION = ?',
+                (self._key, connection)
+            )
+        self._journal.execute(
+            'CREATE TABLE IF NOT EXISTS JOURNAL_META '
+            '(KEY TEXT PRIMARY KEY, VALUE TEXT)'
+        )
+        self._journal.execute(
+            "INSERT OR IGNORE INTO JOURNAL_META VALUES ('JOURNAL_ID', ?)",
+            (uuid.uuid4().hex,)
+        )
+        self.journal_id = self._journal.execute(
+            "SELECT VALUE FROM JOURNAL_META WHERE KEY = 'JOURNAL_ID'"
+        ).fetchone()[0]
+
+    def start(self):
+        """Start the background flusher if it is not already running."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name='write-behind-flush', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the background flusher; pending writes stay journaled."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def enqueue(self, sql: str, params=()) -> int:
+        """
+        Journal one write statement for replay.
+
+        Args:
+            sql (str): The SQL statement.
+            params (tuple): Values bound to the statement placeholders.
+
+        Returns:
+            int: Journal id; later enqueues always replay after it.
+        """
+        return self.enqueue_many([(sql, params)])[-1]
+
+    def enqueue_many(self, statements) -> list:
+        """
+        Journal several write statements in one local transaction.
+
+        Args:
+            statements (iterable): (sql, params) pairs, replayed in order.
+
+        Returns:
+            list: Journal ids in the same order.
+        """
+        now = time.time()
+        ids = []
+        with self._journal_lock:
+            self._journal.execute('BEGIN')
+            try:
+                for sql, params in statements:
+                    cursor = self._journal.execute(
+                        'INSERT INTO PENDING_WRITES '
+                        '(CONNECTION, SQL, PARAMS, CREATED_AT) '
+                        'VALUES (?, ?, ?, ?)',
+                        (
+                            self._key,
+                            sql,
+                            json.dumps(list(params), default=_json_default),
+                            now,
+                        )
+                    )
+                    ids.append(cursor.lastrowid)
+            except Exception:
+                self._journal.execute('ROLLBACK')
+                raise
+            self._journal.execute('COMMIT')
+        self._wake.set()
+        return ids
+
+    def pending_count(self) -> int:
+        """Writes journaled but not yet committed remotely."""
+        return self._count('PENDING_WRITES')
+
+    def failed_count(self) -> int:
+        """
+        Writes holding up the queue after repeatedly failing on a live
+        remote (0 or 1, since the queue stops at the first).
+        """
+        return 0 if self.blocked_write() is None else 1
+
+    def blocked_write(self) -> dict | None:
+        """
+        The write the queue is stopped at, if any.
+
+        Returns:
+            dict | None: id, sql, params, attempts and last_error.
+        """
+        with self._journal_lock:
+            row = self._journal.execute(
+                'SELECT ID, SQL, PARAMS, ATTEMPTS, LAST_ERROR '
+                'FROM PENDING_WRITES WHERE CONNECTION = ? '
+                'ORDER BY ID LIMIT 1',
+                (self._key,)
+            ).fetchone()
+        if row is None or row[3] < self.max_attempts:
+            return None
+        write_id, sql, params, attempts, last_error = row
+        return {
+            'id': write_id,
+            'sql': sql,
+            'params': tuple(json.loads(params)),
+            'attempts': attempts,
+            'last_error': last_error,
+        }
+
+    def retry_blocked(self):
+        """Give the blocking write another max_attempts tries."""
+        blocked = self.blocked_write()
+        if blocked is None:
+            return
+        with self._journal_lock:
+            self._journal.execute(
+                'UPDATE PENDING_WRITES SET ATTEMPTS = 0 WHERE ID = ?',
+                (blocked['id'],)
+            )
+        self._failures = 0
+        self._retry_at = 0.0
+        self._wake.set()
+
+    def discard_blocked(self):
+        """
+        Move the blocking write to FAILED_WRITES and resume the queue.
+        Only do this once the writes behind it no longer depend on it.
+        """
+        blocked = self.blocked_write()
+        if blocked is None:
+            return
+        with self._journal_lock:
+            self._journal.execute('BEGIN')
+            self._journal.execute(
+                'INSERT INTO FAILED_WRITES '
+                'SELECT * FROM PENDING_WRITES WHERE ID = ?',
+                (blocked['id'],)
+            )
+            self._journal.execute(
+                'DELETE FROM PENDING_WRITES WHERE ID = ?', (blocked['id'],)
+            )
+            self._journal.execute('COMMIT')
+        self._failures = 0
+        self._retry_at = 0.0
+        self._wake.set()
+
+    def synced(self) -> int:
+        """
+        Running total of writes committed remotely by this process.
+
+        Changes whenever a batch lands, so it works as a cache key for
+        data read back from the remote.
+        """
+        return self._synced
+
+    def add_listener(self, callback):
+        """
+        Call callback(statements) after each batch commits remotely, with
+        the batch's (sql, params) pairs. Adding the same callback twice
+        has no effect.
+        """
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def flush(self, timeout: float = 10.0) -> int:
+        """
+        Push pending writes now, ignoring any retry backoff.
+
+        Args:
+            timeout (float): Seconds to keep flushing before giving up.
+
+        Returns:
+            int: Writes still pending afterwards.
+        """
+        deadline = time.monotonic() + timeout
+        self._retry_at = 0.0
+        while time.monotonic() < deadline:
+            try:
+                if not self._flush_once():
+                    break
+            except Exception:
+                if self.offline:
+                    break
+                self._retry_at = 0.0
+        return self.pending_count()
+
+    def _count(self, table: str) -> int:
+        with self._journal_lock:
+            return self._journal.execute(
+                f'SELECT COUNT(*) FROM {table} WHERE CONNECTION = ?',
+                (self._key,)
+            ).fetchone()[0]
+
+    def _fetch(self, limit: int) -> list:
+        with self._journal_lock:
+            rows = self._journal.execute(
+                'SELECT ID, SQL, PARAMS, ATTEMPTS FROM PENDING_WRITES '
+                'WHERE CONNECTION = ? ORDER BY ID LIMIT ?',
+                (self._key, limit)
+            ).fetchall()
+        return [
+            (write_id, sql, tuple(json.loads(params)), attempts)
+            for write_id, sql, params, attempts in rows
+        ]
+
+    def _remote_reachable(self) -> bool:
+        try:
+            data_source.run_query(sql='SELECT 1', connection=self.connection)
+            return True
+        except Exception:
+            return False
+
+    def _record_failure(self, rows: list, exc: Exception):
+        self.last_error = str(exc)
+        self.offline = not self._remote_reachable()
+        if self.offline:
+            self._failures += 1
+            self._retry_at = time.monotonic() + min(
+                RETRY_MAX, RETRY_BASE * 2 ** (self._failures - 1)
+            )
+            return
+        if len(rows) > 1:
+            # The remote is up, so a statement in this batch is bad:
+            # halve the batch until it is isolated.
+            self._batch_limit = max(1, len(rows) // 2)
+            self._retry_at = 0.0
+            return
+        # Once ATTEMPTS reaches max_attempts, _flush_once stops here
+        write_id = rows[0][0]
+        with self._journal_lock:
+            self._journal.execute(
+                'UPDATE PENDING_WRITES SET ATTEMPTS = ATTEMPTS + 1, '
+                'LAST_ERROR = ? WHERE ID = ?',
+                (self.last_error, write_id)
+            )
+        self._failures += 1
+        self._retry_at = time.monotonic() + min(
+            RETRY_MAX, RETRY_BASE * 2 ** (self._failures - 1)
+        )
+
+    def _apply(self, cursor, rows: list):
+        if not self._ledger_ready:
+            cursor.execute(APPLIED_TABLE_SQL)
+        ids = [row[0] for row in rows]
+        cursor.execute(
+            'SELECT WRITE_ID FROM WRITE_QUEUE_APPLIED '
+            'WHERE JOURNAL_ID = ? AND WRITE_ID BETWEEN ? AND ?',
+            (self.journal_id, ids[0], ids[-1])
+        )
+        applied = {row[0] for row in cursor.fetchall()}
+        for write_id, sql, params, _ in rows:
+            if write_id not in applied:
+                cursor.execute(sql, params)
+        # Ids below this batch have left the journal, so their records
+        # can go; the ledger holds at most one batch per journal.
+        cursor.execute(
+            'DELETE FROM WRITE_QUEUE_APPLIED '
+            'WHERE JOURNAL_ID = ? AND WRITE_ID < ?',
+            (self.journal_id, ids[0])
+        )
+        new_ids = [write_id for write_id in ids if write_id not in applied]
+        if new_ids:
+            cursor.execute(
+                'INSERT INTO WRITE_QUEUE_APPLIED (JOURNAL_ID, WRITE_ID) '
+                f'VALUES {", ".join(["(?, ?)"] * len(new_ids))}',
+                [value for write_id in new_ids
+                 for value in (self.journal_id, write_id)]
+            )
+
+    def _flush_once(self) -> int:
+        with self._flush_lock:
+            rows = self._fetch(self._batch_limit)
+            if not rows or rows[0][3] >= self.max_attempts:
+                # Empty, or stopped at a write that needs resolving
+                return 0
+            ids = [row[0] for row in rows]
+            try:
+                with data_source.transaction(self.connection) as cursor:
+                    self._apply(cursor, rows)
+            except Exception as exc:
+                self._record_failure(rows, exc)
+                raise
+            self._ledger_ready = True
+            with self._journal_lock:
+                self._journal.execute(
+                    'DELETE FROM PENDING_WRITES WHERE ID IN '
+                    f'({", ".join("?" * len(ids))})',
+                    ids
+                )
+            self._synced += len(rows)
+            self._failures = 0
+            self._batch_limit = min(self.batch_size, self._batch_limit * 2)
+            self.offline = False
+            self.last_error = None
+        statements = [(sql, params) for _, sql, params, _ in rows]
+        for callback in list(self._listeners):
+            try:
+                callback(statements)
+            except Exception:
+                pass
+        return len(rows)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(timeout=self.flush_interval)
+            self._wake.clear()
+            while not self._stop.is_set():
+                delay = self._retry_at - time.monotonic()
+                if delay > 0:
+                    self._stop.wait(delay)
+                    continue
+                try:
+                    if not self._flush_once():
+                        break
+                except Exception:
+                    continue
+
+
+def get_queue(connection: str, journal_path: str = JOURNAL_PATH):
+    """
+    Return the process-wide queue for a connection string, creating and
+    starting it on first use. Writes left in the journal by an earlier
+    run are replayed as soon as it starts.
+
+    Args:
+        connection (str): The database connection string.
+        journal_path (str): Local SQLite file holding pending writes.
+
+    Returns:
+        WriteBehindQueue: The shared, running queue.
+    """
+    with _queues_lock:
+        queue = _queues.get(connection)
+        if queue is None:
+            queue = WriteBehindQueue(connection, journal_path=journal_path)
+            _queues[connection] = queue
+        queue.start()
+        return queue
@@ -1,6 +1,6 @@
 import streamlit as st
 import pandas as pd
-from py import sql, data_source, utils as ut
+from py import sql, data_source, shot_grading, utils as ut
 pd.options.mode.chained_assignment = None
 
 st.cache_data.clear()
@@ -22,21 +22,21 @@ def get_player_data():
           sql=sql.get_play_by_play_sql(), connection=sql_lite_connect
      )
      
-     def map_shot_defense(x):
-          if x == 'Open':
-               return 'OPEN'
-          elif x == 'Guarded':
-               return 'GUARDED'
-          elif x == 'Heavily Guarded':
-               return 'HEAVILY_GUARDED'
-          else:
-               return x
-     play_by_play['SHOT_DEFENSE'] = (
-          play_by_play['SHOT_DEFENSE'].apply(map_shot_defense)
+     play_by_play['SHOT_DEFENSE'] = shot_grading.normalize_defenses(
+          play_by_play['SHOT_DEFENSE']
      )
      #player_data = player_data[player_data['SEASON'] == season]
      return player_data, player_grouped_data, play_by_play
 
+
+# ----------------------------------------------------------------------------
+@st.cache_resource(ttl=300)
+def get_shot_locations():
+     # Same frame every rerun, so the hexbin engine keeps its binned totals
+     return data_source.run_query(
+          sql=sql.shot_locations_sql(), connection=sql_lite_connect
+     )
+
 # ----------------------------------------------------------------------------
 def format_visual_data(this_game, player_grouped_data):
      totals = this_game.copy().reset_index(drop=True)
@@ -77,59 +77,7 @@ def filter_player_data(players_selected, player_data, player_grouped_data, pbp,
 # ----------------------------------------------------------------------------
 @st.cache_data
 def get_grades(pbp):
-     shot_map = {
-     ('RB2', 'OPEN'): 'A',
-     ('RB2', 'GUARDED'): 'B',
-     ('RB2', 'HEAVILY_GUARDED'): 'C',
-     ('LB2', 'OPEN'): 'A',
-     ('LB2', 'GUARDED'): 'B',
-     ('LB2', 'HEAVILY_GUARDED'): 'C',
-     ('ML2', 'OPEN'): 'A',
-     ('ML2', 'GUARDED'): 'B',
-     ('ML2', 'HEAVILY_GUARDED'): 'C',
-     ('FT2', 'OPEN'): 'C',
-     ('FT2', 'GUARDED'): 'D',
-     ('FT2', 'HEAVILY_GUARDED'): 'F',
-     ('LE2', 'OPEN'): 'C',
-     ('LE2', 'GUARDED'): 'D',
-     ('LE2', 'HEAVILY_GUARDED'): 'F',
-     ('RE2', 'OPEN'): 'C',
-     ('RE2', 'GUARDED'): 'D',
-     ('RE2', 'HEAVILY_GUARDED'): 'F',
-     ('LMR2', 'OPEN'): 'C',
-     ('LMR2', 'GUARDED'): 'D',
-     ('LMR2', 'HEAVILY_GUARDED'): 'F',
-     ('RMR2', 'OPEN'): 'C',
-     ('RMR2', 'GUARDED'): 'D',
-     ('RMR2', 'HEAVILY_GUARDED'): 'F',
-     ('LC3', 'OPEN'): 'A',
-     ('LC3', 'GUARDED'): 'C',
-     ('LC3', 'HEAVILY_GUARDED'): 'F',
-     ('LW3', 'OPEN'): 'A',
-     ('LW3', 'GUARDED'): 'C',
-     ('LW3', 'HEAVILY_GUARDED'): 'F',
-     ('TK3', 'OPEN'): 'A',
-     ('TK3', 'GUARDED'): 'C',
-     ('TK3', 'HEAVILY_GUARDED'): 'F',
-     ('RW3', 'OPEN'): 'A',
-     ('RW3', 'GUARDED'): 'C',
-     ('RW3', 'HEAVILY_GUARDED'): 'F',
-     ('RC3', 'OPEN'): 'A',
-     ('RC3', 'GUARDED'): 'C',
-     ('RC3', 'HEAVILY_GUARDED'): 'F',
-     }
-     map_gpa = {
-          'A': 4,
-          'B': 3,
-          'C': 2,
-          'D': 1,
-          'F': 0
-     }
-
-     pbp['SHOT_LIST'] = list(zip(pbp['SHOT_SPOT'], pbp['SHOT_DEFENSE']))
-     pbp['SCORE'] = pbp['SHOT_LIST'].map(shot_map)
-     pbp = pbp.dropna()
-     pbp['GPA'] = pbp['SCORE'].map(map_gpa)
+     pbp = shot_grading.grade_shots(pbp)
      pbp_gpa = (
           pbp.groupby(by=['NAME', 'LABEL'], as_index=False)
              .agg(GPA_SUM=('GPA', 'sum'),
@@ -142,6 +90,7 @@ def get_grades(pbp):
 shot_chart_col, others = st.columns([3, 1])
 
 players, player_grouped_data, pbp = get_player_data()
+shot_locations = get_shot_locations()
 players = players.sort_values(by='SEASON', ascending=False)
 season_list = players.SEASON.unique().tolist()
 
@@ -164,6 +113,9 @@ with others:
      players_selected = st.radio(
          label='Choose Player', options=player_names, horizontal=True
      )
+     bin_size = st.select_slider(
+          label='Bin Size', options=[10, 15, 20, 30], value=int(ut.HEX_SIZE)
+     )
 
 this_game, this_game_grouped, pbp_grouped = filter_player_data(
      players_selected=players_selected,
@@ -182,19 +134,9 @@ if players_selected:
      totals, totals_sorted = format_visual_data(
           this_game=this_game, player_grouped_data=this_game_grouped
      )
-     totals['HG_COUNT'] = totals['HG_PERCENT'] * totals['ATTEMPTS']
-     totals_new = totals.groupby(
-          by=['NAME', 'SHOT_SPOT', 'XSPOT', 'YSPOT'], as_index=False
-     ).agg(
-          MAKES=('MAKES', 'sum'),
-          ATTEMPTS=('ATTEMPTS', 'sum'),
-          MAKE_PERCENT=('MAKE_PERCENT', 'mean'),
-          HG_COUNT=('HG_COUNT', 'mean')
-     )
-     totals_new['POINTS'] = totals['SHOT_SPOT'].str[-1].astype(int)
-     totals_new['POINTS_PER_ATTEMPT'] = (
-          (totals_new['MAKES']*totals_new['POINTS']) / totals_new['ATTEMPTS']
-     ).round(3) 
+     totals_new = ut.get_hexbin_engine(shot_locations).bins(
+          size=bin_size, SEASON=season, NAME=players_selected, GAME=game
+     )
      fig = ut.load_shot_chart_player(
           totals=totals_new, players_selected=players_selected
      )
@@ -1,10 +1,9 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from py import sql, data_source, utils as ut
+from py import sql, data_source, schedule, shot_grading, utils as ut
 pd.options.mode.chained_assignment = None
 
-st.cache_data.clear()
 st.set_page_config(layout='wide')
 
 sql_lite_connect = st.secrets['nda_gbb_connection']['DB_CONNECTION']
@@ -15,21 +14,72 @@ if button:
      st.cache_resource.clear()
      st.rerun()
 
+SHOT_GROUP_COLUMNS = [
+     'TEAM', 'U_ID', 'XSPOT', 'YSPOT', 'SHOT_SPOT', 'POINTS', 'OPPONENT',
+     'LOCATION', 'DATE', 'SEASON', 'GAME_ID', 'PAINT_TOUCH'
+]
+PLAY_BY_PLAY_COLUMNS = [
+     'GAME_ID', 'PLAYER_ID', 'SHOT_SPOT', 'SHOT_DEFENSE', 'MAKE_MISS',
+     'PLAY_NUM', 'OPP_EXPECTED', 'POINTS', 'OPPONENT', 'LOCATION', 'DATE',
+     'SEASON', 'LABEL', 'MAKE', 'ATTEMPT'
+]
+
+
 # ----------------------------------------------------------------------------
-@st.cache_data(show_spinner=True)
+def summarize_shots(plays):
+     '''
+     Shot totals per team, game, spot and paint touch, the grain the
+     team and opponent shot chart queries used to return.
+     '''
+     totals = (
+          plays.groupby(by=SHOT_GROUP_COLUMNS, as_index=False, dropna=False)
+               .agg(MAKES=('MAKE', 'sum'),
+                    HEAVILY_GUARDED=('HEAVILY_GUARDED', 'sum'),
+                    ATTEMPTS=('ATTEMPT', 'sum'))
+     )
+     attempts = totals['ATTEMPTS'].where(totals['ATTEMPTS'] != 0)
+     totals['MAKE_PERCENT'] = (totals['MAKES'] / attempts).fillna(0)
+     totals['HG_PERCENT'] = (totals['HEAVILY_GUARDED'] / attempts).fillna(0)
+     totals['POINTS_PER_ATTEMPT'] = (
+          totals['POINTS'] * totals['MAKES'] / attempts
+     ).fillna(0)
+     return totals
+
+
+# ----------------------------------------------------------------------------
+@st.cache_data(show_spinner=True, ttl=300)
 def get_game_data():
-     team_data = data_source.run_query(
-        sql=sql.team_shot_chart_sql(), connection=sql_lite_connect
-    )
-     opp_data = data_source.run_query(
-          sql=sql.opp_shot_chart_sql(), connection=sql_lite_connect
+     # One scan of PLAYS for both teams' totals and the play by play
+     plays = data_source.run_query(
+          sql=sql.team_shot_chart_plays_sql(), connection=sql_lite_connect
      )
-     play_by_play = data_source.run_query(
-          sql=sql.get_play_by_play_sql(), connection=sql_lite_connect
+     totals = summarize_shots(plays)
+     team_data = totals[totals['TEAM'] == 'NDA'].reset_index(drop=True)
+     opp_data = totals[totals['TEAM'] == 'OPP'].reset_index(drop=True)
+     play_by_play = (
+          plays.loc[plays['ON_ROSTER'] == 1, PLAY_BY_PLAY_COLUMNS]
+               .reset_index(drop=True)
      )
      return team_data, opp_data, play_by_play
 
 
+# ----------------------------------------------------------------------------
+@st.cache_resource(ttl=300)
+def load_game_index(team_data):
+     # get_game_data hands back a copy each rerun; key the index on its
+     # contents instead of rebuilding it
+     return schedule.GameIndex(team_data)
+
+# ----------------------------------------------------------------------------
+@st.cache_resource(ttl=300)
+def get_shot_locations():
+     # cache_resource hands back the same frame each rerun, so the hexbin
+     # engine built on it keeps its binned totals
+     return data_source.run_query(
+          sql=sql.shot_locations_sql(), connection=sql_lite_connect
+     )
+
+
 # ----------------------------------------------------------------------------
 @st.cache_data(show_spinner=True)
 def filter_team_data(team_data):
@@ -42,24 +92,8 @@ def filter_team_data(team_data):
 
 # ----------------------------------------------------------------------------
 def get_selected_games(games_selected, team_data_filtered):
-     data_from_game_selected = pd.DataFrame(
-          data=games_selected, columns=['U_ID']
-     )
-     data_from_game_selected['OPP'] = (
-          data_from_game_selected['U_ID'].str.split(pat=' - ').str[0]
-     )
-     data_from_game_selected['DATE'] = (
-          data_from_game_selected['U_ID']
-                                 .str.split(pat=' - ')
-                                 .str[1]
-                                 .str.strip()
-     )
-     opponents = data_from_game_selected['OPP'].unique().tolist()
-
-     dates = data_from_game_selected['DATE'].unique().tolist()
      this_game = team_data_filtered[
-          (team_data_filtered['OPPONENT'].isin(opponents))
-          & (team_data_filtered['DATE'].isin(dates))
+          team_data_filtered['GAME_ID'].isin(games_selected)
      ]
      return this_game
 
@@ -90,60 +124,8 @@ def format_selected_games(this_game):
 # ----------------------------------------------------------------------------
 @st.cache_data
 def get_grades(pbp):
-     shot_map = {
-     ('RB2', 'OPEN'): 'A',
-     ('RB2', 'GUARDED'): 'B',
-     ('RB2', 'HEAVILY_GUARDED'): 'C',
-     ('LB2', 'OPEN'): 'A',
-     ('LB2', 'GUARDED'): 'B',
-     ('LB2', 'HEAVILY_GUARDED'): 'C',
-     ('ML2', 'OPEN'): 'A',
-     ('ML2', 'GUARDED'): 'B',
-     ('ML2', 'HEAVILY_GUARDED'): 'C',
-     ('FT2', 'OPEN'): 'C',
-     ('FT2', 'GUARDED'): 'D',
-     ('FT2', 'HEAVILY_GUARDED'): 'F',
-     ('LE2', 'OPEN'): 'C',
-     ('LE2', 'GUARDED'): 'D',
-     ('LE2', 'HEAVILY_GUARDED'): 'F',
-     ('RE2', 'OPEN'): 'C',
-     ('RE2', 'GUARDED'): 'D',
-     ('RE2', 'HEAVILY_GUARDED'): 'F',
-     ('LMR2', 'OPEN'): 'C',
-     ('LMR2', 'GUARDED'): 'D',
-     ('LMR2', 'HEAVILY_GUARDED'): 'F',
-     ('RMR2', 'OPEN'): 'C',
-     ('RMR2', 'GUARDED'): 'D',
-     ('RMR2', 'HEAVILY_GUARDED'): 'F',
-     ('LC3', 'OPEN'): 'A',
-     ('LC3', 'GUARDED'): 'C',
-     ('LC3', 'HEAVILY_GUARDED'): 'F',
-     ('LW3', 'OPEN'): 'A',
-     ('LW3', 'GUARDED'): 'C',
-     ('LW3', 'HEAVILY_GUARDED'): 'F',
-     ('TK3', 'OPEN'): 'A',
-     ('TK3', 'GUARDED'): 'C',
-     ('TK3', 'HEAVILY_GUARDED'): 'F',
-     ('RW3', 'OPEN'): 'A',
-     ('RW3', 'GUARDED'): 'C',
-     ('RW3', 'HEAVILY_GUARDED'): 'F',
-     ('RC3', 'OPEN'): 'A',
-     ('RC3', 'GUARDED'): 'C',
-     ('RC3', 'HEAVILY_GUARDED'): 'F',
-     }
-     map_gpa = {
-          'A': 4,
-          'B': 3,
-          'C': 2,
-          'D': 1,
-          'F': 0
-     }
-
-     pbp['SHOT_LIST'] = list(zip(pbp['SHOT_SPOT'], pbp['SHOT_DEFENSE']))
      pbp['POINTS'] = pbp['SHOT_SPOT'].str[-1].astype(int)
-     pbp['SCORE'] = pbp['SHOT_LIST'].map(shot_map)
-     pbp = pbp.dropna()
-     pbp['GPA'] = pbp['SCORE'].map(map_gpa)
+     pbp = shot_grading.grade_shots(pbp)
      pbp['TEAM'] = np.where(
           pbp['PLAYER_ID'] == '0', 'OPP', 'NDA'
      )
@@ -240,31 +222,9 @@ def get_shot_data(totals_sorted):
              three_total_makes, three_total_attempts,
              three_pt_percent, fts_makes, fts_attempts)
 
-# ----------------------------------------------------------------------------
-@st.cache_data
-def clean_team_totals(totals):
-     totals = (
-          totals[totals['SHOT_SPOT'].str[-1] != '1']
-                .reset_index(drop=True)
-     )
-     totals['HG_COUNT'] = totals['HG_PERCENT'] * totals['ATTEMPTS']
-     totals_new = (
-          totals.groupby(by=['SHOT_SPOT', 'XSPOT', 'YSPOT'],
-                         as_index=False)
-                .agg(
-                     MAKES=('MAKES', 'sum'),
-                     ATTEMPTS=('ATTEMPTS', 'sum'),
-                     MAKE_PERCENT=('MAKE_PERCENT', 'mean'),
-                     HG_COUNT=('HG_COUNT', 'mean'))
-     )
-     totals_new['POINTS'] = totals['SHOT_SPOT'].str[-1].astype(int)
-     totals_new['POINTS_PER_ATTEMPT'] = (
-          (totals_new['MAKES']*totals_new['POINTS']) 
-          / totals_new['ATTEMPTS']
-     ).round(3)
-     return totals_new
-
 team_data, opp_data, pbp_data = get_game_data()
+shot_locations = get_shot_locations()
+game_index = load_game_index(team_data)
 
 team_data_filtered = filter_team_data(team_data=team_data)
 opp_data_filtered = filter_team_data(team_data=opp_data)
@@ -280,15 +240,12 @@ with col1:
           label='Select Season', options=season_list, horizontal=True
      )
 
-this_year = (
-          team_data_filtered[team_data_filtered['SEASON'] == season]
-                         .sort_values(by='GAME_ID')
-)
-games = this_year['U_ID'].unique()
 with col2:
+     # GAME_IDs, newest first, shown as 'OPPONENT - DATE'
      games_selected = st.multiselect(
           label='Choose Games',
-          options=reversed(games),
+          options=game_index.game_ids_for(season=season),
+          format_func=game_index.label,
           placeholder='Select one or more games to view shot chart'
      )
 if games_selected:
@@ -311,6 +268,10 @@ if games_selected:
                options=['NDA', 'Opponent'],
                horizontal=True
           )
+          bin_size = st.select_slider(
+               label='Bin Size', options=[10, 15, 20, 30],
+               value=int(ut.HEX_SIZE)
+          )
           st.metric(
                label='NDA Shot Selection GPA',
                value=pbp_nda_gpa.round(2)
@@ -335,7 +296,11 @@ if games_selected:
           twos_percent = (twos_makes / twos_attempts) * 100 if twos_attempts > 0 else 0
           threes_percent = (three_total_makes / three_total_attempts) * 100 if three_total_attempts > 0 else 0
           fts_percent = (fts_makes / fts_attempts) * 100 if fts_attempts > 0 else 0
-          totals_new = clean_team_totals(totals=totals)
+          totals_new = ut.get_hexbin_engine(shot_locations).bins(
+               size=bin_size,
+               GAME_ID=this_game['GAME_ID'].unique().tolist(),
+               TEAM='OPP' if select_team == 'Opponent' else 'NDA'
+          )
           with buttons:
                st.write('### Shot Selection Totals')
                st.write(f'Two Point Shots: {twos_makes}/{twos_attempts} ({twos_percent.round(1)}%)')
@@ -3,14 +3,16 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import polars as pl
-from py import sql, data_source
-import joblib
+from py import sql, data_source, simulation, feature_store, scoring, schedule
 
 pd.options.mode.chained_assignment = None
 
-st.cache_resource.clear()
+PARALLEL_SIMS = 50000
 
-sql_lite_connect = st.secrets['nda_gbb_connection']['DB_CONNECTION']
+# Read-only page: prefer a local SQLite/DuckDB replica when one is set.
+sql_lite_connect = st.secrets['nda_gbb_connection'].get(
+    'ANALYTICS_CONNECTION', st.secrets['nda_gbb_connection']['DB_CONNECTION']
+)
 
 effective_field_goal_description = '''
 Effective FG% is a useful metric to understand shot selection.
@@ -28,16 +30,21 @@ liklihood of the shot being made.
 Example: 33% chance of making a 3 pointer is 0.33 * 3 = 1 expected point.
 '''
 # ----------------------------------------------------------------------------
-@st.cache_resource
+@st.cache_resource(ttl=300)
 def load_data():
     game_summary = data_source.run_query(
-        sql=sql.get_game_summary_sql(), connection=sql_lite_connect
+        sql=sql.get_game_summary_sql(),
+        connection=sql_lite_connect,
+        output='polars',
+        dtypes=data_source.DTYPES
     )
+    # Same load as scoring, so the feature store fingerprints agree
     player_data = data_source.run_query(
-        sql=sql.get_play_by_play_sql(), connection=sql_lite_connect
+        sql=sql.get_play_by_play_sql(),
+        connection=sql_lite_connect,
+        output='polars',
+        dtypes=data_source.ID_DTYPES
     )
-    game_summary = pl.from_pandas(data=game_summary)
-    player_data = pl.from_pandas(data=player_data)
     return game_summary, player_data
 
 
@@ -91,7 +98,9 @@ def format_data(
 
 #-------------------------------------------------------------------------------
 def get_games_data(
-        player_data: pl.DataFrame, game_summary: pl.DataFrame, game: str
+        player_data: pl.DataFrame,
+        game_summary: pl.DataFrame,
+        game: schedule.Game
     ):
     '''
     Get game data for the selected game.
@@ -99,7 +108,7 @@ def get_games_data(
     Args:
     player_data (pd.DataFrame): DataFrame containing player data.
     game_summary (pd.DataFrame): DataFrame containing game summary data.
-    game (str): The label of the game to retrieve data for.
+    game (schedule.Game): The game to retrieve data for.
 
     Returns:
     tuple: A tuple containing two DataFrames:
@@ -111,18 +120,14 @@ def get_games_data(
     #t_game = player_data[player_data['LABEL'] == game]
     #game_data = game_summary[game_summary['LABEL'] == game]
     t_game = player_data.filter(
-        pl.col(name='LABEL') == game
+        pl.col(name='GAME_ID') == game.game_id
     )
     game_data = game_summary.filter(
-        pl.col(name='LABEL') == game
+        pl.col(name='GAME_ID') == game.game_id
     )
-    game_data = (
-        game_data.with_columns(
-            DATE_DTTM=pl.col(name='DATE').str.strptime(
-                dtype=pl.Datetime, fmt='%Y-%m-%d'
-            )
-        )
-        .sort(by='DATE_DTTM')
+    # Date already parsed by the game index
+    game_data = game_data.with_columns(
+        DATE_DTTM=pl.lit(game.date.to_pydatetime())
     )
     #game_data.loc[:, 'DATE_DTTM'] = pd.to_datetime(game_data['DATE'])
     #game_data = game_data.sort_values(by='DATE_DTTM')
@@ -130,230 +135,6 @@ def get_games_data(
 
 
 # ----------------------------------------------------------------------------
-def build_features(player_data):
-    '''
-    Build features for basketball play events.
-
-    Parameters:
-    play_event (pd.DataFrame): DataFrame containing play event data.
-    spot (pd.DataFrame): DataFrame containing spot data.
-    players (pd.DataFrame): DataFrame containing player data.
-    games (pd.DataFrame): DataFrame containing game data.
-
-    Returns:
-    pd.DataFrame: DataFrame with additional features built from the input data.
-    
-    Features created:
-    - INTIAL_PERCENTAGE: Initial percentage based on player ID.
-    - MAKE: Binary indicator if the shot was made.
-    - ATTEMPT: Binary indicator of a shot attempt.
-    - INIT_EXPECTED: Initial expected points.
-    - SPOT_TOTAL_MAKES: Total makes by spot.
-    - SPOT_TOTAL_ATTEMPTS: Total attempts by spot.
-    - SPOT_TOTAL_PERCENTAGE: Shooting percentage by spot.
-    - GAME_MAKES: Total makes in the game.
-    - GAME_ATTEMPTS: Total attempts in the game.
-    - GAME_PERCENTAGE: Shooting percentage in the game.
-    - GAME_TOTAL_MAKES: Total makes in the game by year.
-    - GAME_TOTAL_ATTEMPTS: Total attempts in the game by year.
-    - SHOT_DEFENSE_CODED: Coded shot defense.
-    - GAME_ROLLING_MAKES: Rolling sum of makes in the game.
-    - GAME_ROLLING_ATTEMPTS: Rolling sum of attempts in the game.
-    - ROLLING_PERCENT: Rolling shooting percentage.
-    - SEASON_LAST_5: Rolling sum of makes in the last 5 games.
-    - SEASON_LAST_5_ATTEMPTS: Rolling sum of attempts in the last 5 games.
-    - SEASON_LAST_5_PERCENT: Rolling shooting percentage in the last 5 games.
-    - HOME_FLAG: Binary indicator if the game is at home.
-    - ACTUAL_POINTS: Actual points scored.
-    - TEAM: Team identifier.
-    - ROLLING_POINTS_TEAM: Rolling sum of points by team.
-    - GAME_TEAM_MAKES: Total makes by team in the game.
-    - GAME_TEAM_ATTEMPTS: Total attempts by team in the game.
-    - GAME_TEAM_PERCENTAGE: Shooting percentage by team in the game.
-    - LAST_ROLLING_POINTS_TEAM_NDA: Last rolling points for NDA team.
-    - LAST_ROLLING_POINTS_TEAM_OPPONENT: Last rolling points for opponent team.
-    - TEAM_SPREAD: Difference in rolling points between teams.
-    '''
-    CODED_SHOT_DEFENSE = {
-        'OPEN': 0,
-        'GUARDED': 1,
-        'HEAVILY_GUARDED': 2,
-        'Heavily Guarded': 2,
-        'Guarded': 1
-    }
-    _player_merge_list = ['PLAYER_ID', 'SPOT', 'SHOT_DEFENSE', 'YEAR']
-    _player_game_merge_list = ['GAME_ID', 'PLAYER_ID', 'YEAR', 'SPOT', 'SHOT_DEFENSE']
-    _player_year_list = ['GAME_ID', 'PLAYER_ID', 'YEAR']
-    _player_game_list = ['GAME_ID', 'PLAYER_ID', 'YEAR', 'SHOT_DEFENSE']
-    _team_game_list = ['GAME_ID', 'TEAM', 'YEAR', 'SPOT', 'SHOT_DEFENSE']
-    play_event_spot = (
-        player_data.sort(by=['GAME_ID', 'PLAY_NUM'])
-                   .with_columns(
-                       INTIAL_PERCENTAGE=pl.when(
-                            condition=pl.col(name='PLAYER_ID') == '0'
-                          ).then(
-                            statement=pl.col(name='OPP_EXPECTED') / pl.col(name='POINTS')
-                          ).otherwise(statement=0.33),
-                       MAKE=pl.when(condition=pl.col(name='MAKE_MISS') == 'Y')
-                              .then(statement=1)
-                              .otherwise(statement=0),
-                       ATTEMPT=1
-                   )
-    )
-    #play_event_spot = player_event_spot.to_pandas()
-    play_event_spot = play_event_spot.with_columns(
-        INIT_EXPECTED=(
-            pl.col(name='INTIAL_PERCENTAGE') * pl.col(name='POINTS')
-        ),
-        SPOT_TOTAL_MAKES=(
-            pl.col(name='MAKE')
-              .sum()
-              .over(_player_merge_list)
-        ),
-        SPOT_TOTAL_ATTEMPTS=(
-            pl.col(name='ATTEMPT')
-              .sum()
-              .over(_player_merge_list)
-        ),
-    )
-    play_event_spot = (
-        play_event_spot.with_columns(
-            SPOT_TOTAL_PERCENTAGE=(
-                pl.col(name='SPOT_TOTAL_MAKES')
-                / pl.col(name='SPOT_TOTAL_ATTEMPTS')
-            ),
-            GAME_MAKES=(
-                pl.col(name='MAKE')
-                  .sum()
-                  .over(_player_game_merge_list)
-            ),
-            GAME_ATTEMPTS=(
-                pl.col('ATTEMPT')
-                  .sum()
-                  .over(_player_game_merge_list)
-            ),
-            GAME_TOTAL_MAKES=(
-                pl.col('MAKE')
-                  .sum()
-                  .over(_player_year_list)
-            ),
-            GAME_TOTAL_ATTEMPTS=(
-                pl.col('ATTEMPT')
-                  .sum()
-                  .over(_player_year_list)
-            )
-        )
-    )
-    #play_event_spot = play_event_spot.to_pandas()
-    play_event_spot = play_event_spot.with_columns(
-        GAME_PERCENTAGE=(
-            pl.col(name='GAME_MAKES') / pl.col(name='GAME_ATTEMPTS')
-        ),
-        SHOT_DEFENSE_CODED=(
-            pl.col(name='SHOT_DEFENSE').map_dict(CODED_SHOT_DEFENSE)
-        )
-    )
-    play_event_spot = play_event_spot.with_columns(
-        GAME_ROLLING_MAKES=(
-            pl.col('MAKE')
-              .rolling_sum(window_size=1000, min_periods=0)
-              .over(_player_game_list)
-        ),
-        GAME_ROLLING_ATTEMPTS=(
-            pl.col('ATTEMPT')
-              .rolling_sum(window_size=1000, min_periods=0)
-                .over(_player_game_list)
-        ),
-        SEASON_LAST_5=(
-            pl.col('MAKE')
-              .rolling_sum(window_size=5, min_periods=0)
-              .over(['PLAYER_ID', 'YEAR'])
-        ),
-        SEASON_LAST_5_ATTEMPTS=(
-            pl.col('ATTEMPT')
-              .rolling_sum(window_size=5, min_periods=0)
-              .over(['PLAYER_ID', 'YEAR'])
-        ),
-        HOME_FLAG=(
-            pl.when(condition=pl.col(name='LOCATION') == 'Home')
-              .then(statement=1)
-              .otherwise(statement=0)
-        ),
-        ACTUAL_POINTS=(
-            pl.col(name='MAKE') * pl.col(name='POINTS')
-        ),
-        TEAM=(
-            pl.when(condition=pl.col(name='PLAYER_ID') == '0')
-              .then(statement='OPPONENT')
-              .otherwise(statement='NDA')
-        )
-
-    )
-    play_event_spot = play_event_spot.with_columns(
-        ROLLING_PERCENT=(
-            pl.col(name='GAME_ROLLING_MAKES')
-            / pl.col(name='GAME_ROLLING_ATTEMPTS')
-        ),
-        SEASON_LAST_5_PERCENT=(
-            pl.col(name='SEASON_LAST_5')
-            / pl.col(name='SEASON_LAST_5_ATTEMPTS')
-        ),
-        ROLLING_POINTS_TEAM=(
-            pl.col('ACTUAL_POINTS')
-            .rolling_sum(window_size=1000, min_periods=0)
-            .over(['GAME_ID', 'YEAR', 'TEAM'])
-        ),
-        GAME_TEAM_MAKES=(
-            pl.col('MAKE')
-            .sum()
-            .over(_team_game_list)
-        ),
-        GAME_TEAM_ATTEMPTS=(
-            pl.col('ATTEMPT')
-            .sum()
-            .over(_team_game_list)
-        ),
-    )
-    play_event_spot = play_event_spot.with_columns(
-        GAME_TEAM_PERCENTAGE=(
-            pl.col(name='GAME_TEAM_MAKES')
-            / pl.col(name='GAME_TEAM_ATTEMPTS')
-        ),
-        LAST_ROLLING_POINTS_TEAM_NDA=(
-            pl.when(pl.col('TEAM') == 'NDA')
-            .then(pl.col('ROLLING_POINTS_TEAM').shift(1).over('GAME_ID'))
-            .otherwise(None)
-        )
-    )
-    play_event_spot = play_event_spot.with_columns(
-        LAST_ROLLING_POINTS_TEAM_NDA=(
-            pl.col('LAST_ROLLING_POINTS_TEAM_NDA')
-            .fill_null(strategy='forward')
-            .fill_null(value=0)
-        ),
-        LAST_ROLLING_POINTS_TEAM_OPPONENT=(
-            pl.when(pl.col('TEAM') == 'OPPONENT')
-            .then(pl.col('ROLLING_POINTS_TEAM').shift(1).over('GAME_ID'))
-            .otherwise(None)
-        )
-    )
-    play_event_spot = play_event_spot.with_columns(
-        LAST_ROLLING_POINTS_TEAM_OPPONENT=(
-            pl.col('LAST_ROLLING_POINTS_TEAM_OPPONENT')
-            .fill_null(strategy='forward')
-            .fill_null(value=0)
-        )
-    )
-    play_event_spot = play_event_spot.with_columns(
-        TEAM_SPREAD=(
-            pl.col('ROLLING_POINTS_TEAM') 
-            - pl.col('LAST_ROLLING_POINTS_TEAM_OPPONENT')
-        )
-    )
-    #play_event_spot = play_event_spot.to_pandas()
-    # Compute LAST_ROLLING_POINTS_TEAM_NDA in polars before converting to pandas
-    return play_event_spot
-
 def apply_model(play_event_spot):
     '''
     Apply a pre-trained model to predict the expected 
@@ -390,21 +171,9 @@ def apply_model(play_event_spot):
             as the product of 'PROB' and 'POINTS'.
         - 'LABEL': A label combining the 'OPPONENT' and 'DATE' columns.
     '''
-    pipeline = joblib.load(filename='pipeline.pkl')
-    model_columns = [
-    'XSPOT', 'YSPOT',
-     'INTIAL_PERCENTAGE',
-    'SHOT_DEFENSE_CODED', 'INIT_EXPECTED',
-    'HOME_FLAG',  'OPP_EXPECTED',
-    'LAST_ROLLING_POINTS_TEAM_OPPONENT', 
-    'LAST_ROLLING_POINTS_TEAM_NDA'
-    ]
-    X = play_event_spot.select(model_columns)
-    #X = play_event_spot[model_columns]
-    play_event_spot = (
-        play_event_spot.with_columns(
-            PROB=pl.lit(pipeline.predict_proba(X)[:, 1])
-        )
+    # Scores written at ingest time; plays not scored yet are scored live
+    play_event_spot = scoring.attach_scores(
+        features=play_event_spot, connection=sql_lite_connect
     )
     play_event_spot = play_event_spot.with_columns(
         EXPECTED_POINTS=(
@@ -426,7 +195,7 @@ def apply_model(play_event_spot):
 def get_expected_points(play_event_spot, this_game):
     #return play_event_spot[play_event_spot['LABEL'] == this_game]
     game = play_event_spot.filter(
-        pl.col(name='LABEL') == this_game
+        pl.col(name='GAME_ID') == this_game.game_id
     )
     #game = game.to_pandas()
     return game
@@ -434,135 +203,36 @@ def get_expected_points(play_event_spot, this_game):
 
 
 #-----------------------------------------------------------------------------
-def run_simulations(tritons, opp, sims, standard_dev):
+def run_simulations(tritons, opp, sims, standard_dev, seed=None):
     '''
-    for sim_count in range(sims):
     Parameters:
     tritons (DataFrame): DataFrame containing Tritons' game data.
     opp (DataFrame): DataFrame containing opponent's game data.
     sims (int): Number of simulations to run.
     standard_dev (float): Standard deviation for the normal distribution.
+    seed (int): Seed for a repeatable run, None for a fresh one.
 
     Returns:
     DataFrame: DataFrame containing the results of all simulations.
     '''
-    my_frame_list = []
-    sim_count = 0
     my_bar = st.progress(0)
-    while sim_count < sims:
-        this_sim_nda = tritons
-        this_sim_opp = opp
-        probs_opp = this_sim_opp['PROB'].to_numpy()
-        simulated_opp = np.random.normal(loc=probs_opp, scale=standard_dev)
-        probs_nda = this_sim_nda['PROB'].to_numpy()
-        simulated_nda = np.random.normal(loc=probs_nda, scale=standard_dev)
-        this_sim_opp = this_sim_opp.with_columns(
-            pl.Series('SIMULATED_PERCENT', simulated_opp)
-        )
-        this_sim_opp = this_sim_opp.with_columns(
-            SIMULATED_PERCENT=(
-                pl.when(pl.col(name='SIMULATED_PERCENT') < 0)
-                  .then(0)
-                  .otherwise(pl.col(name='SIMULATED_PERCENT'))
-            )
-        )
-        this_sim_opp = this_sim_opp.with_columns(
-            SIMULATED_PERCENT=(
-                pl.when(pl.col(name='SIMULATED_PERCENT') > 1)
-                  .then(1)
-                  .otherwise(pl.col(name='SIMULATED_PERCENT'))
-            )
-        )
-        this_sim_opp = this_sim_opp.with_columns(
-            SIMULATED_EXPECTED=(
-                pl.col(name='POINTS') * pl.col(name='SIMULATED_PERCENT')
-            )
-        )
-        this_sim_opp = this_sim_opp.with_columns(
-            SIMULATED_POINTS=(
-                pl.col(name='ATTEMPT') * pl.col(name='SIMULATED_EXPECTED')
-            )
-        )
-        this_sim_nda = this_sim_nda.with_columns(
-            pl.Series('SIMULATED_PERCENT', simulated_nda)
-        )
-        this_sim_nda = this_sim_nda.with_columns(
-            SIMULATED_PERCENT=(
-                pl.when(pl.col(name='SIMULATED_PERCENT') < 0)
-                  .then(0)
-                  .otherwise(pl.col(name='SIMULATED_PERCENT'))
-            )
-        )
-        this_sim_nda = this_sim_nda.with_columns(
-            SIMULATED_PERCENT=(
-                pl.when(pl.col(name='SIMULATED_PERCENT') > 1)
-                  .then(1)
-                  .otherwise(pl.col(name='SIMULATED_PERCENT'))
-            )
-        )
-        this_sim_nda = this_sim_nda.with_columns(
-            SIMULATED_EXPECTED=(
-                pl.col(name='POINTS') * pl.col(name='SIMULATED_PERCENT')
-            )
-        )
-        this_sim_nda = this_sim_nda.with_columns(
-            SIMULATED_POINTS=(
-                pl.col(name='ATTEMPT') * pl.col(name='SIMULATED_EXPECTED')
-            )
-        )
-        this_sim_opp = this_sim_opp.with_columns(
-            SIMULATED_POINTS=(
-                pl.when(pl.col(name='SIMULATED_POINTS') < 0)
-                  .then(0)
-                  .otherwise(pl.col(name='SIMULATED_POINTS'))
-            ),
-            RUN=pl.lit(sim_count)
-        )
-        this_sim_nda = this_sim_nda.with_columns(
-            SIMULATED_POINTS=(
-                pl.when(pl.col(name='SIMULATED_POINTS') < 0)
-                  .then(0)
-                  .otherwise(pl.col(name='SIMULATED_POINTS'))
-            ),
-            RUN=pl.lit(sim_count)
-        )
-        this_sim_simple_nda = (
-            this_sim_nda.groupby('RUN')
-                .agg(
-                    NDA_SIMULATED_POINTS=pl.col('SIMULATED_POINTS').sum()
-                )
-        )
-        this_sim_simple_opp = (
-            this_sim_opp.groupby('RUN')
-                .agg(
-                    OPP_SIMULATED_POINTS=pl.col('SIMULATED_POINTS').sum()
-                )
-        )
-        #this_sim_simple = pd.merge(
-        #    left=this_sim_simple_nda, right=this_sim_simple_opp, on='RUN'
-        #)
-        this_sim_simple = this_sim_simple_nda.join(
-            other=this_sim_simple_opp, on='RUN', how='inner'
-        )
-        this_sim_simple = this_sim_simple.with_columns(
-            WIN=pl.when(
-                pl.col(name='NDA_SIMULATED_POINTS') 
-                > pl.col(name='OPP_SIMULATED_POINTS')
-            ).then(1).otherwise(0)
-        )
-        sim_count += 1
-        percent_complete = sim_count / sims
-        my_bar.progress(value=percent_complete)
-        my_frame_list.append(this_sim_simple)
-    all_sims = pl.concat(my_frame_list)
+    all_sims = simulation.run_simulations(
+        tritons=tritons,
+        opp=opp,
+        sims=sims,
+        standard_dev=standard_dev,
+        seed=seed,
+        on_chunk=lambda done: my_bar.progress(value=done),
+        # Big runs are CPU bound; spread them over every core
+        workers=0 if sims >= PARALLEL_SIMS else None
+    )
     return all_sims
 
 
 game_summary, player_data = load_data()
-play_event_spot = build_features(
-    player_data=player_data
-)
-play_event_spot = apply_model(play_event_spot=play_event_spot)
+game_index = schedule.get_game_index(player_data)
+# Features are persisted per game; only games whose plays changed rebuild
+play_event_spot = feature_store.load_features(player_data=player_data)
 game_summary = (
     game_summary.with_columns(
         SEASON2=pl.col(name='SEASON').cast(dtype=pl.Int64)
@@ -581,12 +251,16 @@ if season:
     )
 
 
-    games_list = player_data.select('LABEL').unique().to_series().to_list()
-    games_list = sorted(games_list, key=lambda x: pd.to_datetime(x.split(' - ')[1]) ,reverse=True)
     with col2:
-        game = st.selectbox(label='Select Game', options=games_list)
+        # Newest game first, shown as 'OPPONENT - DATE'
+        game_id = st.selectbox(
+            label='Select Game',
+            options=game_index.game_ids_for(season=season),
+            format_func=game_index.label
+        )
 
-    if game != []:
+    if game_id is not None:
+        game = game_index[game_id]
         t_game, game_data = get_games_data(
             player_data=player_data,
             game_summary=game_summary,
@@ -596,7 +270,9 @@ if season:
         this_game = get_expected_points(
             play_event_spot=play_event_spot, this_game=game
         )
-        opp_team_name = game.split(' - ')[0]
+        # Only the selected game is scored
+        this_game = apply_model(play_event_spot=this_game)
+        opp_team_name = game.opponent
         last_20 = this_game.sort(by='PLAY_NUM')
         last_20 = this_game.tail(50)
         last_20 = last_20[[
@@ -736,13 +412,13 @@ if season:
                 label=f'{opp_team_name} EFG%',
                 help=effective_field_goal_description
             )
-        sims, std = st.columns(spec=2)
+        sims, std, seed_col = st.columns(spec=3)
 
         with sims:
             sim_count = st.number_input(
                 label='Number of Simulations',
                 min_value=1,
-                max_value=10000,
+                max_value=500000,
                 value=500
             )
         
@@ -754,6 +430,14 @@ if season:
                 value=0.3
             )
 
+        with seed_col:
+            seed = st.number_input(
+                label='Seed',
+                min_value=0,
+                value=0,
+                help='Use the same non-zero seed to repeat a run exactly; 0 draws a fresh one'
+            )
+
         run_sim = st.button(label='Run Simulation')
         if run_sim:
             st.write('Running Simulation...')
@@ -761,18 +445,21 @@ if season:
                 tritons=tritons,
                 opp=opp,
                 sims=sim_count,
-                standard_dev=standard_dev
+                standard_dev=standard_dev,
+                seed=int(seed) or None
             )
-            nda_win_percent = (
-                all_sims['WIN'].mean()
+            nda_win_percent, win_low, win_high = simulation.win_probability(
+                all_sims=all_sims
             )
 
             win_percent, twenty_five, seventy_five = st.columns(spec=3)
             with win_percent:
                 st.metric(
                     label=f'NDA Win % of simulations',
-                    value=f'{nda_win_percent:.1%}'
+                    value=f'{nda_win_percent:.1%}',
+                    help=f'95% confidence interval: {win_low:.1%} - {win_high:.1%}'
                 )
+                st.caption(f'95% CI {win_low:.1%} - {win_high:.1%}')
                 
             with twenty_five:
                 st.metric(
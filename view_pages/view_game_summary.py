@@ -2,7 +2,7 @@ import streamlit as st
 import plotly.express as px
 import pandas as pd
 import polars as pl
-from py import sql, data_source
+from py import sql, data_source, metrics, schedule
 pd.options.mode.chained_assignment = None
 
 st.cache_resource.clear()
@@ -37,100 +37,6 @@ def get_team_games(game_summary):
     return team_data
 
 
-# ----------------------------------------------------------------------------
-def apply_derived(data):
-    data = pl.from_pandas(data)
-    data = data.with_columns(
-        TWO_POINTS_SCORED=(2 * pl.col(name='TWO_FGM')),
-        THREE_POINTS_SCORED=(3 * pl.col(name='THREE_FGM'))
-    )
-    data = data.with_columns(
-        TOTAL_POINTS_SCORED=(
-            pl.col(name='TWO_POINTS_SCORED') 
-            + pl.col(name='THREE_POINTS_SCORED')
-            + pl.col(name='FTM')
-        ),
-        FIELD_POINTS_SCORED=(
-            pl.col(name='TWO_POINTS_SCORED')
-            + pl.col(name='THREE_POINTS_SCORED')
-        ),
-        OE_NUM=(
-            pl.col(name='FGM') + pl.col(name='ASSISTS')
-        ),
-        OE_DENOM=(
-            pl.col(name='FGA')
-            - pl.col(name='OFFENSIVE_REBOUNDS') 
-            + pl.col(name='ASSISTS') 
-            + pl.col(name='TURNOVER')
-        ),
-        EFG_NUM=(
-            pl.col(name='TWO_FGM') + (1.5*pl.col(name='THREE_FGM'))
-        ),
-        POSSESSIONS=(
-            (pl.col(name='FGA')-pl.col(name='OFFENSIVE_REBOUNDS'))
-               + pl.col(name='TURNOVER') 
-               + (.44 * pl.col(name='FTA'))
-        )
-    )
-    data = data.with_columns(
-        TURNOVER_RATE=(
-            pl.col(name='TURNOVER') / pl.col(name='POSSESSIONS')
-        )
-    )
-    data = data.with_columns(
-        pl.when(condition=pl.col(name='TWO_FGA') > 0)
-          .then(statement=pl.col(name='TWO_POINTS_SCORED') 
-                / pl.col(name='TWO_FGA'))
-          .otherwise(statement=0)
-          .alias(name='2PPA'),
-        pl.when(condition=pl.col(name='THREE_FGA') > 0)
-          .then(statement=pl.col(name='THREE_POINTS_SCORED') 
-              / pl.col(name='THREE_FGA'))
-          .otherwise(statement=0)
-          .alias(name='3PPA'),
-        pl.when(condition=pl.col(name='FGA') > 0)
-          .then(statement=pl.col(name='FIELD_POINTS_SCORED') 
-                / pl.col(name='FGA'))
-          .otherwise(statement=0)
-          .alias(name='PPA'),
-        pl.when(condition=pl.col(name='OE_DENOM') != 0)
-          .then(statement=pl.col(name='OE_NUM') 
-                / pl.col(name='OE_DENOM'))
-          .otherwise(statement=0)
-          .alias(name='OFFENSIVE_EFFICENCY'),
-        pl.when(condition=pl.col(name='FGA') > 0)
-          .then(statement=pl.col(name='EFG_NUM') 
-                / pl.col(name='FGA'))
-          .otherwise(statement=0)
-          .alias(name='EFG%'),
-
-    )
-    data = data.with_columns(
-        EFF_POINTS=(
-            pl.col(name='POINTS') * pl.col(name='OFFENSIVE_EFFICENCY')
-        ),
-        POINTS_PER_POSSESSION=(
-            pl.col(name='POINTS') / pl.col(name='POSSESSIONS')
-        ),
-        TRUE_SHOOTING_PERCENTAGE=(
-            pl.when(condition=pl.col(name='FGA') + (.44 * pl.col(name='FTA')) > 0)
-              .then(statement=pl.col(name='POINTS') / (2 * (pl.col(name='FGA') + (.44 * pl.col(name='FTA')))))
-              .otherwise(statement=0)
-              .alias(name='TS %')
-        ),
-        FREE_THROW_RATE=(
-            pl.when(condition=pl.col(name='FGA') > 0)
-                .then(statement=pl.col(name='FTA') / pl.col(name='FGA'))
-                .otherwise(statement=0)
-                .alias(name='FTR')
-        ),
-        POSSESSIONS_PER_MINUTE=(
-            pl.col('POSSESSIONS') / 36
-        )
-    )
-    data = data.to_pandas()
-    return data
-
 # ----------------------------------------------------------------------------
 def game_seasons(game_summary, season):
     game_summary_season = (
@@ -141,21 +47,25 @@ def game_seasons(game_summary, season):
 
 # ----------------------------------------------------------------------------
 def get_game_player_details(team_data, game_summary_season, game):
-    final_data = game_summary_season[
-            game_summary_season['LABEL'].isin(values=game)
-    ]
-    team_data = team_data[team_data['LABEL'].isin(values=game)]
-    team_data = apply_derived(data=team_data)
+    team_data = metrics.apply_derived(
+        data=team_data.filter(pl.col('LABEL').is_in(game))
+    )
     team_data = (
-            team_data[list_of_stats]
+            team_data.select(list_of_stats)
+                     .to_pandas()
                      .rename(columns={'LABEL': 'Opponent'})
                      .round(decimals=4)
     )
     game_len = game_summary_season['GAME_ID'].nunique()
-    player_level = final_data.groupby(by='NAME', as_index=False).sum()
-    player_season_avg = game_summary_season.groupby(by='NAME', as_index=False).sum()
-    player_level = apply_derived(data=player_level).round(decimals=4)
-    player_season_avg = apply_derived(data=player_season_avg).round(decimals=4)
+    season_pl = pl.from_pandas(data=game_summary_season)
+    player_level = metrics.apply_derived(
+        data=season_pl.filter(pl.col('LABEL').is_in(game))
+                      .groupby(by='NAME').sum()
+                      .sort(by='NAME')
+    ).to_pandas().round(decimals=4)
+    player_season_avg = metrics.apply_derived(
+        data=season_pl.groupby(by='NAME').sum().sort(by='NAME')
+    ).to_pandas().round(decimals=4)
     player_season_avg['GAME_LEN'] = game_len
     player_season_avg['GAME_SCORE'] = player_season_avg['GAME_SCORE'] / player_season_avg['GAME_LEN']
     team_data = team_data.rename(
@@ -205,7 +115,9 @@ def get_game_player_details(team_data, game_summary_season, game):
     )
     return team_data, player_level, player_season_avg
 
-def clean_frames(team_data, player_level, player_season_avg, other_stats):
+def clean_frames(
+        team_data, player_level, player_season_avg, other_stats, game_index
+    ):
     team_data['EFG %'] = team_data['EFG %'] * 100
     team_data['TO %'] = team_data['TO %'] * 100
     team_data['TS %'] = team_data['TS %'] * 100
@@ -225,7 +137,9 @@ def clean_frames(team_data, player_level, player_season_avg, other_stats):
             'NAME': st.column_config.Column(width=125),
             'Minutes': st.column_config.NumberColumn(format="%.0f", width=None),
     }
-    team_data['DATE'] = team_data['Opponent'].apply(lambda x: x.split(' - ')[1])
+    team_data['DATE'] = [
+        game_index.by_label(label).date for label in team_data['Opponent']
+    ]
     team_data = team_data.sort_values(by='DATE', ascending=False).reset_index(drop=True)
     team_data = team_data.drop(columns=['DATE'])
 
@@ -245,9 +159,9 @@ def clean_frames(team_data, player_level, player_season_avg, other_stats):
 
 # ============================================================================
 game_summary = load_data()
+game_index = schedule.get_game_index(game_summary)
 team_data = get_team_games(game_summary=game_summary)
 col1, col2, col3 = st.columns([2, 4, 2])
-team_data = team_data.to_pandas()
 season_list = game_summary['SEASON'].unique().tolist()
 season_list = sorted(season_list, reverse=True)
 
@@ -281,7 +195,8 @@ if season_list:
             team_data=team_data,
             player_level=player_level,
             player_season_avg=player_season_avg,
-            other_stats=other_stats
+            other_stats=other_stats,
+            game_index=game_index
         )
         player_level_show = player_level[['NAME', 'TYPE'] + other_stats]
         player_level_show = player_level_show[player_level_show['TYPE'] == 'Selected Games']
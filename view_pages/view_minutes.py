@@ -1,9 +1,7 @@
 import streamlit as st
-import numpy as np
 import pandas as pd
-import ast
 import plotly.express as px
-from py import sql, data_source
+from py import sql, data_source, lineups
 pd.options.mode.chained_assignment = None
 
 st.cache_resource.clear()
@@ -44,66 +42,9 @@ def get_data():
 # ----------------------------------------------------------------------------
 @st.cache_data(show_spinner=True)
 def build_lineup_intervals(minutes_data, game_end_sec=36*60):
-    out_rows = []
-    for game_id, grp in minutes_data.groupby('GAME_ID'):
-        grp = grp.reset_index(drop=True)
-        # unique event times: all IN_SEC and OUT_SEC clipped to [0, game_end_sec]
-        times = np.unique(np.clip(np.concatenate([grp['TIME_IN'].values, grp['TIME_OUT'].values]), 0, game_end_sec))
-        times = np.sort(times)
-        # ensure we include start 0 and final end
-        if times[0] != 0:
-            times = np.insert(times, 0, 0)
-        if times[-1] != game_end_sec:
-            times = np.append(times, game_end_sec)
-        times = list(reversed(times))
-            # iterate intervals
-        for i in range(len(times) - 1):
-            start = int(times[i])
-            end = int(times[i + 1])
-            duration = start - end
-            if duration <= 0:
-                continue
-            present = grp[(grp['TIME_IN'] >= start) & (grp['TIME_OUT'] <= end)]
-            score_in_frame = grp[(grp['TIME_IN'] == start)]
-            score_out_frame = grp[(grp['TIME_OUT'] == end)]
-            my_frame = pd.DataFrame()
-            my_lineup_players = present['PLAYER_ID'].astype(int).tolist()
-            score_in = score_in_frame['TEAM_POINT_IN'].drop_duplicates().min()
-            score_out = score_out_frame['TEAM_POINT_OUT'].drop_duplicates().min()
-            opp_score_in = score_in_frame['OPP_POINT_IN'].drop_duplicates().min()
-            opp_score_out = score_out_frame['OPP_POINT_OUT'].drop_duplicates().min()
-            my_times = (start, end)
-            lineup_key = tuple(sorted(my_lineup_players))
-            lineup_start, lineup_end = my_times
-            my_dict = {
-                'TIME_IN': lineup_start,
-                'TIME_OUT': lineup_end,
-                'LINEUP_KEY': str(lineup_key),
-                'SCORE_IN': score_in,
-                'SCORE_OUT': score_out,
-                'OPP_SCORE_IN': opp_score_in,
-                'OPP_SCORE_OUT': opp_score_out,
-                'GAME_ID': game_id
-            }
-            out_rows.append(my_dict)
-    clean_lineups = pd.DataFrame(out_rows)
-
-    clean_lineups['SECONDS_PLAYED'] = (
-        clean_lineups['TIME_IN'] - clean_lineups['TIME_OUT']
-    )
-    clean_lineups['MIN_PLAYED'] = (
-        clean_lineups['SECONDS_PLAYED'] / 60
-    )
-    clean_lineups['MIN_PLAYED'] = np.where(
-        clean_lineups['MIN_PLAYED'] < 1, 1, clean_lineups['MIN_PLAYED']
-    )
-    clean_lineups['POINTS_SCORED'] = (
-        clean_lineups['SCORE_OUT'] - clean_lineups['SCORE_IN']
+    return lineups.build_lineup_intervals(
+        minutes_data=minutes_data, game_end_sec=game_end_sec
     )
-    clean_lineups['OPP_POINTS_SCORED'] = (
-        clean_lineups['OPP_SCORE_OUT'] - clean_lineups['OPP_SCORE_IN']
-    )
-    return clean_lineups
 
 def build_player_only(minute_data):
     minute_data['SECONDS_PLAYED'] = (
@@ -122,7 +63,7 @@ def build_player_only(minute_data):
 
 def group_data(clean_lineups, game_dict):
     grouped_line_data = (
-        clean_lineups.groupby(by=['LINEUP_KEY', 'GAME_ID'], as_index=False)
+        clean_lineups.groupby(by=['LINEUP_MASK', 'GAME_ID'], as_index=False)
                      .agg(TOTAL_MIN=('MIN_PLAYED', 'sum'),
                           POINTS_SCORED=('POINTS_SCORED', 'sum'),
                           OPP_POINTS_SCORED=('OPP_POINTS_SCORED', 'sum'))
@@ -135,23 +76,9 @@ def get_game_player_info(minutes_data):
     player_info = minutes_data[['GAME_ID', 'PLAYER_ID', 'PLAYER_NAME']].drop_duplicates()
     return games_info, player_info
 
-def get_unique_lineups(grouped_lineups, player_info):
-    unique_player_lineups = {}
-    unique_lineups = grouped_lineups['LINEUP_KEY'].unique().tolist()
-    unique_lineups = [ast.literal_eval(lineup) for lineup in unique_lineups]
-    my_players = player_info['PLAYER_ID'].unique().tolist()
-    my_players = [int(player) for player in my_players]
-    for player in my_players:
-        player_lineups = []
-        for lineup in unique_lineups:
-            if player in lineup:
-                player_lineups.append(lineup)
-        unique_player_lineups[player] = player_lineups
-    return unique_player_lineups, my_players
-
 def get_lineup_level_data(data):
     lineup_level = (
-        data.groupby(by=['LINEUP_KEY'], as_index=False)
+        data.groupby(by=['LINEUP_MASK'], as_index=False)
             .agg(
                 GAME_COUNT=('OPPONENT', 'count'),
                 TOTAL_MIN=('TOTAL_MIN', 'sum'),
@@ -210,7 +137,7 @@ def get_player_level(data):
 
 def get_game_level(data):
     game_level = (
-        data.groupby(by=['LINEUP_KEY', 'OPPONENT'], as_index=False)
+        data.groupby(by=['LINEUP_MASK', 'OPPONENT'], as_index=False)
             .agg(
                 TOTAL_MIN=('TOTAL_MIN', 'sum'),
                 POINTS_SCORED=('POINTS_SCORED', 'sum'),
@@ -241,20 +168,12 @@ clean_lineups = build_lineup_intervals(minutes_data=minute_data)
 games_info, player_info = get_game_player_info(minutes_data=minute_data)
 games_info_dict = dict(zip(games_info['GAME_ID'], games_info['GAME_DATE']))
 grouped_lineups = group_data(clean_lineups=clean_lineups, game_dict=games_info_dict)
-unique_player_lineups, my_players = get_unique_lineups(grouped_lineups=grouped_lineups, player_info=player_info)
+lineup_index = lineups.LineupIndex(
+    masks=grouped_lineups['LINEUP_MASK'],
+    players=lineups.lineup_players(minutes_data=minute_data)
+)
 player_map = dict(zip(player_info['PLAYER_NAME'], player_info['PLAYER_ID'].astype(int)))
-
-def lineup_ids_to_names(lineup_key):
-    try:
-        # lineup_key may be a stringified tuple like "(1, 2, 3, 4, 5)"
-        ids = ast.literal_eval(lineup_key) if isinstance(lineup_key, str) else lineup_key
-    except Exception:
-        return lineup_key
-    try:
-        names = [player_map.get(int(pid), str(pid)) for pid in ids]
-    except Exception:
-        names = [player_map.get(pid, str(pid)) for pid in ids]
-    return tuple(zip(names))
+player_names = dict(zip(player_info['PLAYER_ID'].astype(int), player_info['PLAYER_NAME']))
 
 
 col1, col2 = st.columns(2)
@@ -275,22 +194,10 @@ if view_analytics == 'Player Lineup':
         min_threshold = st.number_input(label='Minimum minutes to consider', step=1, value=2)
 
     if selected_player:
-        that_player_lineups = unique_player_lineups.get(selected_player)
-        df = pd.DataFrame(
-            data=that_player_lineups, 
-            columns=['PLAYER_1', 'PLAYER_2', 'PLAYER_3', 'PLAYER_4', 'PLAYER_5']
-        )
-        df['LINEUP_KEY'] = tuple(
-            zip(
-                df['PLAYER_1'], 
-                df['PLAYER_2'], 
-                df['PLAYER_3'], 
-                df['PLAYER_4'],
-                df['PLAYER_5']
-            )
-        )
-        df['LINEUP_KEY'] = df['LINEUP_KEY'].astype(str)
-        merged = pd.merge(df, grouped_lineups, on=['LINEUP_KEY'])
+        that_player_lineups = lineup_index.containing([selected_player])
+        merged = grouped_lineups[
+            grouped_lineups['LINEUP_MASK'].isin(that_player_lineups)
+        ]
         lineup_level = get_lineup_level_data(merged)
         lineup_level = lineup_level[lineup_level['TOTAL_MIN'] >= min_threshold]
         lineup_level['Minutes per Game'] = (
@@ -298,9 +205,10 @@ if view_analytics == 'Player Lineup':
         )
         lineup_level = lineup_level.rename(columns=_PLAYER_LINEUPS_MAP_NAMES)
 
-        #lineup_level['Lineup'] = lineup_level['LINEUP_KEY']
-        lineup_level['Lineup'] = lineup_level['LINEUP_KEY'].apply(lineup_ids_to_names)
-        lineup_level['Lineups'] = lineup_level['LINEUP_KEY']
+        lineup_level['Lineup'] = lineup_index.names(
+            masks=lineup_level['LINEUP_MASK'], player_names=player_names
+        )
+        lineup_level['Lineups'] = lineup_level['Lineup']
         view_stats = [
             'Plus/Minus per Minute Played', 'Games Played', 
             'Points per Minute Played',
@@ -377,7 +285,9 @@ if view_analytics == 'Overall Lineup':
     )
     lineup_level = lineup_level[lineup_level['TOTAL_MIN'] >= min_threshold]
     lineup_level = lineup_level.rename(columns=_PLAYER_LINEUPS_MAP_NAMES)
-    lineup_level['Lineup'] = lineup_level['LINEUP_KEY']
+    lineup_level['Lineup'] = lineup_index.names(
+        masks=lineup_level['LINEUP_MASK'], player_names=player_names
+    )
     view_stats = [
             'Plus/Minus per Minute Played',
             'Points per Minute Played',
@@ -418,7 +328,7 @@ if view_analytics == 'Game':
     game_clean_data['GAME_COUNT'] = 1
     game_data = game_clean_data.rename(columns=_PLAYER_LINEUPS_MAP_NAMES)
 
-    game_data['Lineup'] = game_data['LINEUP_KEY']
+    game_data['Lineup'] = lineup_index.keys(masks=game_data['LINEUP_MASK'])
     games = game_data['OPPONENT'].unique().tolist()
     col1, col2 = st.columns(2)
     with col1:
@@ -3,13 +3,15 @@ import plotly.express as px
 import pandas as pd
 import polars as pl
 import numpy as np
-from py import sql, data_source
+from py import sql, data_source, metrics
 import plotly.graph_objects as go
 pd.options.mode.chained_assignment = None
 
-st.cache_resource.clear()
 st.set_page_config(layout='wide')
-sql_lite_connect = st.secrets['nda_gbb_connection']['DB_CONNECTION']
+# Read-only page: prefer a local SQLite/DuckDB replica when one is set.
+sql_lite_connect = st.secrets['nda_gbb_connection'].get(
+    'ANALYTICS_CONNECTION', st.secrets['nda_gbb_connection']['DB_CONNECTION']
+)
 list_of_stats = [
     'LABEL', 'EFG%', 'TURNOVER_RATE', 'PPA', 
     'POINTS_PER_POSSESSION', 'FREE_THROW_RATE', 'TRUE_SHOOTING_PERCENTAGE',
@@ -22,195 +24,98 @@ other_stats = [
     'Game Score', 'Minutes', 'FTR'
 ]
 
+team_columns = {
+    'LABEL': 'Opponent',
+    'OFFENSIVE_EFFICENCY': 'OE',
+    'EFG%': 'EFG %',
+    '2PPA': '2 PPA',
+    '3PPA': '3 PPA',
+    'PPA': 'PPA',
+    'POINTS': 'Points',
+    'GAME_SCORE': 'Game Score',
+    'POSSESSIONS': 'Possessions',
+    'TURNOVER_RATE': 'TO %',
+    'TRUE_SHOOTING_PERCENTAGE': 'TS %',
+    'POINTS_PER_POSSESSION': 'PPP',
+    'FREE_THROW_RATE': 'FTR',
+    'GAME_DATE': 'Date',
+}
+player_columns = {
+    'OFFENSIVE_EFFICENCY': 'OE',
+    'EFG%': 'EFG %',
+    'TRUE_SHOOTING_PERCENTAGE': 'TS %',
+    '2PPA': '2 PPA',
+    '3PPA': '3 PPA',
+    'PPA': 'PPA',
+    'POINTS': 'Points',
+    'GAME_SCORE': 'Game Score',
+    'MINUTES_PLAYED': 'Minutes',
+    'FREE_THROW_RATE': 'FTR',
+}
+
 # ----------------------------------------------------------------------------
-@st.cache_resource
+@st.cache_resource(ttl=300)
 def load_data():
     game_summary = data_source.run_query(
-        sql=sql.get_game_summary_sql(), connection=sql_lite_connect
+        sql=sql.get_game_summary_sql(),
+        connection=sql_lite_connect,
+        output='polars',
+        dtypes=data_source.DTYPES
+    )
+    # Parsed once here instead of split back out of LABEL on every view
+    return game_summary.with_columns(
+        GAME_DATE=pl.col('DATE').str.strptime(pl.Date, '%m/%d/%Y', strict=False)
     )
-    return game_summary
 
 # ----------------------------------------------------------------------------
-def get_team_games(game_summary):
-    game_summary_pl = pl.from_pandas(data=game_summary)
-    team_data = (
-        game_summary_pl.groupby(by=['LABEL', 'SEASON']).sum()
+def sum_by(data, keys):
+    return (
+        data.groupby(by=keys)
+            .agg(pl.col(pl.NUMERIC_DTYPES).exclude(keys).sum())
     )
-    return team_data
-
 
 # ----------------------------------------------------------------------------
-@st.cache_data(show_spinner=True)
-def apply_derived(data):
-    data = pl.from_pandas(data)
-    data = data.with_columns(
-        TWO_POINTS_SCORED=(2 * pl.col(name='TWO_FGM')),
-        THREE_POINTS_SCORED=(3 * pl.col(name='THREE_FGM'))
+def season_trend_query(game_summary, season):
+    '''
+    Team-game, player-game and player-season totals with derived metrics
+    for one season, as lazy queries over the raw summary rows.
+
+    All three start from the same SEASON filter, which Polars pushes down
+    to the scan, so other seasons are never grouped.
+    '''
+    season_rows = game_summary.filter(pl.col('SEASON') == season)
+    team_data = (
+        metrics.derive(sum_by(season_rows, ['LABEL', 'GAME_DATE']))
+               .select([*list_of_stats, 'GAME_DATE'])
+               .sort(by=['GAME_DATE', 'LABEL'])
+               .rename(team_columns)
     )
-    data = data.with_columns(
-        TOTAL_POINTS_SCORED=(
-            pl.col(name='TWO_POINTS_SCORED') 
-            + pl.col(name='THREE_POINTS_SCORED')
-            + pl.col(name='FTM')
-        ),
-        FIELD_POINTS_SCORED=(
-            pl.col(name='TWO_POINTS_SCORED')
-            + pl.col(name='THREE_POINTS_SCORED')
-        ),
-        OE_NUM=(
-            pl.col(name='FGM') + pl.col(name='ASSISTS')
-        ),
-        OE_DENOM=(
-            pl.col(name='FGA')
-            - pl.col(name='OFFENSIVE_REBOUNDS') 
-            + pl.col(name='ASSISTS') 
-            + pl.col(name='TURNOVER')
-        ),
-        EFG_NUM=(
-            pl.col(name='TWO_FGM') + (1.5*pl.col(name='THREE_FGM'))
-        ),
-        POSSESSIONS=(
-            (pl.col(name='FGA')-pl.col(name='OFFENSIVE_REBOUNDS'))
-               + pl.col(name='TURNOVER') 
-               + (.44 * pl.col(name='FTA'))
-        )
+    player_level = (
+        metrics.derive(sum_by(season_rows, ['NAME', 'LABEL', 'GAME_DATE']))
+               .sort(by=['GAME_DATE', 'NAME', 'LABEL'])
+               .rename({**player_columns, 'GAME_DATE': 'Date'})
     )
-    data = data.with_columns(
-        TURNOVER_RATE=(
-            pl.col(name='TURNOVER') / pl.col(name='POSSESSIONS')
-        )
+    game_len = season_rows.select(
+        GAME_LEN=pl.col('GAME_ID').n_unique()
     )
-    data = data.with_columns(
-        pl.when(condition=pl.col(name='TWO_FGA') > 0)
-          .then(statement=pl.col(name='TWO_POINTS_SCORED') 
-                / pl.col(name='TWO_FGA'))
-          .otherwise(statement=0)
-          .alias(name='2PPA'),
-        pl.when(condition=pl.col(name='THREE_FGA') > 0)
-          .then(statement=pl.col(name='THREE_POINTS_SCORED') 
-              / pl.col(name='THREE_FGA'))
-          .otherwise(statement=0)
-          .alias(name='3PPA'),
-        pl.when(condition=pl.col(name='FGA') > 0)
-          .then(statement=pl.col(name='FIELD_POINTS_SCORED') 
-                / pl.col(name='FGA'))
-          .otherwise(statement=0)
-          .alias(name='PPA'),
-        pl.when(condition=pl.col(name='OE_DENOM') != 0)
-          .then(statement=pl.col(name='OE_NUM') 
-                / pl.col(name='OE_DENOM'))
-          .otherwise(statement=0)
-          .alias(name='OFFENSIVE_EFFICENCY'),
-        pl.when(condition=pl.col(name='FGA') > 0)
-          .then(statement=pl.col(name='EFG_NUM') 
-                / pl.col(name='FGA'))
-          .otherwise(statement=0)
-          .alias(name='EFG%'),
-
+    player_season_avg = (
+        metrics.derive(sum_by(season_rows, ['NAME']))
+               .join(game_len, how='cross')
+               .with_columns(GAME_SCORE=pl.col('GAME_SCORE') / pl.col('GAME_LEN'))
+               .sort(by='NAME')
+               .rename(player_columns)
     )
-    data = data.with_columns(
-        EFF_POINTS=(
-            pl.col(name='POINTS') * pl.col(name='OFFENSIVE_EFFICENCY')
-        ),
-        POINTS_PER_POSSESSION=(
-            pl.col(name='POINTS') / pl.col(name='POSSESSIONS')
-        ),
-        TRUE_SHOOTING_PERCENTAGE=(
-            pl.when(condition=pl.col(name='FGA') + (.44 * pl.col(name='FTA')) > 0)
-              .then(statement=pl.col(name='POINTS') / (2 * (pl.col(name='FGA') + (.44 * pl.col(name='FTA')))))
-              .otherwise(statement=0)
-              .alias(name='TS %')
-        ),
-        FREE_THROW_RATE=(
-            pl.when(condition=pl.col(name='FGA') > 0)
-                .then(statement=pl.col(name='FTA') / pl.col(name='FGA'))
-                .otherwise(statement=0)
-                .alias(name='FTR')
-        ),
-        POSSESSIONS_PER_MINUTE=(
-            pl.col('POSSESSIONS') / 36
-        )
-    )
-    data = data.to_pandas()
-    return data
-
-# ----------------------------------------------------------------------------
-@st.cache_data(show_spinner=True)
-def game_seasons(game_summary, season):
-    game_summary_season = (
-        game_summary[game_summary['SEASON'] == season]
-                    .sort_values(by='GAME_ID')
-    )
-    return game_summary_season
+    return team_data, player_level, player_season_avg
 
 # ----------------------------------------------------------------------------
-@st.cache_data(show_spinner=True)
-def get_game_player_details(team_data, game_summary_season, season):
-    final_data = game_summary_season
-    team_data = team_data[team_data['SEASON'] == season]
-    team_data = apply_derived(data=team_data)
-    team_data = (
-            team_data[list_of_stats]
-                     .rename(columns={'LABEL': 'Opponent'})
-                     .round(decimals=4)
-    )
-    game_len = game_summary_season['GAME_ID'].nunique()
-    player_level = final_data.groupby(by=['NAME', 'LABEL'], as_index=False).sum()
-    player_season_avg = game_summary_season.groupby(by='NAME', as_index=False).sum()
-    player_level = apply_derived(data=player_level).round(decimals=4)
-    player_season_avg = apply_derived(data=player_season_avg).round(decimals=4)
-    player_season_avg['GAME_LEN'] = game_len
-    player_season_avg['GAME_SCORE'] = player_season_avg['GAME_SCORE'] / player_season_avg['GAME_LEN']
-    team_data = team_data.rename(
-            columns={
-                'OFFENSIVE_EFFICENCY': 'OE',
-                'EFG%': 'EFG %',
-                '2PPA': '2 PPA',
-                '3PPA': '3 PPA',
-                'PPA': 'PPA',
-                'POINTS': 'Points',
-                'GAME_SCORE': 'Game Score',
-                'POSSESSIONS': 'Possessions',
-                'TURNOVER_RATE': 'TO %',
-                'TRUE_SHOOTING_PERCENTAGE': 'TS %',
-                'POINTS_PER_POSSESSION': 'PPP',
-                'FREE_THROW_RATE': 'FTR'
-            }
-        )
-        
-    player_level = player_level.rename(
-            columns={
-                'OFFENSIVE_EFFICENCY': 'OE',
-                'EFG%': 'EFG %',
-                'TRUE_SHOOTING_PERCENTAGE': 'TS %',
-                '2PPA': '2 PPA',
-                '3PPA': '3 PPA',
-                'PPA': 'PPA',
-                'POINTS': 'Points',
-                'GAME_SCORE': 'Game Score',
-                'MINUTES_PLAYED': 'Minutes',
-                'FREE_THROW_RATE': 'FTR'
-            }
+@st.cache_data(show_spinner=True, ttl=300)
+def get_game_player_details(season):
+    frames = pl.collect_all(
+        season_trend_query(game_summary=load_data().lazy(), season=season)
     )
-    player_level['Date'] = player_level['LABEL'].apply(lambda x: x.split(' - ')[1])
-    player_level['Date'] = pd.to_datetime(player_level['Date']).dt.date
-    player_season_avg = player_season_avg.rename(
-            columns={
-                'OFFENSIVE_EFFICENCY': 'OE',
-                'EFG%': 'EFG %',
-                'TRUE_SHOOTING_PERCENTAGE': 'TS %',
-                '2PPA': '2 PPA',
-                '3PPA': '3 PPA',
-                'PPA': 'PPA',
-                'POINTS': 'Points',
-                'GAME_SCORE': 'Game Score',
-                'MINUTES_PLAYED': 'Minutes',
-                'FREE_THROW_RATE': 'FTR'
-            }
+    team_data, player_level, player_season_avg = (
+        frame.to_pandas().round(decimals=4) for frame in frames
     )
-    team_data['Date'] = team_data['Opponent'].apply(lambda x: x.split(' - ')[1])
-    team_data['Date'] = pd.to_datetime(team_data['Date']).dt.date
-    player_level = player_level.sort_values(by='Date', ascending=True).reset_index(drop=True)
     return team_data, player_level, player_season_avg
 
 # ---------------------------------------------------------------------------
@@ -235,9 +140,6 @@ def clean_frames(team_data, player_level, player_season_avg, other_stats):
             'NAME': st.column_config.Column(width=125),
             'Minutes': st.column_config.NumberColumn(format="%.0f", width=None),
     }
-    team_data['DATE'] = team_data['Opponent'].apply(lambda x: x.split(' - ')[1])
-    team_data = team_data.sort_values(by='DATE', ascending=False).reset_index(drop=True)
-    team_data = team_data.drop(columns=['DATE'])
 
     player_level['EFG %'] = player_level['EFG %'] * 100
     player_level['TS %'] = player_level['TS %'] * 100
@@ -256,19 +158,17 @@ def clean_frames(team_data, player_level, player_season_avg, other_stats):
 
 # ============================================================================
 game_summary = load_data()
-team_data = get_team_games(game_summary=game_summary)
+if game_summary.is_empty():
+    st.info('No game summaries yet; they fill in once plays are added.')
+    st.stop()
 col1, col2, col3 = st.columns([2, 2, 4])
-team_data = team_data.to_pandas()
-season_list = game_summary['SEASON'].unique().tolist()
+season_list = game_summary['SEASON'].unique().to_list()
 season_list = sorted(season_list, reverse=True)
 
 with col1:
     season = st.radio(label='Select Season', options=season_list, horizontal=True)
 
-game_summary_season = game_seasons(game_summary=game_summary, season=season)
 team_data, player_level, player_season_avg = get_game_player_details(
-    team_data=team_data,
-    game_summary_season=game_summary_season,
     season=season
 )
 